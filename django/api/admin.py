@@ -1,7 +1,10 @@
 from django.contrib import admin
+from .blog_views import invalidate_detail
+from .card_search import refresh_card_search
+from .jobs import enqueue_snapshot_export
 from .models import (
     User, Account, Session, VerificationToken, News, Inquiry, Blog, Contact,
-    Team, Player, ToppsSet, ToppsCard, ToppsCardVariant
+    Team, Player, ToppsSet, ToppsCard, ToppsCardVariant, BackgroundJob
 )
 
 
@@ -73,6 +76,21 @@ class BlogAdmin(admin.ModelAdmin):
     search_fields = ('title', 'content')
     ordering = ('-created_at',)
 
+    def save_model(self, request, obj, form, change):
+        # 詳細APIのキャッシュも消す
+        super().save_model(request, obj, form, change)
+        if change:
+            invalidate_detail(obj, form.initial.get('slug'))
+
+    def delete_model(self, request, obj):
+        invalidate_detail(obj)
+        super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            invalidate_detail(obj)
+        super().delete_queryset(request, queryset)
+
 
 @admin.register(Team)
 class TeamAdmin(admin.ModelAdmin):
@@ -82,6 +100,21 @@ class TeamAdmin(admin.ModelAdmin):
     ordering = ('league', 'division', 'order', 'full_name')
     prepopulated_fields = {'slug': ('full_name',)}
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change:
+            refresh_card_search(ToppsCard.objects.filter(team=obj))
+        # 選手のレスポンスにもチームが含まれる
+        enqueue_snapshot_export(['teams', 'players'])
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        enqueue_snapshot_export(['teams', 'players'])
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        enqueue_snapshot_export(['teams', 'players'])
+
 
 @admin.register(Player)
 class PlayerAdmin(admin.ModelAdmin):
@@ -90,6 +123,20 @@ class PlayerAdmin(admin.ModelAdmin):
     search_fields = ('full_name', 'first_name', 'last_name')
     ordering = ('team', 'position', 'jersey_number', 'last_name')
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change:
+            refresh_card_search(ToppsCard.objects.filter(player=obj))
+        enqueue_snapshot_export(['players'])
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        enqueue_snapshot_export(['players'])
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        enqueue_snapshot_export(['players'])
+
 
 @admin.register(ToppsSet)
 class ToppsSetAdmin(admin.ModelAdmin):
@@ -99,6 +146,11 @@ class ToppsSetAdmin(admin.ModelAdmin):
     ordering = ('-year', 'name')
     prepopulated_fields = {'slug': ('name',)}
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change:
+            refresh_card_search(ToppsCard.objects.filter(topps_set=obj))
+
 
 class ToppsCardVariantInline(admin.TabularInline):
     model = ToppsCardVariant
@@ -114,6 +166,11 @@ class ToppsCardAdmin(admin.ModelAdmin):
     ordering = ('topps_set', 'card_number')
     inlines = [ToppsCardVariantInline]
 
+    def save_model(self, request, obj, form, change):
+        # 一覧APIのリードモデルも更新
+        super().save_model(request, obj, form, change)
+        refresh_card_search(ToppsCard.objects.filter(pk=obj.pk))
+
 
 @admin.register(ToppsCardVariant)
 class ToppsCardVariantAdmin(admin.ModelAdmin):
@@ -121,3 +178,15 @@ class ToppsCardVariantAdmin(admin.ModelAdmin):
     list_filter = ('variant_type', 'is_one_of_one')
     search_fields = ('card__card_number', 'card__player__full_name', 'variant_name')
     ordering = ('card', 'variant_type', 'serial_number')
+
+
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = ('task', 'status', 'attempts', 'requested_by', 'created_at', 'finished_at')
+    list_filter = ('task', 'status')
+    search_fields = ('id', 'dedupe_key')
+    ordering = ('-created_at',)
+    readonly_fields = (
+        'id', 'task', 'payload', 'dedupe_key', 'result', 'error', 'attempts', 'worker',
+        'requested_by', 'created_at', 'started_at', 'finished_at',
+    )
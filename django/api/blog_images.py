@@ -0,0 +1,174 @@
+"""
+ブログ用アップロード画像の変換
+アップロードされた画像からメタデータ（EXIF等）を除いたレスポンシブ用の WebP
+（480 / 960 / 1600px）を生成し、MEDIA_ROOT/blog/<ID>/ に保存する
+
+最大サイズはリクエスト内で生成し（返したURLがすぐに表示できるように）、
+小さいサイズはジョブキュー（run_jobs ワーカー）で生成する
+元画像は BLOG_UPLOAD_STAGING_DIR に置き、すべてのサイズを生成できるまで消さない
+"""
+import logging
+import os
+import tempfile
+import uuid
+
+from django.conf import settings
+
+from . import jobs
+
+try:
+    from PIL import ExifTags, Image, ImageOps
+except ImportError:
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+# 生成する幅（px）。元画像より大きい幅は生成しない
+UPLOAD_WIDTHS = (480, 960, 1600)
+
+WEBP_OPTIONS = {'format': 'WEBP', 'quality': 82, 'method': 4}
+
+UPLOAD_DIR = 'blog'
+
+
+def _staging_dir():
+    # ワーカーからも読めるよう、コンテナ間で共有するディレクトリに置く
+    path = str(settings.BLOG_UPLOAD_STAGING_DIR)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _variant_path(key, width):
+    return os.path.join(settings.MEDIA_ROOT, UPLOAD_DIR, key, f'{width}.webp')
+
+
+def _variant_url(key, width):
+    return f'{settings.MEDIA_URL}{UPLOAD_DIR}/{key}/{width}.webp'
+
+
+def _oriented_size(image):
+    """EXIFの向きを反映した後の (幅, 高さ)（5〜8 は縦横が入れ替わる）"""
+    width, height = image.size
+    if image.getexif().get(ExifTags.Base.Orientation) in (5, 6, 7, 8):
+        return height, width
+    return width, height
+
+
+def save_upload(file):
+    """
+    アップロードファイルを一時ファイルに書き出し（チャンク単位でメモリに載せない）、
+    ヘッダーだけを読んで画像サイズを確認する
+    戻り値: (一時ファイルのパス, 幅, 高さ, アニメーションかどうか)（幅・高さはEXIFの向きを反映した値）
+    不正な画像の場合は ValueError
+    """
+    fd, staging_path = tempfile.mkstemp(dir=_staging_dir())
+    with os.fdopen(fd, 'wb') as dest:
+        for chunk in file.chunks():
+            dest.write(chunk)
+    try:
+        with Image.open(staging_path) as image:
+            width, height = _oriented_size(image)
+            animated = getattr(image, 'is_animated', False)
+    except (OSError, Image.DecompressionBombError) as e:
+        os.unlink(staging_path)
+        raise ValueError(str(e)) from e
+    return staging_path, width, height, animated
+
+
+def variant_widths(width):
+    return sorted({min(w, width) for w in UPLOAD_WIDTHS})
+
+
+def variant_map(key, widths):
+    """{幅: URL} と srcset 属性の文字列"""
+    variants = {str(w): _variant_url(key, w) for w in widths}
+    srcset = ', '.join(f'{url} {w}w' for w, url in variants.items())
+    return variants, srcset
+
+
+def _write_variant(image, path):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            image.save(f, **WEBP_OPTIONS)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def write_variants(staging_path, key, widths, animated=False):
+    """元画像から指定した幅のWebPを生成する（失敗した場合は例外。元画像は消さない）"""
+    os.makedirs(os.path.join(settings.MEDIA_ROOT, UPLOAD_DIR, key), exist_ok=True)
+    with Image.open(staging_path) as image:
+        if animated:
+            # アニメーションはフレームを保ったままWebPに変換する（リサイズしない）
+            image.save(_variant_path(key, widths[-1]), save_all=True, **WEBP_OPTIONS)
+            return
+        # JPEGは必要な解像度で縮小デコードする（draft は回転前の向きで指定するため、縦横が入れ替わる場合は高さで指定）
+        target = widths[-1]
+        if _oriented_size(image) == image.size:
+            image.draft('RGB', (target, target * image.height // image.width or 1))
+        else:
+            image.draft('RGB', (target * image.width // image.height or 1, target))
+        # EXIFの向きを反映してから、メタデータを持たない新しい画像として保存する
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+        image.info = {}
+        for width in reversed(widths):
+            if width < image.width:
+                image = image.resize((width, max(round(image.height * width / image.width), 1)), Image.LANCZOS)
+            _write_variant(image, _variant_path(key, width))
+
+
+def process_variants(staging_name, key, widths):
+    """
+    残りのサイズを生成し、元画像を削除する（blog_image_variants ジョブから実行）
+    失敗した場合は元画像を残したまま例外を送出し、ジョブのリトライに任せる
+    """
+    staging_path = os.path.join(_staging_dir(), staging_name)
+    write_variants(staging_path, key, widths)
+    os.unlink(staging_path)
+    return {'key': key, 'widths': widths}
+
+
+def handle_upload(file):
+    """
+    アップロードを受け付けて最大サイズを生成し、残りのサイズはジョブに登録する
+    戻り値: {'url': 最大サイズのURL, 'variants': {幅: URL}, 'srcset': srcset属性}
+    画像を変換できない場合は ValueError
+    """
+    key = uuid.uuid4().hex
+    staging_path, width, _, animated = save_upload(file)
+    widths = [min(max(UPLOAD_WIDTHS), width)] if animated else variant_widths(width)
+    try:
+        write_variants(staging_path, key, widths[-1:], animated)
+    except Exception as e:
+        # URLを返さないので元画像も不要
+        logger.exception(f"ブログ画像の変換に失敗しました: {key}")
+        os.unlink(staging_path)
+        raise ValueError(str(e)) from e
+
+    if len(widths) > 1:
+        jobs.enqueue(
+            'blog_image_variants',
+            {'staging_name': os.path.basename(staging_path), 'key': key, 'widths': widths[:-1]},
+            dedupe_key=f'blog_image_variants:{key}',
+        )
+    else:
+        os.unlink(staging_path)
+    variants, srcset = variant_map(key, widths)
+    return {'url': variants[str(widths[-1])], 'variants': variants, 'srcset': srcset}
+
+
+def save_original(file):
+    """Pillowがない環境用: アップロードされたファイルをそのまま保存する"""
+    ext = os.path.splitext(file.name)[1].lower()
+    filename = f"{uuid.uuid4().hex}{ext}"
+    upload_dir = os.path.join(settings.MEDIA_ROOT, UPLOAD_DIR)
+    os.makedirs(upload_dir, exist_ok=True)
+    with open(os.path.join(upload_dir, filename), 'wb+') as dest:
+        for chunk in file.chunks():
+            dest.write(chunk)
+    return {'url': f"{settings.MEDIA_URL}{UPLOAD_DIR}/{filename}"}
@@ -0,0 +1,131 @@
+"""
+ブログの閲覧（詳細APIのキャッシュと閲覧数カウンター）
+
+詳細APIのレスポンスは ID / slug ごとにキャッシュし、superuserの編集・削除時に消す
+（どのワーカーのキャッシュも消えるよう、共有キャッシュ（settings.CACHES の Redis）に置く前提）
+
+閲覧数は閲覧ごとに Blog.view_count を UPDATE せず、増分をキャッシュに貯めて一定間隔でまとめて反映する
+（人気記事の行ロックの競合を避ける。返す閲覧数は未反映の増分を足した概算）
+増分はワーカー間で共有され再起動後も残るキャッシュ（settings.CACHES の Redis）に置く前提。
+反映は閲覧時のほか、run_scheduler の定期ジョブとプロセスの終了時にも行う（その後の閲覧がない記事の増分も反映する）
+"""
+import atexit
+import logging
+
+from django.core.cache import cache
+from django.db.models import Case, F, IntegerField, Value, When
+
+from .models import Blog
+
+logger = logging.getLogger(__name__)
+
+# 詳細APIのレスポンスをキャッシュする時間（秒）
+DETAIL_CACHE_TIMEOUT = 60 * 10
+
+# 貯めた増分をDBに反映する間隔（秒）
+FLUSH_INTERVAL = 30
+
+FLUSH_LOCK_KEY = 'blog_views:flush'
+
+# 反映中の印（同時に2つの反映が同じ増分を足さないように）
+FLUSH_MUTEX_KEY = 'blog_views:flushing'
+FLUSH_MUTEX_TIMEOUT = 60
+
+_exit_flush_registered = False
+
+
+def detail_cache_key(identifier):
+    """
+    ID・slug のどちらで引かれても同じ規則のキー
+    ID は数値に正規化する（/api/blogs/01/ と /api/blogs/1/ を同じキーにして、編集時に消せるように）
+    """
+    identifier = str(identifier)
+    if identifier.isdigit():
+        identifier = str(int(identifier))
+    return f'blog_detail:{identifier}'
+
+
+def invalidate_detail(blog, *old_slugs):
+    """ブログの詳細キャッシュを消す（slug を変更した場合は変更前の slug も渡す）"""
+    identifiers = {str(blog.pk), blog.slug, *old_slugs} - {None, ''}
+    cache.delete_many([detail_cache_key(identifier) for identifier in identifiers])
+
+
+def _counter_key(blog_id):
+    return f'blog_views:{blog_id}'
+
+
+def record_view(blog_id, view_count):
+    """
+    閲覧を1件記録し、概算の閲覧数（DBの値 + 未反映の増分）を返す
+    前回の反映から FLUSH_INTERVAL 秒以上経っていれば、このリクエストで反映する
+    """
+    global _exit_flush_registered
+    if not _exit_flush_registered:
+        # 閲覧を記録したプロセスだけ、終了時に残りの増分を反映する
+        atexit.register(_flush_at_exit)
+        _exit_flush_registered = True
+
+    key = _counter_key(blog_id)
+    # タイムアウトなし（Redis の volatile-lru で追い出されない）
+    cache.add(key, 0, None)
+    try:
+        pending = cache.incr(key)
+    except ValueError:
+        # add と incr の間にキーが消えた場合
+        cache.set(key, 1, None)
+        pending = 1
+
+    if cache.add(FLUSH_LOCK_KEY, 1, FLUSH_INTERVAL):
+        # view_count は反映前に読んだ値なので、反映してもこのリクエストの戻り値は変わらない
+        try:
+            flush_views()
+        except Exception:
+            logger.exception("閲覧数の反映に失敗しました")
+    return view_count + pending
+
+
+def flush_views():
+    """
+    キャッシュに貯まった増分を1回のUPDATEで Blog.view_count に反映する
+    戻り値: {ブログID: 反映した増分}（他のプロセスが反映中の場合は None）
+    """
+    if not cache.add(FLUSH_MUTEX_KEY, 1, FLUSH_MUTEX_TIMEOUT):
+        return None
+    try:
+        return _flush_views()
+    finally:
+        cache.delete(FLUSH_MUTEX_KEY)
+
+
+def _flush_views():
+    blog_ids = list(Blog.objects.values_list('pk', flat=True))
+    counts = cache.get_many([_counter_key(blog_id) for blog_id in blog_ids])
+    increments = {
+        blog_id: counts[_counter_key(blog_id)]
+        for blog_id in blog_ids if counts.get(_counter_key(blog_id))
+    }
+    if not increments:
+        return {}
+
+    Blog.objects.filter(pk__in=increments).update(
+        view_count=F('view_count') + Case(
+            *[When(pk=blog_id, then=Value(count)) for blog_id, count in increments.items()],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+    )
+    # 読み取り後に増えた分は残す
+    for blog_id, count in increments.items():
+        try:
+            cache.decr(_counter_key(blog_id), count)
+        except ValueError:
+            pass
+    return increments
+
+
+def _flush_at_exit():
+    try:
+        flush_views()
+    except Exception:
+        logger.exception("終了時の閲覧数の反映に失敗しました")
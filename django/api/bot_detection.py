@@ -0,0 +1,266 @@
+"""
+User-Agent / Referer の判定モジュール
+AntiScrapingMiddleware・ReferrerCheckMiddleware から利用する
+
+- ブロック/許可パターンを1つの正規表現にまとめ、1回の走査で判定
+- 判定結果はUser-Agent文字列をキーにLRUキャッシュ
+- ルールはデータファイル（settings.BOT_RULES_FILE）から読み込み、
+  ファイルが更新されれば再起動なしで反映
+- ルールごとのヒット数と判定処理の所要時間を集計
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from functools import lru_cache, partial
+from urllib.parse import urlsplit
+
+from django.conf import settings
+
+logger = logging.getLogger('django.security')
+
+# データファイルが無い場合のデフォルトルール
+# 既知のボット/スクレイパーのUser-Agentパターン
+DEFAULT_BLOCKED_USER_AGENTS = [
+    r'scrapy',
+    r'python-requests',
+    r'python-urllib',
+    r'curl/',
+    r'wget/',
+    r'httpie',
+    r'PostmanRuntime',
+    r'Java/',
+    r'Go-http-client',
+    r'libwww-perl',
+    r'Mechanize',
+    r'PhantomJS',
+    r'HeadlessChrome',
+    r'selenium',
+    r'puppeteer',
+    r'playwright',
+]
+
+# 許可するボット（検索エンジン等）
+DEFAULT_ALLOWED_USER_AGENTS = [
+    r'Googlebot',
+    r'Bingbot',
+    r'Slurp',  # Yahoo
+    r'DuckDuckBot',
+]
+
+# 許可するRefererのドメイン（サブドメインも許可）
+DEFAULT_ALLOWED_REFERER_DOMAINS = [
+    'localhost',
+    '127.0.0.1',
+    'baseball-now.com',
+    'www.baseball-now.com',
+]
+
+# User-Agentが空の場合のルール名
+EMPTY_USER_AGENT_RULE = '<empty>'
+
+# ルールファイルの更新確認間隔（秒）
+RELOAD_CHECK_INTERVAL = 30
+
+
+class RequestClassifier:
+    """
+    User-Agent / Referer を判定し、結果をキャッシュする
+    """
+
+    def __init__(self, rules_file=None, cache_size=4096):
+        self.rules_file = rules_file
+        self.cache_size = cache_size
+        self.rule_hits = Counter()
+        self.calls = 0
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+        self._last_check = time.monotonic()
+        self._load_rules()
+
+    # ------------------------------------------------------------------
+    # ルール読み込み
+    # ------------------------------------------------------------------
+
+    def _read_rules_file(self):
+        """ルールファイルを読み込む（無ければデフォルト）"""
+        if self.rules_file:
+            try:
+                with open(self.rules_file, encoding='utf-8') as f:
+                    return json.load(f)
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError) as e:
+                logger.error(f"Failed to load bot rules from {self.rules_file}: {e}")
+        return {}
+
+    @staticmethod
+    def _compile_rules(rules):
+        """
+        ルールから (ルール一覧, 正規表現, 許可ドメイン) を作る
+        パターンが文字列のリストでない・正規表現として不正な場合は ValueError
+        """
+        if not isinstance(rules, dict):
+            raise ValueError("rules must be a JSON object")
+        lists = {}
+        for key, default in (
+            ('blocked_user_agents', DEFAULT_BLOCKED_USER_AGENTS),
+            ('allowed_user_agents', DEFAULT_ALLOWED_USER_AGENTS),
+            ('allowed_referer_domains', DEFAULT_ALLOWED_REFERER_DOMAINS),
+        ):
+            value = rules.get(key, default)
+            if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+                raise ValueError(f"{key} must be a list of strings")
+            lists[key] = value
+
+        # 許可/ブロックの全パターンを名前付きグループで1つの正規表現にまとめる
+        rule_list = (
+            [('allow', p) for p in lists['allowed_user_agents']]
+            + [('block', p) for p in lists['blocked_user_agents']]
+        )
+        combined = '|'.join(f'(?P<r{i}>{pattern})' for i, (_, pattern) in enumerate(rule_list))
+        try:
+            regex = re.compile(combined, re.IGNORECASE) if combined else None
+        except re.error as e:
+            raise ValueError(f"invalid user agent pattern: {e}") from e
+        domains = frozenset(d.lower() for d in lists['allowed_referer_domains'])
+        return rule_list, regex, domains
+
+    def _load_rules(self):
+        """
+        ルールを読み込んで判定に使うものを差し替える
+        ルールが不正な場合はエラーを記録して前のルールのまま使う（次の確認時に再度読み込む）
+        """
+        mtime = self._get_rules_mtime()
+        try:
+            rule_list, regex, domains = self._compile_rules(self._read_rules_file())
+        except ValueError as e:
+            logger.error(f"Invalid bot rules in {self.rules_file}, keeping previous rules: {e}")
+            if hasattr(self, '_classify_user_agent'):
+                return
+            # 初回の読み込みで不正な場合はデフォルトのルールを使う
+            rule_list, regex, domains = self._compile_rules({})
+
+        # ルールが変わったのでキャッシュを作り直す（ルールはキャッシュした関数に束縛し、全体を一緒に差し替える）
+        self._rules, self._regex, self._allowed_domains = rule_list, regex, domains
+        self._classify_user_agent = lru_cache(maxsize=self.cache_size)(
+            partial(self._classify_user_agent_uncached, rule_list, regex)
+        )
+        self._check_referer = lru_cache(maxsize=self.cache_size)(
+            partial(self._check_referer_uncached, domains)
+        )
+        self._rules_mtime = mtime
+
+    def _get_rules_mtime(self):
+        try:
+            return os.path.getmtime(self.rules_file)
+        except (OSError, TypeError):
+            return None
+
+    def _maybe_reload(self, now):
+        """一定間隔でルールファイルの更新を確認し、変更があれば再読み込み"""
+        if not self.rules_file or now - self._last_check < RELOAD_CHECK_INTERVAL:
+            return
+        with self._lock:
+            if now - self._last_check < RELOAD_CHECK_INTERVAL:
+                return
+            self._last_check = now
+            if self._get_rules_mtime() != self._rules_mtime:
+                logger.info(f"Reloading bot rules from {self.rules_file}")
+                self._load_rules()
+
+    # ------------------------------------------------------------------
+    # 判定
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _classify_user_agent_uncached(rules, regex, user_agent):
+        """
+        (blocked, rule) を返す
+        許可ボットのパターンに1つでも一致すればブロックしない
+        """
+        if not user_agent:
+            return True, EMPTY_USER_AGENT_RULE
+        if regex is None:
+            return False, None
+
+        blocked_rule = None
+        for match in regex.finditer(user_agent):
+            action, pattern = rules[int(match.lastgroup[1:])]
+            if action == 'allow':
+                return False, pattern
+            if blocked_rule is None:
+                blocked_rule = pattern
+        if blocked_rule is not None:
+            return True, blocked_rule
+        return False, None
+
+    @staticmethod
+    def _check_referer_uncached(allowed_domains, referer):
+        if not referer:
+            return False
+        try:
+            host = urlsplit(referer).hostname
+        except ValueError:
+            return False
+        if not host:
+            return False
+        if host in allowed_domains:
+            return True
+        # サブドメインも許可（例: app.baseball-now.com）
+        return any(host.endswith('.' + domain) for domain in allowed_domains)
+
+    def classify_user_agent(self, user_agent):
+        """
+        User-Agentを判定して (blocked, rule) を返す
+        rule は一致したパターン（一致なしは None）
+        """
+        start = time.perf_counter()
+        self._maybe_reload(time.monotonic())
+        blocked, rule = self._classify_user_agent(user_agent)
+        if rule is not None:
+            self.rule_hits[rule] += 1
+        self.calls += 1
+        self.elapsed += time.perf_counter() - start
+        return blocked, rule
+
+    def is_valid_referer(self, referer):
+        """許可されたドメインからのRefererかチェック"""
+        start = time.perf_counter()
+        valid = self._check_referer(referer)
+        self.calls += 1
+        self.elapsed += time.perf_counter() - start
+        return valid
+
+    def stats(self):
+        """ルールごとのヒット数・キャッシュ状況・所要時間"""
+        ua_cache = self._classify_user_agent.cache_info()
+        referer_cache = self._check_referer.cache_info()
+        return {
+            'rule_hits': dict(self.rule_hits.most_common()),
+            'calls': self.calls,
+            'total_seconds': round(self.elapsed, 6),
+            'avg_microseconds': round(self.elapsed / self.calls * 1_000_000, 3) if self.calls else 0,
+            'user_agent_cache': ua_cache._asdict(),
+            'referer_cache': referer_cache._asdict(),
+        }
+
+
+_classifier = None
+_classifier_lock = threading.Lock()
+
+
+def get_classifier():
+    """プロセス内で共有する RequestClassifier を返す"""
+    global _classifier
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                _classifier = RequestClassifier(
+                    rules_file=getattr(settings, 'BOT_RULES_FILE', None),
+                    cache_size=getattr(settings, 'BOT_RULES_CACHE_SIZE', 4096),
+                )
+    return _classifier
@@ -0,0 +1,114 @@
+"""
+カード画像のローカルサムネイル生成
+Shopify CDN の画像を1回だけダウンロードし、複数サイズの WebP / AVIF を
+MEDIA_ROOT/cards/ に書き出す（nginx が長期キャッシュで配信）
+
+出力先は元画像URLのハッシュで決まるため、image_url が変わらない限り同じファイルを指し、
+変わった場合は別のパスに生成される（nginx 側で immutable として扱える）
+"""
+import hashlib
+import io
+import os
+import tempfile
+
+import requests
+from django.conf import settings
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+try:
+    # Pillow本体がAVIFに対応していない場合のプラグイン（任意）
+    import pillow_avif  # noqa: F401
+except ImportError:
+    pass
+
+# 生成するサムネイルの幅（px）
+THUMBNAIL_WIDTHS = (160, 320, 640)
+
+# 形式ごとの保存オプション
+FORMAT_OPTIONS = {
+    'avif': {'format': 'AVIF', 'quality': 50},
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+}
+
+# ダウンロードする画像の最大サイズ
+MAX_IMAGE_BYTES = 10 * 1024 * 1024
+
+THUMBNAIL_DIR = 'cards'
+
+
+def available_formats():
+    """インストールされている Pillow で書き出せる形式"""
+    if Image is None:
+        return []
+    Image.init()
+    return [name for name, options in FORMAT_OPTIONS.items() if options['format'] in Image.SAVE]
+
+
+def source_key(image_url):
+    return hashlib.sha1(image_url.encode('utf-8')).hexdigest()
+
+
+def download_image(image_url, session=None, timeout=20):
+    """画像をダウンロードする（プロトコル相対URLは https として扱う）"""
+    if image_url.startswith('//'):
+        image_url = 'https:' + image_url
+    response = (session or requests).get(image_url, timeout=timeout, stream=True)
+    response.raise_for_status()
+    content = io.BytesIO()
+    for chunk in response.iter_content(64 * 1024):
+        content.write(chunk)
+        if content.tell() > MAX_IMAGE_BYTES:
+            raise ValueError(f'画像が大きすぎます: {image_url}')
+    return content.getvalue()
+
+
+def _save_atomic(image, path, options):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            image.save(f, **options)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def generate_thumbnails(image_url, content, formats=None, widths=THUMBNAIL_WIDTHS):
+    """
+    画像データからサムネイルを生成し、{幅: {形式: URL}} を返す
+    元画像より大きい幅は生成しない（元画像の幅で1つだけ生成する）
+    """
+    formats = formats or available_formats()
+    key = source_key(image_url)
+    relative_dir = f'{THUMBNAIL_DIR}/{key[:2]}/{key}'
+
+    with Image.open(io.BytesIO(content)) as source:
+        source = ImageOps.exif_transpose(source)
+        if source.mode not in ('RGB', 'RGBA'):
+            source = source.convert('RGBA' if 'transparency' in source.info else 'RGB')
+
+        thumbnails = {}
+        for width in sorted(set(min(w, source.width) for w in widths)):
+            height = max(round(source.height * width / source.width), 1)
+            resized = source if width == source.width else source.resize((width, height), Image.LANCZOS)
+            urls = {}
+            for fmt in formats:
+                relative_path = f'{relative_dir}/{width}.{fmt}'
+                _save_atomic(resized, os.path.join(settings.MEDIA_ROOT, relative_path), FORMAT_OPTIONS[fmt])
+                urls[fmt] = f'{settings.MEDIA_URL}{relative_path}'
+            thumbnails[str(width)] = urls
+    return thumbnails
+
+
+def thumbnails_exist(thumbnails):
+    """記録されているサムネイルのファイルが全て存在するか"""
+    prefix = settings.MEDIA_URL
+    return bool(thumbnails) and all(
+        os.path.exists(os.path.join(settings.MEDIA_ROOT, url[len(prefix):]))
+        for urls in thumbnails.values() for url in urls.values()
+    )
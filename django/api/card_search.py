@@ -0,0 +1,86 @@
+"""
+カード一覧用リードモデル（ToppsCardSearch）の構築
+"""
+import hashlib
+import unicodedata
+
+from django.db import transaction
+from django.utils import timezone
+
+from .fast_serializers import render_json
+from .models import ToppsCard, ToppsCardSearch
+from .serializers import ToppsCardSerializer
+
+BATCH_SIZE = 500
+
+
+def normalize_search_key(text):
+    """検索キー用に正規化（小文字化・アクセント除去・空白の統一）"""
+    if not text:
+        return ''
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return ' '.join(text.lower().split())
+
+
+def build_search_entry(card):
+    """カード1件分のリードモデルを作る（player / team / topps_set は取得済みであること）"""
+    document = render_json(ToppsCardSerializer(card).data).decode('utf-8')
+    return ToppsCardSearch(
+        card_id=card.pk,
+        card_number=card.card_number,
+        player_name_key=normalize_search_key(card.player.full_name),
+        year=card.topps_set.year,
+        card_created_at=card.created_at,
+        document=document,
+        document_hash=hashlib.sha1(document.encode('utf-8')).hexdigest(),
+    )
+
+
+def refresh_card_search(cards=None, full=False):
+    """
+    リードモデルを差分更新する
+    cards: 対象カードのクエリセット（None は全件、削除されたカードのエントリも掃除する）
+    full: 内容が変わっていなくても全て書き直す
+    戻り値: (作成数, 更新数, 削除数)
+    """
+    if cards is None:
+        cards = ToppsCard.objects.all()
+        cleanup = True
+    else:
+        cleanup = False
+    cards = cards.select_related('player', 'team', 'topps_set').order_by('pk')
+
+    existing = dict(
+        ToppsCardSearch.objects.filter(card__in=cards.values('pk'))
+        .values_list('card_id', 'document_hash')
+    )
+
+    now = timezone.now()
+    to_create = []
+    to_update = []
+    for card in cards.iterator(chunk_size=BATCH_SIZE):
+        entry = build_search_entry(card)
+        if card.pk not in existing:
+            to_create.append(entry)
+        elif full or existing[card.pk] != entry.document_hash:
+            entry.updated_at = now
+            to_update.append(entry)
+
+    with transaction.atomic():
+        ToppsCardSearch.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+        ToppsCardSearch.objects.bulk_update(
+            to_update,
+            [
+                'card_number', 'player_name_key', 'year', 'card_created_at',
+                'document', 'document_hash', 'updated_at',
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        deleted = 0
+        if cleanup:
+            deleted, _ = ToppsCardSearch.objects.exclude(
+                card_id__in=ToppsCard.objects.values('pk')
+            ).delete()
+
+    return len(to_create), len(to_update), deleted
@@ -0,0 +1,229 @@
+"""
+分析用の列指向ファイルの書き出しと読み込み
+export_analytics コマンドで書き出したデータを、本番DBに接続せずにノートブックから読むためのもの
+（このモジュールは Django に依存しないので、ノートブックからそのまま import できる）
+
+形式:
+  - parquet: Parquet（pyarrow が必要。チャンクごとに row group として書き出す）
+  - arrow:   Arrow IPC ファイル（pyarrow が必要。圧縮なしで書き出すと読み込み時にコピーなしでメモリマップできる）
+  - npz:     NumPy（pyarrow がない場合。チャンクごとに part-NNNNN.npz として圧縮保存）
+
+列の種類: int（null可）/ float（null は NaN）/ str（null は空文字）/ date（null は NaT）/ bool
+
+使い方（ノートブック）:
+    from api.columnar import load_export
+    data = load_export('/path/to/exports/current')
+    stats = data['player_stats']   # parquet/arrow: pyarrow.Table, npz: {列名: numpy配列}
+"""
+import json
+import os
+from decimal import Decimal
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pa = None
+
+MANIFEST_NAME = 'manifest.json'
+
+FORMATS = ('parquet', 'arrow', 'npz')
+
+EXTENSIONS = {'parquet': '.parquet', 'arrow': '.arrow', 'npz': ''}
+
+
+def available_formats():
+    """インストールされているライブラリで書き出せる形式"""
+    formats = []
+    if pa is not None:
+        formats += ['parquet', 'arrow']
+    if np is not None:
+        formats.append('npz')
+    return formats
+
+
+def dataset_path(root, name, fmt):
+    return os.path.join(root, name + EXTENSIONS[fmt])
+
+
+# =========================
+# 書き出し
+# =========================
+
+def _arrow_type(kind):
+    return {
+        'int': pa.int64(), 'float': pa.float64(), 'str': pa.string(),
+        'date': pa.date32(), 'bool': pa.bool_(),
+    }[kind]
+
+
+def _to_float(value):
+    if value is None:
+        return None
+    return float(value) if isinstance(value, Decimal) else value
+
+
+class ArrowWriter:
+    """Parquet / Arrow IPC にチャンクごとに追記する"""
+
+    def __init__(self, path, schema, fmt, compression):
+        self.schema = schema
+        self.arrow_schema = pa.schema([(name, _arrow_type(kind)) for name, kind in schema])
+        if fmt == 'parquet':
+            self.writer = pa.parquet.ParquetWriter(
+                path, self.arrow_schema, compression=compression or 'none'
+            )
+        else:
+            options = pa.ipc.IpcWriteOptions(compression=compression)
+            self.writer = pa.ipc.new_file(path, self.arrow_schema, options=options)
+
+    def write(self, columns):
+        arrays = [
+            pa.array([_to_float(v) for v in columns[name]] if kind == 'float' else columns[name],
+                     type=_arrow_type(kind))
+            for name, kind in self.schema
+        ]
+        self.writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=self.arrow_schema))
+
+    def close(self):
+        self.writer.close()
+
+
+class NpzWriter:
+    """チャンクごとに part-NNNNN.npz を書き出す（int列の null はマスク配列 <列名>.mask で表す）"""
+
+    def __init__(self, path, schema, compression):
+        self.path = path
+        self.schema = schema
+        self.compress = compression != 'none'
+        self.parts = 0
+        os.makedirs(path, exist_ok=True)
+
+    def write(self, columns):
+        arrays = {}
+        for name, kind in self.schema:
+            values = columns[name]
+            if kind == 'int':
+                mask = np.array([v is None for v in values], dtype=bool)
+                arrays[name] = np.array([0 if v is None else v for v in values], dtype=np.int64)
+                arrays[f'{name}.mask'] = mask
+            elif kind == 'float':
+                arrays[name] = np.array(
+                    [np.nan if v is None else float(v) for v in values], dtype=np.float64
+                )
+            elif kind == 'str':
+                arrays[name] = np.array([v or '' for v in values], dtype=str)
+            elif kind == 'date':
+                arrays[name] = np.array(
+                    [np.datetime64('NaT') if v is None else np.datetime64(v, 'D') for v in values],
+                    dtype='datetime64[D]',
+                )
+            else:
+                arrays[name] = np.array(values, dtype=bool)
+        save = np.savez_compressed if self.compress else np.savez
+        save(os.path.join(self.path, f'part-{self.parts:05d}.npz'), **arrays)
+        self.parts += 1
+
+    def close(self):
+        pass
+
+
+def open_writer(path, schema, fmt, compression='zstd'):
+    """
+    データセットの書き出しを始める
+    schema: [(列名, 種類), ...]。write({列名: 値のリスト}) をチャンクごとに呼び、最後に close()
+    """
+    if fmt in ('parquet', 'arrow'):
+        if pa is None:
+            raise ImportError('pyarrow is required for parquet/arrow export')
+        return ArrowWriter(path, schema, fmt, None if compression == 'none' else compression)
+    if np is None:
+        raise ImportError('numpy is required for npz export')
+    return NpzWriter(path, schema, compression)
+
+
+def write_manifest(root, manifest):
+    with open(os.path.join(root, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+
+# =========================
+# 読み込み
+# =========================
+
+def read_manifest(root):
+    with open(os.path.join(root, MANIFEST_NAME), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _npz_mmap_dir(path):
+    # 展開した .npy の置き場所（npz は圧縮されているのでそのままではメモリマップできない）
+    return path + '.mmap'
+
+
+def _load_npz(path, schema, mmap):
+    parts = sorted(name for name in os.listdir(path) if name.endswith('.npz'))
+    names = [name for column, kind in schema for name in ([column, f'{column}.mask'] if kind == 'int' else [column])]
+
+    if mmap:
+        cache_dir = _npz_mmap_dir(path)
+        stamp = os.path.join(cache_dir, '.parts')
+        # 初回（または書き出し直した後）だけ展開し、以降は .npy をメモリマップで開く
+        if not os.path.exists(stamp) or open(stamp).read() != '\n'.join(parts):
+            os.makedirs(cache_dir, exist_ok=True)
+            arrays = _concat_npz(path, parts, names)
+            for name, array in arrays.items():
+                np.save(os.path.join(cache_dir, f'{name}.npy'), array)
+            with open(stamp, 'w') as f:
+                f.write('\n'.join(parts))
+        arrays = {name: np.load(os.path.join(cache_dir, f'{name}.npy'), mmap_mode='r') for name in names}
+    else:
+        arrays = _concat_npz(path, parts, names)
+
+    data = {}
+    for column, kind in schema:
+        if kind == 'int':
+            data[column] = np.ma.masked_array(arrays[column], mask=arrays[f'{column}.mask'])
+        else:
+            data[column] = arrays[column]
+    return data
+
+
+def _concat_npz(path, parts, names):
+    chunks = {name: [] for name in names}
+    for part in parts:
+        with np.load(os.path.join(path, part)) as npz:
+            for name in names:
+                chunks[name].append(npz[name])
+    return {name: np.concatenate(arrays) for name, arrays in chunks.items()}
+
+
+def load_dataset(root, name, mmap=True):
+    """
+    書き出したデータセットを1つ読む
+    parquet / arrow は pyarrow.Table、npz は {列名: numpy配列}（int列は masked_array）を返す
+    mmap=True の場合はメモリマップで開き、必要な部分だけを読み込む
+    """
+    manifest = read_manifest(root)
+    fmt = manifest['format']
+    schema = manifest['datasets'][name]['columns']
+    path = dataset_path(root, name, fmt)
+
+    if fmt == 'parquet':
+        return pa.parquet.read_table(path, memory_map=mmap)
+    if fmt == 'arrow':
+        source = pa.memory_map(path) if mmap else pa.OSFile(path)
+        return pa.ipc.open_file(source).read_all()
+    return _load_npz(path, schema, mmap)
+
+
+def load_export(root, mmap=True):
+    """書き出した全データセットを {データセット名: データ} で返す"""
+    manifest = read_manifest(root)
+    return {name: load_dataset(root, name, mmap=mmap) for name in manifest['datasets']}
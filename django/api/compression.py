@@ -0,0 +1,103 @@
+"""
+APIレスポンスの圧縮・条件付きGET
+データのバージョン（最終更新日時・件数）ごとにレンダリング・圧縮結果をキャッシュし、
+If-None-Match / If-Modified-Since には 304 を返す
+"""
+import gzip
+import hashlib
+import re
+import threading
+
+from django.db.models import Count, Max
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# これより小さいレスポンスは圧縮しない
+MIN_COMPRESS_SIZE = 1024
+
+# キーにデータのバージョンを含むため、古い内容が返ることはない
+CACHE_TIMEOUT = 60 * 60 * 24
+
+_accepts_gzip = re.compile(r'\bgzip\b')
+_accepts_brotli = re.compile(r'\bbr\b')
+
+
+def data_version(sources):
+    """
+    (クエリセット, 日時フィールド) のリストから (最終更新のUNIX時刻, バージョン文字列) を返す
+    件数も含めるため、削除でもバージョンが変わる
+    """
+    last_modified = None
+    parts = []
+    for queryset, field in sources:
+        result = queryset.aggregate(last=Max(field), count=Count('pk'))
+        last = result['last']
+        parts.append(f"{queryset.model._meta.label}:{result['count']}:{last.timestamp() if last else 0}")
+        if last is not None and (last_modified is None or last > last_modified):
+            last_modified = last
+    version = hashlib.md5('|'.join(parts).encode('utf-8')).hexdigest()
+    return (int(last_modified.timestamp()) if last_modified else None), version
+
+
+def choose_encoding(request):
+    """Accept-Encoding から使用する圧縮方式を選ぶ（None は非圧縮）"""
+    accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    if brotli is not None and _accepts_brotli.search(accept_encoding):
+        return 'br'
+    if _accepts_gzip.search(accept_encoding):
+        return 'gzip'
+    return None
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content)
+    return gzip.compress(content, compresslevel=6, mtime=0)
+
+
+class CompressionStats:
+    """プロセス内の圧縮・キャッシュの集計"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.responses = 0
+        self.not_modified = 0
+        self.cache_hits = 0
+        self.compressed = 0
+        self.bytes_uncompressed = 0
+        self.bytes_sent = 0
+
+    def record(self, raw_size, sent_size, cache_hit, compressed):
+        with self._lock:
+            self.responses += 1
+            self.cache_hits += int(cache_hit)
+            self.compressed += int(compressed)
+            self.bytes_uncompressed += raw_size
+            self.bytes_sent += sent_size
+
+    def record_not_modified(self):
+        with self._lock:
+            self.not_modified += 1
+
+    def as_dict(self):
+        return {
+            'responses': self.responses,
+            'not_modified': self.not_modified,
+            'cache_hits': self.cache_hits,
+            'compressed': self.compressed,
+            'bytes_uncompressed': self.bytes_uncompressed,
+            'bytes_sent': self.bytes_sent,
+            'compression_ratio': (
+                round(self.bytes_sent / self.bytes_uncompressed, 4) if self.bytes_uncompressed else None
+            ),
+        }
+
+
+stats = CompressionStats()
+
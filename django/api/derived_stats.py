@@ -0,0 +1,254 @@
+"""
+成績の派生指標の計算
+シーズンごとに全選手の成績を NumPy の配列にまとめて読み込み、1回の計算で求めてから bulk_update で保存する
+（リクエストごとに Python で計算しない）
+
+  - PlayerStats: ISO, BABIP（打撃）/ K/9, BB/9, K/BB（投球）
+  - ToppsCard:   発行日時点の直近 ROLLING_DAYS 日間の打率・OPS・本塁打・防御率・K/9（PlayerGameLog から）
+
+分母が0・元の値が欠けている場合は None
+"""
+import math
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from .card_search import refresh_card_search
+from .models import PlayerGameLog, PlayerStats, StatType, ToppsCard
+
+# カード発行日の前日（試合日）から遡る日数
+ROLLING_DAYS = 15
+
+# 日付をソート用の整数キーにする（選手ID * DATE_KEY_BASE + 日付の序数）
+DATE_KEY_BASE = 1_000_000
+
+# PlayerStats の派生指標: {フィールド: (小数点以下の桁数, 最大値)}
+SEASON_METRICS = {
+    'iso': (3, Decimal('9.999')),
+    'babip': (3, Decimal('9.999')),
+    'k_per_9': (2, Decimal('999.99')),
+    'bb_per_9': (2, Decimal('999.99')),
+    'k_bb': (2, Decimal('999.99')),
+}
+
+# ToppsCard の直近成績: {フィールド: (小数点以下の桁数, 最大値)}（桁数0は整数）
+ROLLING_METRICS = {
+    'rolling_avg': (3, Decimal('9.999')),
+    'rolling_ops': (3, Decimal('9.999')),
+    'rolling_home_runs': (0, None),
+    'rolling_era': (2, Decimal('999.99')),
+    'rolling_k_per_9': (2, Decimal('999.99')),
+}
+
+
+def _column(rows, index):
+    """values_list の行から1列を float の配列にする（None は NaN）"""
+    return np.array(
+        [np.nan if row[index] is None else float(row[index]) for row in rows], dtype=np.float64
+    )
+
+
+def _divide(numerator, denominator):
+    """0除算は NaN"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator > 0, numerator / denominator, np.nan)
+
+
+def innings_to_outs(innings):
+    """投球回（123.1 = 123と1/3回）をアウト数にする"""
+    whole = np.floor(innings)
+    return whole * 3 + np.round((innings - whole) * 10)
+
+
+def _to_python(values, decimals, max_value):
+    """配列を保存用の値（Decimal / int / None）のリストにする"""
+    result = []
+    for value in values.tolist():
+        if not math.isfinite(value):
+            result.append(None)
+        elif decimals == 0:
+            result.append(int(value))
+        else:
+            result.append(min(Decimal(f'{value:.{decimals}f}'), max_value))
+    return result
+
+
+def season_metrics(rows):
+    """
+    PlayerStats の行から派生指標を計算する
+    rows: (stat_type, 打数, 安打, 二塁打, 三塁打, 本塁打, 三振, 犠飛, 投球回, 奪三振, 与四球) のリスト
+    戻り値: {フィールド: 配列}
+    """
+    is_hitting = np.array([row[0] == StatType.HITTING for row in rows], dtype=bool)
+    at_bats, hits, doubles, triples, home_runs, batter_strikeouts, sac_flies = (
+        _column(rows, i) for i in range(1, 8)
+    )
+    innings = innings_to_outs(_column(rows, 8)) / 3
+    strikeouts = _column(rows, 9)
+    walks = _column(rows, 10)
+
+    nan = np.full(len(rows), np.nan)
+    return {
+        # ISO = (塁打 - 安打) / 打数（丸めた長打率・打率の差ではなく打数から計算する）
+        'iso': np.where(is_hitting, _divide(doubles + 2 * triples + 3 * home_runs, at_bats), nan),
+        'babip': np.where(
+            is_hitting,
+            _divide(hits - home_runs, at_bats - batter_strikeouts - home_runs + sac_flies),
+            nan,
+        ),
+        'k_per_9': np.where(is_hitting, nan, _divide(9 * strikeouts, innings)),
+        'bb_per_9': np.where(is_hitting, nan, _divide(9 * walks, innings)),
+        'k_bb': np.where(is_hitting, nan, _divide(strikeouts, walks)),
+    }
+
+
+def refresh_season_metrics(season):
+    """シーズンの全 PlayerStats の派生指標を計算して保存し、更新した件数を返す"""
+    fields = [
+        'stat_type', 'at_bats', 'hits', 'doubles', 'triples', 'home_runs', 'batter_strikeouts',
+        'sac_flies', 'innings_pitched', 'strikeouts', 'walks_allowed',
+    ]
+    rows = list(
+        PlayerStats.objects.filter(season=season).values_list('pk', *SEASON_METRICS, *fields)
+    )
+    if not rows:
+        return 0
+
+    offset = 1 + len(SEASON_METRICS)
+    metrics = season_metrics([row[offset:] for row in rows])
+    values = {
+        field: _to_python(metrics[field], *SEASON_METRICS[field]) for field in SEASON_METRICS
+    }
+
+    now = timezone.now()
+    changed = []
+    for i, row in enumerate(rows):
+        new = [values[field][i] for field in SEASON_METRICS]
+        # 値が変わった行だけ保存する（updated_at は一覧APIのキャッシュのバージョンに使われる）
+        if list(row[1:offset]) != new:
+            changed.append(PlayerStats(pk=row[0], updated_at=now, **dict(zip(SEASON_METRICS, new))))
+    PlayerStats.objects.bulk_update(changed, [*SEASON_METRICS, 'updated_at'], batch_size=500)
+    return len(changed)
+
+
+def _date_keys(player_ids, ordinals):
+    return player_ids.astype(np.int64) * DATE_KEY_BASE + ordinals
+
+
+def _window_totals(logs, card_player_ids, card_ordinals, columns):
+    """
+    カードごとに、同じ選手の [発行日 - ROLLING_DAYS, 発行日 - 1] の試合の合計を求める
+    logs: (選手ID, 試合日, 列...) のリスト
+    戻り値: (試合数の配列, {列: 合計の配列})
+    """
+    if not logs:
+        zeros = np.zeros(len(card_ordinals))
+        return zeros, {column: zeros for column in columns}
+
+    keys = _date_keys(
+        np.array([row[0] for row in logs], dtype=np.int64),
+        np.array([row[1].toordinal() for row in logs], dtype=np.int64),
+    )
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+
+    # 累積和の差で区間の合計を求める（先頭に0を置く）
+    totals = {}
+    start = np.searchsorted(keys, _date_keys(card_player_ids, card_ordinals - ROLLING_DAYS), side='left')
+    end = np.searchsorted(keys, _date_keys(card_player_ids, card_ordinals - 1), side='right')
+    for i, column in enumerate(columns, 2):
+        cumulative = np.concatenate(([0.0], np.cumsum(_column(logs, i)[order])))
+        totals[column] = cumulative[end] - cumulative[start]
+    return end - start, totals
+
+
+def rolling_metrics(hitting_logs, pitching_logs, card_player_ids, card_ordinals):
+    """
+    カードごとの直近成績を計算する
+    hitting_logs:  (選手ID, 試合日, 打数, 安打, 二塁打, 三塁打, 本塁打, 四球, 死球, 犠飛) のリスト
+    pitching_logs: (選手ID, 試合日, アウト数, 自責点, 奪三振) のリスト
+    戻り値: {フィールド: 配列}
+    """
+    games, h = _window_totals(
+        hitting_logs, card_player_ids, card_ordinals,
+        ['at_bats', 'hits', 'doubles', 'triples', 'home_runs', 'walks', 'hit_by_pitch', 'sac_flies'],
+    )
+    on_base = _divide(
+        h['hits'] + h['walks'] + h['hit_by_pitch'],
+        h['at_bats'] + h['walks'] + h['hit_by_pitch'] + h['sac_flies'],
+    )
+    slugging = _divide(h['hits'] + h['doubles'] + 2 * h['triples'] + 3 * h['home_runs'], h['at_bats'])
+
+    _, p = _window_totals(
+        pitching_logs, card_player_ids, card_ordinals, ['outs', 'earned_runs', 'strikeouts'],
+    )
+    return {
+        'rolling_avg': _divide(h['hits'], h['at_bats']),
+        'rolling_ops': on_base + slugging,
+        'rolling_home_runs': np.where(games > 0, h['home_runs'], np.nan),
+        'rolling_era': _divide(27 * p['earned_runs'], p['outs']),
+        'rolling_k_per_9': _divide(27 * p['strikeouts'], p['outs']),
+    }
+
+
+def refresh_rolling_metrics(season):
+    """シーズン中に発行されたカードの直近成績を計算して保存し、更新した件数を返す"""
+    # 発行日は試合日の翌日なので、シーズンの試合のカードは 1/2 〜 翌年 1/1 に発行される
+    cards = list(
+        ToppsCard.objects.filter(
+            release_date__gte=date(season, 1, 2),
+            release_date__lte=date(season + 1, 1, 1),
+        ).values_list('pk', 'player_id', 'release_date', *ROLLING_METRICS)
+    )
+    if not cards:
+        return 0
+
+    logs = PlayerGameLog.objects.filter(season=season)
+    hitting_logs = list(logs.filter(stat_type=StatType.HITTING).values_list(
+        'player_id', 'game_date', 'at_bats', 'hits', 'doubles', 'triples', 'home_runs',
+        'walks', 'hit_by_pitch', 'sac_flies',
+    ))
+    pitching_logs = list(logs.filter(stat_type=StatType.PITCHING).values_list(
+        'player_id', 'game_date', 'outs', 'earned_runs', 'strikeouts',
+    ))
+
+    metrics = rolling_metrics(
+        hitting_logs,
+        pitching_logs,
+        np.array([card[1] for card in cards], dtype=np.int64),
+        np.array([card[2].toordinal() for card in cards], dtype=np.int64),
+    )
+    values = {
+        field: _to_python(metrics[field], *ROLLING_METRICS[field]) for field in ROLLING_METRICS
+    }
+
+    now = timezone.now()
+    changed = []
+    for i, card in enumerate(cards):
+        new = [values[field][i] for field in ROLLING_METRICS]
+        if list(card[3:]) != new:
+            changed.append(ToppsCard(pk=card[0], updated_at=now, **dict(zip(ROLLING_METRICS, new))))
+    ToppsCard.objects.bulk_update(changed, [*ROLLING_METRICS, 'updated_at'], batch_size=500)
+    # カード一覧のリードモデルにも反映（内容が変わらないエントリは書き換えない）
+    if changed:
+        refresh_card_search(ToppsCard.objects.filter(pk__in=[card.pk for card in changed]))
+    return len(changed)
+
+
+def refresh_derived_stats(seasons=None):
+    """
+    派生指標を計算し直す
+    seasons: 対象シーズンのリスト（None は成績のある全シーズン）
+    戻り値: {シーズン: (更新した成績の件数, 更新したカードの件数)}
+    """
+    if seasons is None:
+        seasons = sorted(set(PlayerStats.objects.values_list('season', flat=True)))
+
+    updated = {}
+    for season in seasons:
+        with transaction.atomic():
+            updated[season] = (refresh_season_metrics(season), refresh_rolling_metrics(season))
+    return updated
@@ -0,0 +1,133 @@
+"""
+読み取り専用一覧APIの高速シリアライズ
+ModelSerializer を1行ずつインスタンス化する代わりに、values_list() のタプルから
+同じ形のdictを直接組み立て、高速なJSONエンコーダー（orjson）でエンコードする
+
+出力はDRFのJSONRendererと同一バイト列になる（test_fast_serializers で検証）
+"""
+import json
+
+from rest_framework import serializers
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# to_representation が実質的に恒等変換となるフィールド（DBの値をそのまま出力）
+PASSTHROUGH_FIELDS = (
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.BooleanField,
+    serializers.ChoiceField,
+)
+
+_VALUE = 0
+_NESTED = 1
+_MANY = 2
+
+
+class ValuesSerializer:
+    """
+    DRFシリアライザーのフィールド定義から values_list() 用の取得計画を作り、
+    行タプルから同じ形のdictを組み立てる
+
+    対応フィールド: モデルの実カラム、PrimaryKeyRelatedField、
+    ネストしたModelSerializer（FK）、トップレベルの逆参照（many=True）
+    """
+
+    def __init__(self, serializer, many_querysets=None):
+        self.model = serializer.Meta.model
+        self.pk_name = self.model._meta.pk.name
+        self.columns = [self.pk_name]
+        self.many = []
+        self.many_querysets = many_querysets or {}
+        self.plan = self._build_plan(serializer, self.model, prefix='', top_level=True)
+
+    def _column_index(self, column):
+        if column not in self.columns:
+            self.columns.append(column)
+        return self.columns.index(column)
+
+    def _build_plan(self, serializer, model, prefix, top_level=False):
+        plan = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            source = field.source
+            if source == '*' or '.' in source:
+                raise ValueError(f"{serializer.__class__.__name__}.{name}: unsupported source '{source}'")
+
+            if isinstance(field, serializers.ListSerializer):
+                if not top_level:
+                    raise ValueError(f"{serializer.__class__.__name__}.{name}: nested many relation")
+                relation = model._meta.get_field(source)
+                self.many.append((source, relation.field.name, ValuesSerializer(field.child)))
+                plan.append((name, _MANY, source, None, None))
+            elif isinstance(field, serializers.ModelSerializer):
+                # FKがNULLなら None を出力（DRFと同じ）
+                index = self._column_index(prefix + source)
+                subplan = self._build_plan(field, field.Meta.model, f'{prefix}{source}__')
+                plan.append((name, _NESTED, index, None, subplan))
+            elif isinstance(field, serializers.PrimaryKeyRelatedField):
+                plan.append((name, _VALUE, self._column_index(prefix + source), None, None))
+            elif isinstance(field, serializers.SerializerMethodField):
+                raise ValueError(f"{serializer.__class__.__name__}.{name}: SerializerMethodField")
+            else:
+                model._meta.get_field(source)
+                convert = None if isinstance(field, PASSTHROUGH_FIELDS) else field.to_representation
+                plan.append((name, _VALUE, self._column_index(prefix + source), convert, None))
+        return plan
+
+    def values_queryset(self, queryset):
+        """取得計画に必要な列だけの values_list クエリセット"""
+        return queryset.values_list(*self.columns)
+
+    def _build_row(self, row, plan, many_data):
+        data = {}
+        for name, kind, column, convert, subplan in plan:
+            if kind == _VALUE:
+                value = row[column]
+                data[name] = value if convert is None or value is None else convert(value)
+            elif kind == _NESTED:
+                data[name] = None if row[column] is None else self._build_row(row, subplan, many_data)
+            else:
+                data[name] = many_data[column].get(row[0], [])
+        return data
+
+    def _fetch_many(self, pks):
+        """逆参照（many=True）を関連ごとに1クエリで取得し、親のpkごとにまとめる"""
+        many_data = {}
+        for source, fk_name, child in self.many:
+            queryset = self.many_querysets.get(source)
+            if queryset is None:
+                queryset = child.model._default_manager.all()
+            grouped = {}
+            rows = queryset.filter(**{f'{fk_name}__in': pks}).values_list(fk_name, *child.columns)
+            for row in rows:
+                grouped.setdefault(row[0], []).append(child._build_row(row[1:], child.plan, {}))
+            many_data[source] = grouped
+        return many_data
+
+    def serialize(self, rows):
+        """values_queryset() の行（タプル）のリストからdictのリストを作る"""
+        rows = list(rows)
+        many_data = self._fetch_many([row[0] for row in rows]) if self.many else {}
+        return [self._build_row(row, self.plan, many_data) for row in rows]
+
+
+def render_json(data):
+    """
+    DRFのJSONRenderer（UNICODE_JSON / COMPACT_JSON / STRICT_JSON のデフォルト設定）と
+    同一のバイト列を返す
+    """
+    if orjson is not None:
+        content = orjson.dumps(data)
+    else:
+        content = json.dumps(
+            data, ensure_ascii=False, allow_nan=False, separators=(',', ':')
+        ).encode('utf-8')
+    # JavaScriptで改行として扱われる文字はJSONRendererと同様にエスケープ
+    if b'\xe2\x80\xa8' in content or b'\xe2\x80\xa9' in content:
+        content = content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return content
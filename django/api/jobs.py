@@ -0,0 +1,218 @@
+"""
+DBを使ったバックグラウンドジョブキュー
+APIのリクエスト内で外部APIの取得やスクレイピングを行わず、BackgroundJob として登録して
+すぐにジョブIDを返す。実行は run_jobs ワーカー（別プロセス）が行う
+
+タスクの追加:
+    @task('task_name')
+    def task_name(**payload):
+        ...
+        return result  # JSONにできる値（BackgroundJob.result に保存）
+"""
+import io
+import logging
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import blog_images
+from .mlb_games import get_game
+from .models import BackgroundJob, JobStatus
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+# リトライまでの待機時間（失敗するたびに倍にする）
+RETRY_DELAY = timedelta(seconds=30)
+
+# 実行中のまま応答がないとみなすまでの時間（タスクで指定がない場合）
+STALE_TIMEOUT = timedelta(hours=1)
+
+# APIから実行できる管理コマンド
+JOB_COMMANDS = {
+    'toppsNow_archive',
+    'scrape_release_dates',
+    'scrape_card_images',
+    'fetch_game_ids',
+    'sync_mlb_players',
+    'fetch_player_stats',
+    'fetch_player_nationality',
+    'update_card_teams',
+    'generate_card_thumbnails',
+    'refresh_card_search',
+    'export_static_snapshots',
+}
+
+# 結果に保存するコマンド出力の最大文字数（末尾を残す）
+COMMAND_OUTPUT_LIMIT = 10000
+
+# 実行後に静的スナップショットを出力し直すコマンド: {コマンド: スナップショットのリソース}
+SNAPSHOT_COMMANDS = {
+    'sync_mlb_players': ['players'],
+    'fetch_player_stats': ['players'],
+}
+
+SNAPSHOT_EXPORT_KEY = 'export_static_snapshots'
+
+
+def task(name, max_attempts=3, stale_timeout=None):
+    """
+    関数をジョブのタスクとして登録する
+    stale_timeout: 実行中のまま応答がないとみなすまでの時間（timedelta、None は requeue_stale の既定値）
+    """
+    def decorator(func):
+        func.max_attempts = max_attempts
+        func.stale_timeout = stale_timeout
+        TASKS[name] = func
+        return func
+    return decorator
+
+
+def enqueue(task_name, payload=None, dedupe_key='', requested_by=None):
+    """
+    ジョブを登録する
+    dedupe_key を指定すると、同じキーの未完了ジョブがある場合はそれを返す
+    """
+    if task_name not in TASKS:
+        raise ValueError(f'Unknown task: {task_name}')
+    if dedupe_key:
+        existing = BackgroundJob.objects.filter(
+            dedupe_key=dedupe_key, status__in=[JobStatus.PENDING, JobStatus.RUNNING]
+        ).first()
+        if existing is not None:
+            return existing
+    return BackgroundJob.objects.create(
+        task=task_name,
+        payload=payload or {},
+        dedupe_key=dedupe_key,
+        max_attempts=TASKS[task_name].max_attempts,
+        requested_by=requested_by,
+    )
+
+
+def enqueue_snapshot_export(resources):
+    """
+    公開APIのデータを変更した後、該当するリソースの静的スナップショットを出力し直すジョブを登録する
+    未実行のジョブがあればリソースをまとめる（実行中のジョブは変更前のデータを読んでいる可能性があるので別に登録）
+    """
+    pending = BackgroundJob.objects.filter(
+        dedupe_key=SNAPSHOT_EXPORT_KEY, status=JobStatus.PENDING
+    ).first()
+    if pending is not None:
+        merged = sorted({*pending.payload['options']['resource'], *resources})
+        payload = {'command': 'export_static_snapshots', 'options': {'resource': merged}}
+        # ワーカーに取得された後は書き換えない
+        if BackgroundJob.objects.filter(pk=pending.pk, status=JobStatus.PENDING).update(payload=payload):
+            return pending
+    return BackgroundJob.objects.create(
+        task='management_command',
+        payload={'command': 'export_static_snapshots', 'options': {'resource': sorted(set(resources))}},
+        dedupe_key=SNAPSHOT_EXPORT_KEY,
+        max_attempts=TASKS['management_command'].max_attempts,
+    )
+
+
+def claim_next(worker):
+    """
+    実行可能なジョブを1件取得して RUNNING にする
+    条件付きUPDATEで取得するため、複数のワーカーが同じジョブを実行することはない
+    """
+    now = timezone.now()
+    candidates = BackgroundJob.objects.filter(
+        status=JobStatus.PENDING, run_after__lte=now
+    ).order_by('run_after', 'created_at').values_list('pk', flat=True)[:10]
+    for pk in candidates:
+        claimed = BackgroundJob.objects.filter(pk=pk, status=JobStatus.PENDING).update(
+            status=JobStatus.RUNNING, worker=worker, started_at=now, attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return BackgroundJob.objects.get(pk=pk)
+    return None
+
+
+def run_job(job):
+    """ジョブを実行して結果を保存する（失敗した場合は回数が残っていれば再登録する）"""
+    func = TASKS.get(job.task)
+    try:
+        if func is None:
+            raise LookupError(f'Unknown task: {job.task}')
+        result = func(**job.payload)
+    except Exception as e:
+        logger.exception(f"Job failed: {job.task} ({job.pk})")
+        job.error = f'{type(e).__name__}: {e}'
+        if func is not None and job.attempts < job.max_attempts:
+            job.status = JobStatus.PENDING
+            job.run_after = timezone.now() + RETRY_DELAY * 2 ** (job.attempts - 1)
+            job.worker = ''
+        else:
+            job.status = JobStatus.FAILED
+            job.finished_at = timezone.now()
+    else:
+        job.status = JobStatus.SUCCEEDED
+        job.result = result
+        job.error = ''
+        job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'result', 'error', 'run_after', 'worker', 'finished_at'])
+    return job
+
+
+def requeue_stale(timeout=STALE_TIMEOUT):
+    """
+    ワーカーが落ちて RUNNING のまま残ったジョブを戻す
+    timeout: タスクで stale_timeout を指定していない場合の時間
+    戻り値: 再登録した件数, 失敗にした件数
+    """
+    now = timezone.now()
+    overrides = {name: func.stale_timeout for name, func in TASKS.items() if func.stale_timeout}
+    expired = Q(started_at__lt=now - timeout) & ~Q(task__in=overrides)
+    for name, stale_timeout in overrides.items():
+        expired |= Q(task=name, started_at__lt=now - stale_timeout)
+    stale = BackgroundJob.objects.filter(expired, status=JobStatus.RUNNING)
+    requeued = stale.filter(attempts__lt=F('max_attempts')).update(
+        status=JobStatus.PENDING, worker='', run_after=timezone.now()
+    )
+    failed = stale.update(
+        status=JobStatus.FAILED, error='ワーカーが応答しませんでした', finished_at=timezone.now()
+    )
+    return requeued, failed
+
+
+def purge_finished(max_age=timedelta(days=7)):
+    """完了・失敗したジョブを削除する"""
+    deleted, _ = BackgroundJob.objects.filter(
+        status__in=[JobStatus.SUCCEEDED, JobStatus.FAILED],
+        finished_at__lt=timezone.now() - max_age,
+    ).delete()
+    return deleted
+
+
+# =========================
+# タスク
+# =========================
+
+@task('mlb_game')
+def mlb_game(team_id, date):
+    """チームのその日の試合（/api/mlb/game/ の非同期版）"""
+    return get_game(team_id, date)
+
+
+@task('blog_image_variants')
+def blog_image_variants(staging_name, key, widths):
+    """ブログ画像の小さいサイズのWebPを生成する（最大サイズはアップロード時に生成済み）"""
+    return blog_images.process_variants(staging_name, key, widths)
+
+
+# スクレイピングや全選手の取得は数時間かかることがあるため、実行中のジョブを失敗にしないよう長めにする
+@task('management_command', max_attempts=1, stale_timeout=timedelta(hours=12))
+def management_command(command, options=None):
+    """管理コマンドを実行し、出力の末尾を返す"""
+    if command not in JOB_COMMANDS:
+        raise ValueError(f'Command not allowed: {command}')
+    output = io.StringIO()
+    call_command(command, stdout=output, stderr=output, **(options or {}))
+    if command in SNAPSHOT_COMMANDS:
+        enqueue_snapshot_export(SNAPSHOT_COMMANDS[command])
+    return {'output': output.getvalue()[-COMMAND_OUTPUT_LIMIT:]}
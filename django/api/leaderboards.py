@@ -0,0 +1,130 @@
+"""
+成績ランキング（LeaderboardEntry）の構築
+シーズン・指標ごとに PlayerStats から上位 TOP_N 人を計算して保存する
+率系の指標（打率・OPS・防御率・WHIP）は規定打数・規定投球回に達した選手のみ対象
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Max
+
+from .models import LeaderboardEntry, PlayerStats, StatType
+
+# 保存する人数
+TOP_N = 50
+
+# 規定打数・規定投球回（チーム試合数あたり）
+# 公式の規定打席（3.1 × 試合数）は打席数だが、保存しているのは打数なので打数で近似する
+AT_BATS_PER_GAME = Decimal('2.7')
+INNINGS_PER_GAME = Decimal('1.0')
+
+# 指標ごとの設定
+#   field: PlayerStats のフィールド / descending: 大きい方が上位 / qualifier: 規定の判定に使うフィールド
+#   decimals: APIで返す小数点以下の桁数
+LEADERBOARDS = {
+    'home_runs': {
+        'label': '本塁打', 'stat_type': StatType.HITTING, 'field': 'home_runs',
+        'descending': True, 'qualifier': None, 'decimals': 0,
+    },
+    'batting_avg': {
+        'label': '打率', 'stat_type': StatType.HITTING, 'field': 'batting_avg',
+        'descending': True, 'qualifier': 'at_bats', 'decimals': 3,
+    },
+    'ops': {
+        'label': 'OPS', 'stat_type': StatType.HITTING, 'field': 'ops',
+        'descending': True, 'qualifier': 'at_bats', 'decimals': 3,
+    },
+    'era': {
+        'label': '防御率', 'stat_type': StatType.PITCHING, 'field': 'era',
+        'descending': False, 'qualifier': 'innings_pitched', 'decimals': 2,
+    },
+    'whip': {
+        'label': 'WHIP', 'stat_type': StatType.PITCHING, 'field': 'whip',
+        'descending': False, 'qualifier': 'innings_pitched', 'decimals': 2,
+    },
+    'strikeouts': {
+        'label': '奪三振', 'stat_type': StatType.PITCHING, 'field': 'strikeouts',
+        'descending': True, 'qualifier': None, 'decimals': 0,
+    },
+}
+
+
+def qualification_thresholds(season):
+    """
+    シーズンの規定打数・規定投球回
+    チーム試合数は保存済みの打撃成績の最多出場試合数で近似する（シーズン途中でも使える）
+    """
+    team_games = PlayerStats.objects.filter(
+        season=season, stat_type=StatType.HITTING
+    ).aggregate(games=Max('games'))['games'] or 0
+    return {
+        'at_bats': (AT_BATS_PER_GAME * team_games).quantize(Decimal('1')),
+        'innings_pitched': (INNINGS_PER_GAME * team_games).quantize(Decimal('0.1')),
+    }
+
+
+def build_leaderboard(season, stat, thresholds):
+    """1つの指標の上位 TOP_N 人の LeaderboardEntry（未保存）を作る"""
+    config = LEADERBOARDS[stat]
+    field = config['field']
+    qualifier = config['qualifier']
+
+    stats = PlayerStats.objects.filter(
+        season=season, stat_type=config['stat_type'], **{f'{field}__isnull': False}
+    )
+    if qualifier:
+        stats = stats.filter(**{f'{qualifier}__gte': thresholds[qualifier]})
+    order = f'-{field}' if config['descending'] else field
+    stats = stats.select_related('player__team').order_by(order, 'player__full_name')[:TOP_N]
+
+    entries = []
+    previous_value = None
+    for position, stat_row in enumerate(stats, 1):
+        value = getattr(stat_row, field)
+        # 同率は同じ順位にする（1, 2, 2, 4）
+        rank = entries[-1].rank if value == previous_value else position
+        previous_value = value
+        player = stat_row.player
+        entries.append(LeaderboardEntry(
+            season=season,
+            stat=stat,
+            rank=rank,
+            player=player,
+            player_name=player.full_name,
+            team_abbreviation=player.team.abbreviation if player.team else '',
+            value=value,
+            qualifier_value=getattr(stat_row, qualifier) if qualifier else None,
+            qualifier_min=thresholds[qualifier] if qualifier else None,
+        ))
+    return entries
+
+
+def refresh_leaderboards(seasons=None):
+    """
+    ランキングを作り直す
+    seasons: 対象シーズンのリスト（None は成績のある全シーズン）
+    戻り値: {シーズン: 保存した件数}
+    """
+    if seasons is None:
+        seasons = sorted(set(PlayerStats.objects.values_list('season', flat=True)))
+
+    saved = {}
+    for season in seasons:
+        thresholds = qualification_thresholds(season)
+        entries = [
+            entry for stat in LEADERBOARDS
+            for entry in build_leaderboard(season, stat, thresholds)
+        ]
+        with transaction.atomic():
+            LeaderboardEntry.objects.filter(season=season).delete()
+            LeaderboardEntry.objects.bulk_create(entries)
+        saved[season] = len(entries)
+    return saved
+
+
+def format_value(stat, value):
+    """APIで返す形にする（回数は整数、率は小数）"""
+    if value is None:
+        return None
+    decimals = LEADERBOARDS[stat]['decimals']
+    return int(value) if decimals == 0 else round(float(value), decimals)
@@ -0,0 +1,159 @@
+"""
+MLB APIプロキシ（/api/mlb/game/）のベンチマーク
+応答の遅い MLB Stats API をローカルのスタブサーバーで再現し、同時リクエスト時のスループットを比較する
+
+  - WSGI: スレッドプールで処理（スレッド数 = 同時に処理できるリクエスト数）
+  - ASGI: 1つのイベントループで処理（上流の応答待ちの間スレッドを占有しない）
+          同時に上流へ出るリクエストは接続プール（mlb_games.MAX_CONNECTIONS）で制限される
+
+キャッシュに当たらないよう、リクエストごとに (team_id, date) を変える
+"""
+import asyncio
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client
+from api import mlb_games
+
+USER_AGENT = "Mozilla/5.0 (benchmark)"
+
+
+def stub_server(latency):
+    """schedule APIの代わりに、latency 秒待ってから試合を1件返すサーバー"""
+    body = json.dumps({
+        "dates": [{"games": [{
+            "gamePk": 745000,
+            "status": {"detailedState": "Final"},
+            "teams": {
+                "away": {"team": {"name": "Away"}, "score": 1},
+                "home": {"team": {"name": "Home"}, "score": 2},
+            },
+        }]}],
+    }).encode("utf-8")
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class Command(BaseCommand):
+    help = "MLB APIプロキシのWSGI（スレッド）とASGI（非同期）のスループットを比較"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=200,
+            help="リクエスト数（デフォルト: 200）",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=50,
+            help="同時リクエスト数（デフォルト: 50）",
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=8,
+            help="WSGIのワーカースレッド数（デフォルト: 8）",
+        )
+        parser.add_argument(
+            "--latency",
+            type=float,
+            default=0.2,
+            help="スタブの上流APIの応答時間（秒、デフォルト: 0.2）",
+        )
+
+    def handle(self, *args, **options):
+        num_requests = options["requests"]
+        concurrency = options["concurrency"]
+
+        server = stub_server(options["latency"])
+        original_url = mlb_games.SCHEDULE_URL
+        mlb_games.SCHEDULE_URL = f"http://127.0.0.1:{server.server_port}/api/v1/schedule"
+        mlb_games._session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=options["threads"]))
+
+        self.stdout.write(
+            f"リクエスト数: {num_requests}, 同時リクエスト数: {concurrency}, "
+            f"WSGIスレッド数: {options['threads']}, 上流への最大接続数: {mlb_games.MAX_CONNECTIONS}, "
+            f"上流の応答時間: {options['latency'] * 1000:.0f}ms\n"
+        )
+        try:
+            # 実行ごとに別の日付範囲を使い、キャッシュに当たらないようにする
+            start_date = date(2001, 1, 1)
+            cache.clear()
+            wsgi = self.run_wsgi(self.urls(num_requests, start_date), options["threads"])
+            cache.clear()
+            asgi = asyncio.run(self.run_asgi(self.urls(num_requests, start_date + timedelta(days=num_requests)), concurrency))
+        finally:
+            mlb_games.SCHEDULE_URL = original_url
+            server.shutdown()
+
+        for label, (elapsed, latencies, errors) in (("WSGI (スレッド)", wsgi), ("ASGI (非同期)", asgi)):
+            latencies.sort()
+            self.stdout.write(
+                f"  {label:<16} {num_requests / elapsed:8.1f} req/s  "
+                f"p50 {statistics.median(latencies) * 1000:7.1f}ms  "
+                f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:7.1f}ms  "
+                f"エラー {errors}件"
+            )
+        self.stdout.write(self.style.SUCCESS(f"\nASGI / WSGI: {wsgi[0] / asgi[0]:.1f}倍"))
+
+    @staticmethod
+    def urls(num_requests, start_date):
+        return [
+            f"/api/mlb/game/?team_id={108 + i % 30}&date={(start_date + timedelta(days=i)).isoformat()}"
+            for i in range(num_requests)
+        ]
+
+    def run_wsgi(self, urls, threads):
+        client = Client()
+
+        def fetch(url):
+            start = time.perf_counter()
+            response = client.get(url, headers={"user-agent": USER_AGENT})
+            return time.perf_counter() - start, response.status_code != 200
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            results = list(executor.map(fetch, urls))
+        elapsed = time.perf_counter() - start
+        return elapsed, [latency for latency, _ in results], sum(error for _, error in results)
+
+    async def run_asgi(self, urls, concurrency):
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(url):
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(url, headers={"user-agent": USER_AGENT})
+                return time.perf_counter() - start, response.status_code != 200
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(fetch(url) for url in urls))
+        elapsed = time.perf_counter() - start
+        return elapsed, [latency for latency, _ in results], sum(error for _, error in results)
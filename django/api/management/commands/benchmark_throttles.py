@@ -0,0 +1,127 @@
+"""
+スロットリング実装のベンチマーク
+従来のSimpleRateThrottle（タイムスタンプ履歴方式）と
+SlidingWindowRateThrottle（カウンター方式）の処理時間・キャッシュ操作回数・キャッシュ使用量を比較する
+
+デフォルトはプロセス内のLocMemCacheで計測する（get_many もキーごとの get になるため、
+共有キャッシュでの往復回数の差は時間に表れない）。--cache で settings.CACHES のキャッシュ（Redis）を指定できる
+"""
+import logging
+import time
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory
+from rest_framework.request import Request
+from rest_framework.throttling import SimpleRateThrottle
+from api.throttling import ToppsCardListThrottle, BurstThrottle
+
+
+class LegacyToppsCardListThrottle(SimpleRateThrottle):
+    scope = 'topps_list'
+    get_cache_key = ToppsCardListThrottle.get_cache_key
+
+
+class LegacyBurstThrottle(SimpleRateThrottle):
+    scope = 'burst'
+    get_cache_key = BurstThrottle.get_cache_key
+
+
+class CountingCache:
+    """キャッシュ操作（共有キャッシュでは1回の往復）の回数を数えるラッパー"""
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.operations = 0
+
+    def __getattr__(self, name):
+        method = getattr(self.cache, name)
+
+        def call(*args, **kwargs):
+            self.operations += 1
+            return method(*args, **kwargs)
+        return call
+
+
+class Command(BaseCommand):
+    help = "従来のスロットリングとスライディングウィンドウ方式の性能を比較"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=20000,
+            help="シミュレートするリクエスト数（デフォルト: 20000）",
+        )
+        parser.add_argument(
+            "--clients",
+            type=int,
+            default=50,
+            help="クライアント（IP）数（デフォルト: 50）",
+        )
+        parser.add_argument(
+            "--cache",
+            type=str,
+            help="計測に使う settings.CACHES のエイリアス（省略時は専用のLocMemCache）",
+        )
+
+    def handle(self, *args, **options):
+        num_requests = options["requests"]
+        num_clients = options["clients"]
+
+        factory = APIRequestFactory()
+        requests = [
+            Request(factory.get('/api/topps-cards/', REMOTE_ADDR=f'10.0.{i // 256}.{i % 256}'))
+            for i in range(num_clients)
+        ]
+
+        self.stdout.write(f"リクエスト数: {num_requests}, クライアント数: {num_clients}\n")
+
+        suites = [
+            ("SimpleRateThrottle (従来)", [LegacyToppsCardListThrottle, LegacyBurstThrottle]),
+            ("SlidingWindowRateThrottle", [ToppsCardListThrottle, BurstThrottle]),
+        ]
+        # 拒否時のセキュリティログ出力は計測対象外とする
+        security_logger = logging.getLogger('django.security')
+        security_logger.disabled = True
+        try:
+            for label, throttle_classes in suites:
+                self._run(label, throttle_classes, requests, num_requests, options["cache"])
+        finally:
+            security_logger.disabled = False
+
+    def _run(self, label, throttle_classes, requests, num_requests, cache_alias):
+        if cache_alias:
+            backend = caches[cache_alias]
+        else:
+            # 本番キャッシュを汚さないよう専用のLocMemCacheを使用
+            backend = LocMemCache(f'throttle-benchmark-{label}', {'OPTIONS': {'MAX_ENTRIES': 1000000}})
+        cache = CountingCache(backend)
+        run_id = time.time_ns()
+        throttles = []
+        for throttle_class in throttle_classes:
+            throttle = throttle_class()
+            throttle.cache = cache
+            # 共有キャッシュの既存のカウンターと衝突しないキーにする
+            throttle.cache_format = f'benchmark_{run_id}_{throttle.cache_format}'
+            throttles.append(throttle)
+
+        allowed = 0
+        start = time.perf_counter()
+        for i in range(num_requests):
+            request = requests[i % len(requests)]
+            # DRFと同様、全スロットルを評価する
+            if all([throttle.allow_request(request, None) for throttle in throttles]):
+                allowed += 1
+        elapsed = time.perf_counter() - start
+
+        per_request_us = elapsed / num_requests * 1_000_000
+
+        self.stdout.write(self.style.SUCCESS(label))
+        self.stdout.write(f"  合計: {elapsed:.3f}s ({per_request_us:.1f}µs/リクエスト)")
+        self.stdout.write(f"  許可: {allowed}件, 拒否: {num_requests - allowed}件")
+        self.stdout.write(f"  キャッシュ操作: {cache.operations}回 ({cache.operations / num_requests:.2f}回/リクエスト)")
+        if isinstance(backend, LocMemCache):
+            cache_bytes = sum(len(value) for value in backend._cache.values())
+            self.stdout.write(f"  キャッシュ: {len(backend._cache)}キー, {cache_bytes}バイト")
+        self.stdout.write("")
@@ -1,5 +1,6 @@
 import re
 from django.core.management.base import BaseCommand
+from api.card_search import refresh_card_search
 from api.models import ToppsCard
 
 
@@ -10,6 +11,7 @@ class Command(BaseCommand):
         cards = ToppsCard.objects.all()
         total = cards.count()
         updated = 0
+        changed_ids = []
 
         self.stdout.write(f"Processing {total} cards...")
 
@@ -20,6 +22,7 @@ class Command(BaseCommand):
             if original_title != cleaned_title:
                 card.title = cleaned_title
                 card.save(update_fields=['title'])
+                changed_ids.append(card.pk)
                 updated += 1
                 self.stdout.write(
                     self.style.SUCCESS(
@@ -27,6 +30,10 @@ class Command(BaseCommand):
                     )
                 )
 
+        if changed_ids:
+            # カード一覧のリードモデルにも反映
+            refresh_card_search(ToppsCard.objects.filter(pk__in=changed_ids))
+
         self.stdout.write(
             self.style.SUCCESS(
                 f"Completed! Updated {updated} of {total} cards."
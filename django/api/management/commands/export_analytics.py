@@ -0,0 +1,269 @@
+"""
+分析用の列指向データを書き出すコマンド
+選手成績（PlayerStats）・試合ごとの成績（PlayerGameLog）・カード（ToppsCard）・WBC出場選手（WBCRosterEntry）を
+Parquet / Arrow IPC（pyarrow がある場合）または NumPy の .npz に書き出し、
+ノートブックから本番DBに接続せずに全シーズンを読めるようにする（読み込みは api.columnar.load_export）
+
+行は values_list().iterator() でチャンクごとに読み、チャンクごとに書き出す（全件をメモリに載せない）
+出力は releases/<タイムスタンプ>/ に書き込んだ後、シンボリックリンク current をアトミックに差し替える
+"""
+import os
+import shutil
+import time
+from datetime import datetime
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from api import columnar
+from api.models import PlayerGameLog, PlayerStats, ToppsCard, WBCRosterEntry
+
+# データセットごとの (列名, 種類, values_list に渡すフィールド)
+DATASETS = {
+    'player_stats': {
+        'model': PlayerStats,
+        'columns': [
+            ('id', 'int', 'id'),
+            ('player_id', 'int', 'player_id'),
+            ('mlb_player_id', 'int', 'player__mlb_player_id'),
+            ('player_name', 'str', 'player__full_name'),
+            ('position', 'str', 'player__position'),
+            ('team', 'str', 'player__team__abbreviation'),
+            ('season', 'int', 'season'),
+            ('stat_type', 'str', 'stat_type'),
+            ('games', 'int', 'games'),
+            ('at_bats', 'int', 'at_bats'),
+            ('runs', 'int', 'runs'),
+            ('hits', 'int', 'hits'),
+            ('doubles', 'int', 'doubles'),
+            ('triples', 'int', 'triples'),
+            ('home_runs', 'int', 'home_runs'),
+            ('rbi', 'int', 'rbi'),
+            ('stolen_bases', 'int', 'stolen_bases'),
+            ('batter_strikeouts', 'int', 'batter_strikeouts'),
+            ('sac_flies', 'int', 'sac_flies'),
+            ('batting_avg', 'float', 'batting_avg'),
+            ('obp', 'float', 'obp'),
+            ('slg', 'float', 'slg'),
+            ('ops', 'float', 'ops'),
+            ('wins', 'int', 'wins'),
+            ('losses', 'int', 'losses'),
+            ('era', 'float', 'era'),
+            ('games_pitched', 'int', 'games_pitched'),
+            ('games_started', 'int', 'games_started'),
+            ('saves', 'int', 'saves'),
+            ('innings_pitched', 'float', 'innings_pitched'),
+            ('strikeouts', 'int', 'strikeouts'),
+            ('walks_allowed', 'int', 'walks_allowed'),
+            ('whip', 'float', 'whip'),
+            ('iso', 'float', 'iso'),
+            ('babip', 'float', 'babip'),
+            ('k_per_9', 'float', 'k_per_9'),
+            ('bb_per_9', 'float', 'bb_per_9'),
+            ('k_bb', 'float', 'k_bb'),
+        ],
+    },
+    'cards': {
+        'model': ToppsCard,
+        'columns': [
+            ('id', 'int', 'id'),
+            ('card_number', 'str', 'card_number'),
+            ('set_year', 'int', 'topps_set__year'),
+            ('player_id', 'int', 'player_id'),
+            ('mlb_player_id', 'int', 'player__mlb_player_id'),
+            ('player_name', 'str', 'player__full_name'),
+            ('team', 'str', 'team__abbreviation'),
+            ('title', 'str', 'title'),
+            ('total_print', 'int', 'total_print'),
+            ('release_date', 'date', 'release_date'),
+            ('is_rookie', 'bool', 'is_rookie'),
+            ('mlb_game_id', 'int', 'mlb_game_id'),
+            ('rolling_avg', 'float', 'rolling_avg'),
+            ('rolling_ops', 'float', 'rolling_ops'),
+            ('rolling_home_runs', 'int', 'rolling_home_runs'),
+            ('rolling_era', 'float', 'rolling_era'),
+            ('rolling_k_per_9', 'float', 'rolling_k_per_9'),
+        ],
+    },
+    'game_logs': {
+        'model': PlayerGameLog,
+        'columns': [
+            ('id', 'int', 'id'),
+            ('player_id', 'int', 'player_id'),
+            ('mlb_player_id', 'int', 'player__mlb_player_id'),
+            ('season', 'int', 'season'),
+            ('stat_type', 'str', 'stat_type'),
+            ('game_pk', 'int', 'game_pk'),
+            ('game_date', 'date', 'game_date'),
+            ('at_bats', 'int', 'at_bats'),
+            ('hits', 'int', 'hits'),
+            ('doubles', 'int', 'doubles'),
+            ('triples', 'int', 'triples'),
+            ('home_runs', 'int', 'home_runs'),
+            ('hit_by_pitch', 'int', 'hit_by_pitch'),
+            ('sac_flies', 'int', 'sac_flies'),
+            ('outs', 'int', 'outs'),
+            ('earned_runs', 'int', 'earned_runs'),
+            ('strikeouts', 'int', 'strikeouts'),
+            ('walks', 'int', 'walks'),
+        ],
+    },
+    'wbc_rosters': {
+        'model': WBCRosterEntry,
+        'columns': [
+            ('id', 'int', 'id'),
+            ('year', 'int', 'tournament__year'),
+            ('country', 'str', 'country'),
+            ('mlb_player_id', 'int', 'mlb_player_id'),
+            ('player_name', 'str', 'player_name'),
+            ('player_id', 'int', 'player_id'),
+        ],
+    },
+}
+
+
+class Command(BaseCommand):
+    help = "選手成績・試合ごとの成績・カード・WBC出場選手を分析用の列指向ファイル（Parquet / Arrow / npz）に書き出す"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            type=str,
+            default=str(settings.ANALYTICS_EXPORT_DIR),
+            help="出力ディレクトリ（デフォルト: settings.ANALYTICS_EXPORT_DIR）",
+        )
+        parser.add_argument(
+            "--format",
+            choices=['auto', *columnar.FORMATS],
+            default='auto',
+            help="出力形式（デフォルト: auto = pyarrow があれば parquet、なければ npz）",
+        )
+        parser.add_argument(
+            "--compression",
+            type=str,
+            default='zstd',
+            help="圧縮方式（parquet: zstd/snappy/gzip/none, arrow: zstd/lz4/none, npz: none 以外は圧縮。デフォルト: zstd）",
+        )
+        parser.add_argument(
+            "--dataset",
+            action="append",
+            choices=list(DATASETS),
+            help="書き出すデータセット（複数指定可、デフォルト: すべて）",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=5000,
+            help="1回に読み込む行数（デフォルト: 5000）",
+        )
+        parser.add_argument(
+            "--keep",
+            type=int,
+            default=3,
+            help="保持する過去の出力数（デフォルト: 3）",
+        )
+
+    def handle(self, *args, **options):
+        output = options["output"]
+        chunk_size = max(options["chunk_size"], 1)
+        keep = max(options["keep"], 1)
+        datasets = options["dataset"] or list(DATASETS)
+
+        available = columnar.available_formats()
+        fmt = options["format"]
+        if fmt == 'auto':
+            if not available:
+                raise CommandError("numpy または pyarrow をインストールしてください")
+            fmt = available[0]
+        elif fmt not in available:
+            raise CommandError(f"{fmt} 形式で書き出すには pyarrow が必要です（pip install pyarrow）")
+
+        releases_dir = os.path.join(output, 'releases')
+        release_name = datetime.now().strftime('%Y%m%d%H%M%S%f')
+        release_dir = os.path.join(releases_dir, release_name)
+        os.makedirs(release_dir, exist_ok=False)
+
+        self.stdout.write(f"形式: {fmt}, 圧縮: {options['compression']}, 出力先: {release_dir}")
+        start = time.perf_counter()
+        manifest = {
+            'format': fmt,
+            'compression': options['compression'],
+            'exported_at': timezone.now().isoformat(),
+            'datasets': {},
+        }
+
+        try:
+            for name in datasets:
+                rows = self._export(release_dir, name, fmt, options['compression'], chunk_size)
+                manifest['datasets'][name] = {
+                    'rows': rows,
+                    'columns': [(column, kind) for column, kind, _ in DATASETS[name]['columns']],
+                }
+                self.stdout.write(f"  {name}: {rows}行")
+            columnar.write_manifest(release_dir, manifest)
+        except Exception:
+            shutil.rmtree(release_dir, ignore_errors=True)
+            raise
+
+        self._activate(output, release_name)
+        self._prune(releases_dir, keep)
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"書き出し完了: {self._size(release_dir) / 1024:.0f}KB → "
+                f"{os.path.join(output, 'current')} ({elapsed:.1f}s)"
+            )
+        )
+
+    def _export(self, release_dir, name, fmt, compression, chunk_size):
+        """1つのデータセットをチャンクごとに書き出し、行数を返す"""
+        config = DATASETS[name]
+        names = [column for column, _, _ in config['columns']]
+        fields = [field for _, _, field in config['columns']]
+        schema = [(column, kind) for column, kind, _ in config['columns']]
+
+        queryset = config['model'].objects.order_by('pk').values_list(*fields)
+        writer = columnar.open_writer(
+            columnar.dataset_path(release_dir, name, fmt), schema, fmt, compression
+        )
+        rows = 0
+        chunk = []
+        try:
+            for row in queryset.iterator(chunk_size=chunk_size):
+                chunk.append(row)
+                if len(chunk) >= chunk_size:
+                    writer.write(self._columns(names, chunk))
+                    rows += len(chunk)
+                    chunk = []
+            # 0行でも列の型がわかるよう、空のチャンクも書き出す
+            if chunk or rows == 0:
+                writer.write(self._columns(names, chunk))
+                rows += len(chunk)
+        finally:
+            writer.close()
+        return rows
+
+    @staticmethod
+    def _columns(names, chunk):
+        """行のリストを {列名: 値のリスト} にする"""
+        return {column: [row[i] for row in chunk] for i, column in enumerate(names)}
+
+    def _activate(self, output, release_name):
+        """current シンボリックリンクをアトミックに差し替える"""
+        current = os.path.join(output, 'current')
+        tmp_link = os.path.join(output, f'.current-{release_name}')
+        os.symlink(os.path.join('releases', release_name), tmp_link)
+        os.replace(tmp_link, current)
+
+    def _prune(self, releases_dir, keep):
+        """古い出力を削除"""
+        releases = sorted(os.listdir(releases_dir))
+        for name in releases[:-keep]:
+            shutil.rmtree(os.path.join(releases_dir, name), ignore_errors=True)
+
+    @staticmethod
+    def _size(path):
+        return sum(
+            os.path.getsize(os.path.join(root, filename))
+            for root, _, filenames in os.walk(path) for filename in filenames
+        )
@@ -0,0 +1,181 @@
+"""
+公開APIの静的スナップショットを書き出すコマンド
+チーム・選手・WBCの公開エンドポイントのレスポンスをJSONファイル
+（gzip / brotli 圧縮版も）として MEDIA_ROOT/snapshots に出力し、
+nginx がクエリなしの匿名GETを Django を経由せずに返せるようにする
+（topps-cards は Referer チェックと専用のレート制限があるため対象外）
+
+--resource を指定した場合は、現在のスナップショットをコピーして指定したリソースだけを出力し直す
+（管理画面での編集後に jobs.enqueue_snapshot_export から実行される）
+
+出力は releases/<タイムスタンプ>/ に書き込んだ後、シンボリックリンク current を
+アトミックに差し替える（nginx は snapshots/current を参照）
+"""
+import gzip
+import os
+import shutil
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIRequestFactory
+from api.models import Player, Team, WBCTournament
+from api.views import PlayerViewSet, TeamViewSet, WBCTournamentViewSet
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# スナップショットを出力するリソース（URLの最初の階層）
+RESOURCES = ('teams', 'players', 'wbc-tournaments')
+
+
+def snapshot_targets(resources=RESOURCES):
+    """(URLパス, ビュー, URL引数) のリスト"""
+    team_list = TeamViewSet.as_view({'get': 'list'}, throttle_classes=[])
+    team_detail = TeamViewSet.as_view({'get': 'retrieve'}, throttle_classes=[])
+    player_list = PlayerViewSet.as_view({'get': 'list'}, throttle_classes=[])
+    player_detail = PlayerViewSet.as_view({'get': 'retrieve'}, throttle_classes=[])
+    wbc_list = WBCTournamentViewSet.as_view({'get': 'list'})
+    wbc_detail = WBCTournamentViewSet.as_view({'get': 'retrieve'})
+    wbc_roster = WBCTournamentViewSet.as_view({'get': 'roster'})
+
+    targets = [
+        ('teams/', team_list, {}),
+        ('players/', player_list, {}),
+        ('wbc-tournaments/', wbc_list, {}),
+    ]
+    for pk in Team.objects.values_list('pk', flat=True):
+        targets.append((f'teams/{pk}/', team_detail, {'pk': str(pk)}))
+    for pk in Player.objects.values_list('pk', flat=True):
+        targets.append((f'players/{pk}/', player_detail, {'pk': str(pk)}))
+    for pk in WBCTournament.objects.values_list('pk', flat=True):
+        targets.append((f'wbc-tournaments/{pk}/', wbc_detail, {'pk': str(pk)}))
+        targets.append((f'wbc-tournaments/{pk}/roster/', wbc_roster, {'pk': str(pk)}))
+    return [target for target in targets if target[0].split('/', 1)[0] in resources]
+
+
+class Command(BaseCommand):
+    help = "公開APIの静的スナップショット（JSON + gzip/brotli）をnginx配信用に書き出す"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            type=str,
+            default=str(settings.MEDIA_ROOT / 'snapshots'),
+            help="出力ディレクトリ（デフォルト: MEDIA_ROOT/snapshots）",
+        )
+        parser.add_argument(
+            "--base-url",
+            type=str,
+            default=os.getenv('SNAPSHOT_BASE_URL', ''),
+            help="ページネーションのリンクに使う公開URL（例: https://baseball-now.com）",
+        )
+        parser.add_argument(
+            "--keep",
+            type=int,
+            default=3,
+            help="保持する過去のスナップショット数（デフォルト: 3）",
+        )
+        parser.add_argument(
+            "--resource",
+            action="append",
+            choices=RESOURCES,
+            help="指定したリソースだけを出力し直す（複数指定可、デフォルト: すべて）",
+        )
+
+    def handle(self, *args, **options):
+        output = options["output"]
+        keep = max(options["keep"], 1)
+
+        base_url = options["base_url"] or f"http://{settings.ALLOWED_HOSTS[0]}"
+        parsed = urlsplit(base_url)
+        if not parsed.netloc:
+            raise CommandError(f"--base-url が不正です: {base_url}")
+
+        releases_dir = os.path.join(output, 'releases')
+        release_name = datetime.now().strftime('%Y%m%d%H%M%S%f')
+        release_dir = os.path.join(releases_dir, release_name)
+        resources = options["resource"] or RESOURCES
+        current = os.path.join(output, 'current')
+        if options["resource"] and os.path.isdir(current):
+            # 他のリソースは現在のスナップショットをそのまま引き継ぐ
+            source = os.path.realpath(current)
+            shutil.copytree(
+                source, release_dir,
+                ignore=lambda path, names: [
+                    name for name in names if path == source and name in resources
+                ],
+            )
+        else:
+            resources = RESOURCES
+            os.makedirs(release_dir, exist_ok=False)
+
+        factory = APIRequestFactory()
+        start = time.perf_counter()
+        written = 0
+        raw_bytes = 0
+        gzip_bytes = 0
+
+        try:
+            for path, view, kwargs in snapshot_targets(resources):
+                request = factory.get(
+                    f'/api/{path}',
+                    HTTP_ACCEPT='application/json',
+                    HTTP_HOST=parsed.netloc,
+                    secure=parsed.scheme == 'https',
+                )
+                response = view(request, **kwargs)
+                if hasattr(response, 'render'):
+                    response.render()
+                if response.status_code != 200:
+                    self.stdout.write(self.style.WARNING(f"  skip /api/{path} ({response.status_code})"))
+                    continue
+
+                content = response.content
+                target_dir = os.path.join(release_dir, path)
+                os.makedirs(target_dir, exist_ok=True)
+                filename = os.path.join(target_dir, 'index.json')
+                with open(filename, 'wb') as f:
+                    f.write(content)
+                compressed = gzip.compress(content, compresslevel=9, mtime=0)
+                with open(filename + '.gz', 'wb') as f:
+                    f.write(compressed)
+                if brotli is not None:
+                    with open(filename + '.br', 'wb') as f:
+                        f.write(brotli.compress(content))
+
+                written += 1
+                raw_bytes += len(content)
+                gzip_bytes += len(compressed)
+        except Exception:
+            shutil.rmtree(release_dir, ignore_errors=True)
+            raise
+
+        self._activate(output, release_name)
+        self._prune(releases_dir, keep)
+
+        elapsed = time.perf_counter() - start
+        ratio = gzip_bytes / raw_bytes if raw_bytes else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"スナップショット出力完了: {written}件, {raw_bytes / 1024:.0f}KB "
+                f"(gzip {gzip_bytes / 1024:.0f}KB, {ratio:.0%}) [{', '.join(resources)}] → {release_dir} ({elapsed:.1f}s)"
+            )
+        )
+
+    def _activate(self, output, release_name):
+        """current シンボリックリンクをアトミックに差し替える"""
+        current = os.path.join(output, 'current')
+        tmp_link = os.path.join(output, f'.current-{release_name}')
+        # nginxコンテナからも辿れるよう相対パスでリンクする
+        os.symlink(os.path.join('releases', release_name), tmp_link)
+        os.replace(tmp_link, current)
+
+    def _prune(self, releases_dir, keep):
+        """古いスナップショットを削除"""
+        releases = sorted(os.listdir(releases_dir))
+        for name in releases[:-keep]:
+            shutil.rmtree(os.path.join(releases_dir, name), ignore_errors=True)
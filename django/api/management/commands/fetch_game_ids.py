@@ -4,6 +4,7 @@ ToppsカードのリリースI日から試合日を算出し、MLB Stats APIでg
 import time
 from datetime import timedelta
 from django.core.management.base import BaseCommand
+from api.card_search import refresh_card_search
 from api.models import ToppsCard
 
 try:
@@ -73,6 +74,7 @@ class Command(BaseCommand):
         updated = 0
         not_found = 0
         errors = 0
+        changed_ids = []
 
         for i, card in enumerate(cards, 1):
             # 試合日は発行日の前日
@@ -106,6 +108,7 @@ class Command(BaseCommand):
                     else:
                         card.mlb_game_id = game_id
                         card.save(update_fields=["mlb_game_id"])
+                        changed_ids.append(card.pk)
                         self.stdout.write(self.style.SUCCESS("  保存完了"))
                     updated += 1
                 else:
@@ -120,4 +123,8 @@ class Command(BaseCommand):
             if i < total:
                 time.sleep(delay)
 
+        if changed_ids:
+            # カード一覧のリードモデルにも反映
+            refresh_card_search(ToppsCard.objects.filter(pk__in=changed_ids))
+
         self.stdout.write(f"\n処理完了: 成功 {updated}件, 見つからず {not_found}件, エラー {errors}件")
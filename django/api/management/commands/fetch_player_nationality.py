@@ -1,15 +1,12 @@
 """
 MLB Stats APIから選手の国籍（birthCountry）を取得して保存するコマンド
+people?personIds= で複数選手をまとめて取得し、bulk_update で一括保存する
 """
-import time
 from django.core.management.base import BaseCommand
+from django.utils import timezone
+from api.mlb_people import fetch_people, statsapi
 from api.models import Player
 
-try:
-    import statsapi
-except ImportError:
-    statsapi = None
-
 
 class Command(BaseCommand):
     help = "MLB Stats APIから選手の国籍（出身国）を取得・保存"
@@ -31,6 +28,12 @@ class Command(BaseCommand):
             action="store_true",
             help="既に国籍が設定されているプレイヤーも上書きする",
         )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="1リクエストで取得する選手数（デフォルト: 100）",
+        )
         parser.add_argument(
             "--delay",
             type=float,
@@ -48,10 +51,13 @@ class Command(BaseCommand):
         dry_run = options["dry_run"]
         limit = options["limit"]
         force = options["force"]
+        batch_size = max(options["batch_size"], 1)
         delay = options["delay"]
 
         # mlb_player_idが設定されているプレイヤーを対象
-        players = Player.objects.filter(mlb_player_id__isnull=False)
+        players = Player.objects.filter(mlb_player_id__isnull=False).only(
+            "id", "mlb_player_id", "full_name", "nationality"
+        )
 
         if not force:
             # 国籍が空のプレイヤーのみ
@@ -60,53 +66,50 @@ class Command(BaseCommand):
         if limit > 0:
             players = players[:limit]
 
-        total = players.count()
+        players_by_mlb_id = {player.mlb_player_id: player for player in players}
+        total = len(players_by_mlb_id)
         self.stdout.write(f"処理対象: {total}名のプレイヤー")
 
         if total == 0:
             self.stdout.write("処理対象のプレイヤーがいません")
             return
 
-        updated = 0
+        to_update = []
         not_found = 0
         errors = 0
 
-        for i, player in enumerate(players, 1):
-            self.stdout.write(f"\n[{i}/{total}] {player.full_name} (MLB ID: {player.mlb_player_id})")
-
+        batches = fetch_people(
+            players_by_mlb_id, batch_size=batch_size, fields="people,id,birthCountry", delay=delay
+        )
+        while True:
             try:
-                # MLB Stats APIで選手詳細を取得
-                player_info = statsapi.get("person", {"personId": player.mlb_player_id})
-
-                if not player_info or "people" not in player_info or not player_info["people"]:
-                    self.stdout.write(self.style.WARNING("  選手情報が取得できません"))
-                    not_found += 1
-                    continue
-
-                person = player_info["people"][0]
-                birth_country = person.get("birthCountry", "")
-
-                if birth_country:
-                    self.stdout.write(self.style.SUCCESS(f"  国籍: {birth_country}"))
-
-                    if dry_run:
-                        self.stdout.write(self.style.WARNING("  [DRY RUN] 更新スキップ"))
-                    else:
-                        player.nationality = birth_country
-                        player.save(update_fields=["nationality"])
-                        self.stdout.write(self.style.SUCCESS("  保存完了"))
-
-                    updated += 1
-                else:
-                    self.stdout.write(self.style.WARNING("  国籍情報がありません"))
-                    not_found += 1
-
+                batch, people = next(batches)
+            except StopIteration:
+                break
             except Exception as e:
-                self.stdout.write(self.style.ERROR(f"  エラー: {e}"))
+                # 失敗したバッチ以降は処理しない（取得済みの分は保存する）
+                self.stdout.write(self.style.ERROR(f"エラー: {e}"))
                 errors += 1
-
-            # APIレート制限対策
-            if i < total:
-                time.sleep(delay)
-
-        self.stdout.write(f"\n処理完了: 更新 {updated}件, 情報なし {not_found}件, エラー {errors}件")
+                break
+
+            countries = {person["id"]: person.get("birthCountry", "") for person in people}
+            for mlb_id in batch:
+                player = players_by_mlb_id[mlb_id]
+                birth_country = countries.get(mlb_id)
+                if not birth_country:
+                    self.stdout.write(self.style.WARNING(f"  {player.full_name} (MLB ID: {mlb_id}): 国籍情報がありません"))
+                    not_found += 1
+                    continue
+                self.stdout.write(f"  {player.full_name} (MLB ID: {mlb_id}): {birth_country}")
+                if player.nationality != birth_country:
+                    player.nationality = birth_country
+                    player.updated_at = timezone.now()
+                    to_update.append(player)
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING(f"\n[DRY RUN] {len(to_update)}件の更新をスキップ"))
+        elif to_update:
+            Player.objects.bulk_update(to_update, ["nationality", "updated_at"], batch_size=500)
+            self.stdout.write(self.style.SUCCESS(f"\n{len(to_update)}件保存しました"))
+
+        self.stdout.write(f"\n処理完了: 更新 {len(to_update)}件, 情報なし {not_found}件, エラー {errors}件")
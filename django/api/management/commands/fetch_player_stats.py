@@ -1,11 +1,15 @@
 """
 MLB Stats APIから選手の成績（打撃・投球）を取得して保存するコマンド
+試合ごとの成績（PlayerGameLog）も取得し、最後に派生指標（api/derived_stats.py）と成績ランキングを更新する
 """
 import time
 from datetime import datetime
 from decimal import Decimal, InvalidOperation
 from django.core.management.base import BaseCommand
-from api.models import Player, PlayerStats, StatType
+from django.db import transaction
+from api.derived_stats import innings_to_outs, refresh_derived_stats
+from api.leaderboards import refresh_leaderboards
+from api.models import Player, PlayerGameLog, PlayerStats, StatType
 
 try:
     import statsapi
@@ -45,6 +49,11 @@ class Command(BaseCommand):
             type=int,
             help="特定のプレイヤーIDのみ処理",
         )
+        parser.add_argument(
+            "--skip-game-logs",
+            action="store_true",
+            help="試合ごとの成績（カードの直近成績の計算に使う）を取得しない",
+        )
 
     def handle(self, *args, **options):
         if not statsapi:
@@ -58,6 +67,7 @@ class Command(BaseCommand):
         limit = options["limit"]
         delay = options["delay"]
         player_id = options.get("player_id")
+        skip_game_logs = options["skip_game_logs"]
 
         self.stdout.write(f"シーズン: {season}")
 
@@ -112,6 +122,20 @@ class Command(BaseCommand):
                 else:
                     self.stdout.write("  投球: データなし")
 
+                # 試合ごとの成績を取得
+                if not skip_game_logs and (hitting_stats or pitching_stats):
+                    game_logs = self.fetch_game_logs(player.mlb_player_id, season)
+                    if game_logs is None:
+                        # 保存済みの試合ごとの成績はそのまま残す
+                        errors += 1
+                    else:
+                        self.stdout.write(
+                            f"  試合ごと: 打撃 {len(game_logs[StatType.HITTING])}試合, "
+                            f"投球 {len(game_logs[StatType.PITCHING])}試合"
+                        )
+                        if not dry_run:
+                            self.save_game_logs(player, season, game_logs)
+
             except Exception as e:
                 self.stdout.write(self.style.ERROR(f"  エラー: {e}"))
                 import traceback
@@ -124,6 +148,15 @@ class Command(BaseCommand):
 
         self.stdout.write(f"\n処理完了: 打撃 {hitting_saved}件, 投球 {pitching_saved}件, エラー {errors}件")
 
+        if not dry_run and (hitting_saved or pitching_saved):
+            # 派生指標（ISO・BABIP・K/9 等とカードの直近成績）をシーズン全選手分まとめて計算する
+            stats_updated, cards_updated = refresh_derived_stats([season])[season]
+            self.stdout.write(f"派生指標更新: 成績 {stats_updated}件, カード {cards_updated}件")
+
+            # 成績ランキングも作り直す
+            saved = refresh_leaderboards([season])
+            self.stdout.write(f"ランキング更新: {saved[season]}件")
+
     def fetch_hitting_stats(self, mlb_player_id, season):
         """打撃成績を取得"""
         try:
@@ -164,6 +197,70 @@ class Command(BaseCommand):
         except Exception:
             return None
 
+    def fetch_game_logs(self, mlb_player_id, season):
+        """
+        試合ごとの打撃・投球成績を1回のリクエストで取得
+        戻り値: {StatType: [split, ...]}（split は date, game.gamePk, stat を持つ）
+        取得に失敗した場合は None（保存済みの試合ごとの成績を空で置き換えないように）
+        """
+        game_logs = {StatType.HITTING: [], StatType.PITCHING: []}
+        try:
+            data = statsapi.get('person', {
+                'personId': mlb_player_id,
+                'hydrate': f'stats(group=[hitting,pitching],type=[gameLog],season={season})',
+            })
+        except Exception as e:
+            self.stdout.write(self.style.WARNING(f"  試合ごと: 取得に失敗しました ({e})"))
+            return None
+
+        for person in data.get('people', []):
+            for stat_entry in person.get('stats', []):
+                group = stat_entry.get('group', {}).get('displayName')
+                if group == 'hitting':
+                    game_logs[StatType.HITTING].extend(stat_entry.get('splits', []))
+                elif group == 'pitching':
+                    game_logs[StatType.PITCHING].extend(stat_entry.get('splits', []))
+        return game_logs
+
+    def save_game_logs(self, player, season, game_logs):
+        """シーズンの試合ごとの成績を入れ替える"""
+        logs = []
+        for stat_type, splits in game_logs.items():
+            for split in splits:
+                game_pk = split.get('game', {}).get('gamePk')
+                if not game_pk or not split.get('date'):
+                    continue
+                stat = split.get('stat', {})
+                log = PlayerGameLog(
+                    player=player,
+                    season=season,
+                    stat_type=stat_type,
+                    game_pk=game_pk,
+                    game_date=datetime.strptime(split['date'], '%Y-%m-%d').date(),
+                    strikeouts=self.safe_int(stat.get('strikeOuts')) or 0,
+                    walks=self.safe_int(stat.get('baseOnBalls')) or 0,
+                )
+                if stat_type == StatType.HITTING:
+                    log.at_bats = self.safe_int(stat.get('atBats')) or 0
+                    log.hits = self.safe_int(stat.get('hits')) or 0
+                    log.doubles = self.safe_int(stat.get('doubles')) or 0
+                    log.triples = self.safe_int(stat.get('triples')) or 0
+                    log.home_runs = self.safe_int(stat.get('homeRuns')) or 0
+                    log.hit_by_pitch = self.safe_int(stat.get('hitByPitch')) or 0
+                    log.sac_flies = self.safe_int(stat.get('sacFlies')) or 0
+                else:
+                    outs = self.safe_int(stat.get('outs'))
+                    if outs is None:
+                        innings = self.safe_decimal(stat.get('inningsPitched'))
+                        outs = int(innings_to_outs(float(innings))) if innings is not None else 0
+                    log.outs = outs
+                    log.earned_runs = self.safe_int(stat.get('earnedRuns')) or 0
+                logs.append(log)
+
+        with transaction.atomic():
+            PlayerGameLog.objects.filter(player=player, season=season).delete()
+            PlayerGameLog.objects.bulk_create(logs, ignore_conflicts=True)
+
     def save_stats(self, player, season, stat_type, stats_data):
         """成績をデータベースに保存"""
         defaults = {}
@@ -179,6 +276,8 @@ class Command(BaseCommand):
                 "home_runs": self.safe_int(stats_data.get("homeRuns")),
                 "rbi": self.safe_int(stats_data.get("rbi")),
                 "stolen_bases": self.safe_int(stats_data.get("stolenBases")),
+                "batter_strikeouts": self.safe_int(stats_data.get("strikeOuts")),
+                "sac_flies": self.safe_int(stats_data.get("sacFlies")),
                 "batting_avg": self.safe_decimal(stats_data.get("avg")),
                 "obp": self.safe_decimal(stats_data.get("obp")),
                 "slg": self.safe_decimal(stats_data.get("slg")),
@@ -159,7 +159,7 @@ class Command(BaseCommand):
                     new_years = existing_years | wbc_info['years']
                     player.wbc_years = ','.join(map(str, sorted(new_years)))
                     player.wbc_country = country
-                    player.save(update_fields=['wbc_years', 'wbc_country'])
+                    player.save(update_fields=['wbc_years', 'wbc_country', 'updated_at'])
                     updated += 1
 
         if dry_run:
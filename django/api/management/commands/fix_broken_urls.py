@@ -5,6 +5,7 @@ import re
 import urllib.parse
 import time
 from django.core.management.base import BaseCommand
+from api.card_search import refresh_card_search
 from api.models import ToppsCard
 
 try:
@@ -89,6 +90,7 @@ class Command(BaseCommand):
         fixed = 0
         already_ok = 0
         failed = 0
+        changed_ids = []
 
         for card in cards:
             checked += 1
@@ -119,6 +121,7 @@ class Command(BaseCommand):
                     else:
                         card.product_url = short_url
                         card.save(update_fields=['product_url'])
+                        changed_ids.append(card.pk)
                         self.stdout.write(self.style.SUCCESS('  ✓ 更新完了'))
                     fixed += 1
                 else:
@@ -128,6 +131,10 @@ class Command(BaseCommand):
             # レート制限
             time.sleep(0.5)
 
+        if changed_ids:
+            # カード一覧のリードモデルにも反映
+            refresh_card_search(ToppsCard.objects.filter(pk__in=changed_ids))
+
         self.stdout.write(f'\n処理完了:')
         self.stdout.write(f'  OK: {already_ok}件')
         self.stdout.write(f'  修正: {fixed}件')
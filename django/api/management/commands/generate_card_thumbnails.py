@@ -0,0 +1,109 @@
+"""
+カード画像（ToppsCard.image_url）をダウンロードしてローカルのサムネイル（WebP / AVIF）を生成するコマンド
+生成したURLは ToppsCard.thumbnails に保存し、カード一覧APIから参照できるようにする
+"""
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from django.core.management.base import BaseCommand
+from django.db.models import F
+from django.utils import timezone
+from api.card_images import (
+    THUMBNAIL_WIDTHS, Image, available_formats, download_image, generate_thumbnails, thumbnails_exist,
+)
+from api.card_search import refresh_card_search
+from api.models import ToppsCard
+
+
+class Command(BaseCommand):
+    help = "カード画像のサムネイル（WebP/AVIF、複数サイズ）を生成して MEDIA_ROOT/cards に保存"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=100,
+            help="処理するカード数（デフォルト: 100、0で全件）",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="生成済みのカードも作り直す",
+        )
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="生成済みでもファイルが欠けているカードを作り直す",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="並列にダウンロード・変換する数（デフォルト: 4）",
+        )
+
+    def handle(self, *args, **options):
+        if Image is None:
+            self.stdout.write(self.style.ERROR("Pillowがインストールされていません。pip install Pillow"))
+            return
+
+        formats = available_formats()
+        self.stdout.write(f"形式: {', '.join(formats)} / 幅: {', '.join(map(str, THUMBNAIL_WIDTHS))}px")
+
+        cards = ToppsCard.objects.exclude(image_url="").only("id", "image_url", "thumbnails", "thumbnail_source")
+        if not options["force"]:
+            if options["verify"]:
+                cards = [
+                    card for card in cards
+                    if card.thumbnail_source != card.image_url or not thumbnails_exist(card.thumbnails)
+                ]
+            else:
+                cards = cards.exclude(thumbnail_source=F("image_url"))
+        if options["limit"] > 0:
+            cards = cards[:options["limit"]]
+        cards = list(cards)
+
+        # 同じ画像を使うカードはまとめて1回だけ処理する
+        cards_by_url = {}
+        for card in cards:
+            cards_by_url.setdefault(card.image_url, []).append(card)
+
+        self.stdout.write(f"処理対象: {len(cards)}枚のカード（画像 {len(cards_by_url)}件）")
+        if not cards_by_url:
+            return
+
+        session = requests.Session()
+        session.headers["User-Agent"] = "Mozilla/5.0 (compatible; baseball-now thumbnail fetcher)"
+
+        def process(image_url):
+            try:
+                content = download_image(image_url, session=session)
+                return image_url, generate_thumbnails(image_url, content, formats=formats), None
+            except Exception as e:
+                return image_url, None, e
+
+        to_update = []
+        failed = 0
+        with ThreadPoolExecutor(max_workers=max(options["workers"], 1)) as executor:
+            for i, (image_url, thumbnails, error) in enumerate(executor.map(process, cards_by_url), 1):
+                if error is not None:
+                    failed += 1
+                    self.stdout.write(self.style.WARNING(f"[{i}/{len(cards_by_url)}] 失敗: {image_url} ({error})"))
+                    continue
+                for card in cards_by_url[image_url]:
+                    card.thumbnails = thumbnails
+                    card.thumbnail_source = image_url
+                    card.updated_at = timezone.now()
+                    to_update.append(card)
+
+        session.close()
+
+        if to_update:
+            ToppsCard.objects.bulk_update(
+                to_update, ["thumbnails", "thumbnail_source", "updated_at"], batch_size=500
+            )
+            # カード一覧のリードモデルにも反映
+            refresh_card_search(ToppsCard.objects.filter(pk__in=[card.pk for card in to_update]))
+
+        self.stdout.write(
+            self.style.SUCCESS(f"完了: {len(to_update)}枚のカードを更新, 失敗 {failed}件")
+        )
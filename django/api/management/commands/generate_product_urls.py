@@ -2,6 +2,7 @@ import re
 import unicodedata
 
 from django.core.management.base import BaseCommand
+from api.card_search import refresh_card_search
 from api.models import ToppsCard
 
 
@@ -64,6 +65,7 @@ class Command(BaseCommand):
         self.stdout.write(f'処理対象: {total}件のカード')
 
         updated = 0
+        changed_ids = []
         for card in cards:
             # 選手名-2025-mlb-topps-now®-card-カード番号 の形式でURL生成
             player_name = make_slug(card.player.full_name)
@@ -81,10 +83,15 @@ class Command(BaseCommand):
                 card.product_url = short_url
                 card.product_url_long = long_url
                 card.save(update_fields=['product_url', 'product_url_long'])
+                changed_ids.append(card.pk)
                 updated += 1
                 if updated % 100 == 0:
                     self.stdout.write(f'{updated}件更新済み...')
 
+        if changed_ids:
+            # カード一覧のリードモデルにも反映
+            refresh_card_search(ToppsCard.objects.filter(pk__in=changed_ids))
+
         if dry_run:
             self.stdout.write(self.style.WARNING(f'DRY RUNモード: {total}件のURLが生成されます'))
         else:
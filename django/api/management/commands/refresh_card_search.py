@@ -0,0 +1,29 @@
+"""
+カード一覧用リードモデル（ToppsCardSearch）を差分更新するコマンド
+内容（シリアライズ結果のハッシュ）が変わったカードのみ書き込む
+"""
+import time
+from django.core.management.base import BaseCommand
+from api.card_search import refresh_card_search
+
+
+class Command(BaseCommand):
+    help = "カード一覧用リードモデル（ToppsCardSearch）を差分更新"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="変更の有無に関わらず全カードを書き直す",
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        created, updated, deleted = refresh_card_search(full=options["full"])
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"リードモデル更新完了: 作成 {created}件, 更新 {updated}件, 削除 {deleted}件 ({elapsed:.1f}s)"
+            )
+        )
@@ -0,0 +1,28 @@
+"""
+成績の派生指標（ISO・BABIP・K/9・BB/9・K/BB とカードの直近成績）を計算し直すコマンド
+fetch_player_stats の最後にも対象シーズン分が自動で実行される
+"""
+import time
+from django.core.management.base import BaseCommand
+from api.derived_stats import refresh_derived_stats
+
+
+class Command(BaseCommand):
+    help = "成績の派生指標とカード発行日時点の直近成績をシーズンごとにまとめて計算し直す"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--season",
+            type=int,
+            action="append",
+            help="対象シーズン（複数指定可、省略時は成績のある全シーズン）",
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        updated = refresh_derived_stats(options["season"])
+        elapsed = time.perf_counter() - start
+
+        for season, (stats_count, cards_count) in updated.items():
+            self.stdout.write(f"  {season}: 成績 {stats_count}件, カード {cards_count}件")
+        self.stdout.write(self.style.SUCCESS(f"派生指標更新完了: {len(updated)}シーズン ({elapsed:.1f}s)"))
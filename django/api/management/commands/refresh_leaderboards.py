@@ -0,0 +1,28 @@
+"""
+成績ランキング（LeaderboardEntry）を作り直すコマンド
+fetch_player_stats の最後にも対象シーズン分が自動で実行される
+"""
+import time
+from django.core.management.base import BaseCommand
+from api.leaderboards import refresh_leaderboards
+
+
+class Command(BaseCommand):
+    help = "成績ランキング（シーズン・指標ごとの上位N人）を作り直す"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--season",
+            type=int,
+            action="append",
+            help="対象シーズン（複数指定可、省略時は成績のある全シーズン）",
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        saved = refresh_leaderboards(options["season"])
+        elapsed = time.perf_counter() - start
+
+        for season, count in saved.items():
+            self.stdout.write(f"  {season}: {count}件")
+        self.stdout.write(self.style.SUCCESS(f"ランキング更新完了: {len(saved)}シーズン ({elapsed:.1f}s)"))
@@ -2,6 +2,7 @@
 全カードのproduct_urlとproduct_url_longを再生成するコマンド
 """
 from django.core.management.base import BaseCommand
+from api.card_search import refresh_card_search
 from api.models import ToppsCard
 
 
@@ -34,6 +35,7 @@ class Command(BaseCommand):
         self.stdout.write(f'処理対象: {total}件のカード')
 
         updated = 0
+        changed_ids = []
         for card in cards:
             short_url, long_url = card.generate_product_urls()
 
@@ -47,11 +49,16 @@ class Command(BaseCommand):
                 card.product_url = short_url
                 card.product_url_long = long_url
                 card.save(update_fields=['product_url', 'product_url_long'])
+                changed_ids.append(card.pk)
 
             updated += 1
             if not dry_run and updated % 100 == 0:
                 self.stdout.write(f'{updated}件更新済み...')
 
+        if changed_ids:
+            # カード一覧のリードモデルにも反映
+            refresh_card_search(ToppsCard.objects.filter(pk__in=changed_ids))
+
         if dry_run:
             self.stdout.write(f'\n[DRY RUN] {total}件のカードが更新対象です')
         else:
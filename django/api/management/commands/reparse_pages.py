@@ -0,0 +1,164 @@
+"""
+保存済みのスクレイピング結果（SCRAPE_STORE_DIR）から再抽出するコマンド
+parse_card_element / extract_release_date を修正した後、Toppsに再アクセスせずに
+保存済みページを並列で再パースし、結果をDBに反映する
+
+使い方:
+  # 抽出結果の確認のみ
+  python manage.py reparse_pages --kind topps_product
+
+  # DBに反映
+  python manage.py reparse_pages --kind topps_archive --apply --since 2025-06-01
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from api.card_search import refresh_card_search
+from api.management.commands.scrape_release_dates import extract_release_date, lxml_html
+from api.management.commands.toppsNow_archive import Command as ArchiveCommand, parse_listing_html
+from api.models import ToppsCard
+from api.scraping import PageStore
+
+KINDS = ('topps_archive', 'topps_product')
+
+
+def _parse_entry(args):
+    """
+    1ページ分を再パースする（ワーカープロセスで実行）
+    戻り値: (entry, 抽出結果, エラー)（失敗したページで一括処理全体が止まらないよう例外は文字列で返す）
+    """
+    root, entry = args
+    try:
+        html = PageStore(root).read(entry)
+        if entry['kind'] == 'topps_archive':
+            _, cards = parse_listing_html(html, entry['url'])
+            return entry, cards, None
+        return entry, extract_release_date(html), None
+    except Exception as e:
+        return entry, None, f"{type(e).__name__}: {e}"
+
+
+class Command(BaseCommand):
+    help = "保存済みのページを再パースして抽出結果をDBに反映（再スクレイピング不要）"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--kind",
+            choices=KINDS,
+            required=True,
+            help="再パースするページの種別（topps_archive: 一覧ページ / topps_product: 商品ページ）",
+        )
+        parser.add_argument(
+            "--since",
+            type=date.fromisoformat,
+            default=None,
+            help="この日以降に取得したページのみ（YYYY-MM-DD）",
+        )
+        parser.add_argument(
+            "--until",
+            type=date.fromisoformat,
+            default=None,
+            help="この日までに取得したページのみ（YYYY-MM-DD）",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="並列に再パースするプロセス数（デフォルト: 4）",
+        )
+        parser.add_argument(
+            "--apply",
+            action="store_true",
+            help="抽出結果をDBに反映する（指定しない場合は結果の表示のみ）",
+        )
+
+    def handle(self, *args, **options):
+        if not lxml_html:
+            raise CommandError("lxmlがインストールされていません。pip install lxml")
+
+        kind = options["kind"]
+        store = PageStore()
+        entries = store.latest_entries(kind, since=options["since"], until=options["until"])
+        self.stdout.write(f"再パース対象: {len(entries)}ページ ({kind}, {store.root})")
+        if not entries:
+            return
+
+        start = time.perf_counter()
+        workers = max(options["workers"], 1)
+        tasks = [(store.root, entry) for entry in entries]
+        if workers == 1:
+            results = [_parse_entry(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(_parse_entry, tasks, chunksize=8))
+        self.stdout.write(f"パース完了: {time.perf_counter() - start:.2f}s")
+
+        failures = [(entry, error) for entry, _, error in results if error is not None]
+        for entry, error in failures:
+            self.stdout.write(self.style.WARNING(f"  パース失敗: {entry['url']} ({error})"))
+        if failures:
+            self.stdout.write(self.style.WARNING(f"パース失敗: {len(failures)}ページ（スキップ）"))
+        results = [(entry, result) for entry, result, error in results if error is None]
+
+        if kind == "topps_archive":
+            self.apply_archive(results, options["apply"])
+        else:
+            self.apply_release_dates(results, options["apply"])
+
+    def apply_archive(self, results, apply):
+        # 同じ商品は最新の取得結果を使う（セットの年はページを取得した日の年）
+        cards = {}
+        for entry, page_cards in sorted(results, key=lambda result: result[0]["fetched_at"]):
+            year = timezone.localtime(datetime.fromisoformat(entry["fetched_at"])).year
+            for card_data in page_cards:
+                cards[card_data.get("detail_url") or card_data.get("title")] = (year, card_data)
+        self.stdout.write(f"抽出したカード: {len(cards)}枚")
+
+        if not apply:
+            for year, card_data in list(cards.values())[:20]:
+                self.stdout.write(f"  {year} {card_data.get('card_number', '-')}: {card_data.get('title', '').splitlines()[0] if card_data.get('title') else ''}")
+            self.stdout.write(self.style.WARNING("--apply を指定するとDBに反映します"))
+            return
+
+        cards_by_year = {}
+        for year, card_data in cards.values():
+            cards_by_year.setdefault(year, []).append(card_data)
+
+        # toppsNow_archive と同じ取り込み処理を使う（カード一覧のリードモデルも ingest_cards で更新される）
+        ingest = ArchiveCommand(stdout=self.stdout, stderr=self.stderr)
+        for year, year_cards in sorted(cards_by_year.items()):
+            ingest.load_ingest_cache(year)
+            created, updated = ingest.ingest_cards(year_cards)
+            self.stdout.write(self.style.SUCCESS(f"反映完了 ({year}): 作成 {created}件, 更新 {updated}件"))
+
+    def apply_release_dates(self, results, apply):
+        release_dates = {}
+        not_found = 0
+        for entry, release_date in results:
+            card_id = entry["meta"].get("card_id")
+            if card_id is None:
+                continue
+            if release_date is None:
+                not_found += 1
+                continue
+            release_dates[card_id] = release_date
+
+        cards = list(ToppsCard.objects.filter(pk__in=release_dates).only("id", "card_number", "release_date"))
+        changed = [card for card in cards if card.release_date != release_dates[card.pk]]
+        for card in changed:
+            self.stdout.write(f"  #{card.card_number}: {card.release_date} → {release_dates[card.pk]}")
+            card.release_date = release_dates[card.pk]
+
+        self.stdout.write(f"発行日: 抽出 {len(release_dates)}件, 変更 {len(changed)}件, 見つからず {not_found}件")
+        if not apply:
+            self.stdout.write(self.style.WARNING("--apply を指定するとDBに反映します"))
+            return
+        now = timezone.now()
+        for card in changed:
+            card.updated_at = now
+        ToppsCard.objects.bulk_update(changed, ["release_date", "updated_at"], batch_size=500)
+        # カード一覧のリードモデルにも反映
+        refresh_card_search(ToppsCard.objects.filter(pk__in=[card.pk for card in changed]))
+        self.stdout.write(self.style.SUCCESS(f"反映完了: {len(changed)}件"))
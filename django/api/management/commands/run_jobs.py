@@ -0,0 +1,90 @@
+"""
+バックグラウンドジョブ（BackgroundJob）を実行するワーカー
+APIから登録されたジョブを順番に取り出して実行する（複数起動しても同じジョブは1回だけ実行される）
+
+使い方:
+  # 常駐して実行（docker-compose の worker サービス）
+  python manage.py run_jobs
+
+  # 溜まっているジョブを実行して終了
+  python manage.py run_jobs --once
+"""
+import os
+import socket
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from api import jobs
+
+
+class Command(BaseCommand):
+    help = "バックグラウンドジョブを実行するワーカー"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="実行可能なジョブがなくなったら終了する",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=1.0,
+            help="ジョブがないときの待機時間（秒、デフォルト: 1.0）",
+        )
+        parser.add_argument(
+            "--max-jobs",
+            type=int,
+            default=0,
+            help="指定件数を実行したら終了する（0で無制限）",
+        )
+        parser.add_argument(
+            "--stale-timeout",
+            type=int,
+            default=int(jobs.STALE_TIMEOUT.total_seconds()),
+            help="この秒数を超えて実行中のままのジョブを再登録する（タスクで指定がない場合、デフォルト: 3600）",
+        )
+
+    def handle(self, *args, **options):
+        worker = f"{socket.gethostname()}:{os.getpid()}"
+        stale_timeout = timedelta(seconds=options["stale_timeout"])
+        self.stdout.write(self.style.SUCCESS(f"ワーカー起動: {worker} (タスク: {', '.join(sorted(jobs.TASKS))})"))
+
+        processed = 0
+        last_maintenance = 0.0
+        try:
+            while True:
+                close_old_connections()
+
+                # 落ちたワーカーのジョブの回収と古いジョブの削除（1分ごと）
+                if time.monotonic() - last_maintenance > 60:
+                    requeued, failed = jobs.requeue_stale(stale_timeout)
+                    if requeued or failed:
+                        self.stdout.write(self.style.WARNING(f"応答のないジョブ: 再登録 {requeued}件, 失敗 {failed}件"))
+                    jobs.purge_finished()
+                    last_maintenance = time.monotonic()
+
+                job = jobs.claim_next(worker)
+                if job is None:
+                    if options["once"]:
+                        break
+                    time.sleep(options["sleep"])
+                    continue
+
+                start = time.perf_counter()
+                job = jobs.run_job(job)
+                elapsed = time.perf_counter() - start
+                message = f"{job.task} {job.pk}: {job.get_status_display()} ({elapsed:.2f}s)"
+                if job.error:
+                    self.stdout.write(self.style.ERROR(f"{message} {job.error}"))
+                else:
+                    self.stdout.write(message)
+
+                processed += 1
+                if options["max_jobs"] and processed >= options["max_jobs"]:
+                    break
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING("ワーカーを停止します"))
+
+        self.stdout.write(self.style.SUCCESS(f"完了: {processed}件のジョブを実行"))
@@ -6,9 +6,11 @@ from django.core.management.base import BaseCommand
 from django.core.management import call_command
 from apscheduler.schedulers.blocking import BlockingScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from django_apscheduler.jobstores import DjangoJobStore
 from django_apscheduler.models import DjangoJobExecution
 from django_apscheduler import util
+from api import blog_views
 
 logger = logging.getLogger(__name__)
 
@@ -22,16 +24,20 @@ def run_daily_sync():
     4. MLB Game ID紐付け
     5. 選手情報同期（MLB Player ID、成績、国籍）
     6. WBCデータ同期
+    7. カード画像のサムネイル生成
+    8. カード一覧用リードモデルの更新
+    9. 公開APIの静的スナップショット出力（nginx配信用）
     """
     start_time = datetime.now()
     logger.info(f"=== Daily sync started at {start_time} ===")
 
     steps = [
         # Step 1: Topps NOWカード情報のスクレイピング
+        # 一覧を新しい順に辿り、全商品が保存済みのページに達したら終了する
         {
             'name': 'Topps NOW scraping',
             'command': 'toppsNow_archive',
-            'kwargs': {'max_cards': 50, 'delay': 3.0, 'headless': True},
+            'kwargs': {'max_cards': 0, 'pages': 20, 'workers': 2, 'delay': 3.0, 'headless': True},
         },
         # Step 2: 商品URL生成
         {
@@ -87,6 +93,24 @@ def run_daily_sync():
             'command': 'fetch_wbc_players',
             'kwargs': {},
         },
+        # Step 11: カード画像のサムネイル生成
+        {
+            'name': 'Generate card thumbnails',
+            'command': 'generate_card_thumbnails',
+            'kwargs': {'limit': 0},
+        },
+        # Step 12: カード一覧用リードモデルを差分更新
+        {
+            'name': 'Refresh card search',
+            'command': 'refresh_card_search',
+            'kwargs': {},
+        },
+        # Step 13: 公開APIの静的スナップショットを出力（最後に実行）
+        {
+            'name': 'Export static snapshots',
+            'command': 'export_static_snapshots',
+            'kwargs': {},
+        },
     ]
 
     results = []
@@ -130,6 +154,14 @@ def delete_old_job_executions(max_age=604_800):
     DjangoJobExecution.objects.delete_old_job_executions(max_age)
 
 
+@util.close_old_connections
+def flush_blog_views():
+    """
+    ブログの閲覧数の増分をDBに反映（その後の閲覧がない記事の増分も反映されるように定期的に実行）
+    """
+    blog_views.flush_views()
+
+
 class Command(BaseCommand):
     help = "Run APScheduler for scheduled tasks"
 
@@ -172,7 +204,22 @@ class Command(BaseCommand):
             self.style.NOTICE(
                 "  Steps: toppsNow_archive → generate_product_urls → fix_broken_urls → "
                 "scrape_release_dates → fetch_game_ids → sync_mlb_players → "
-                "fetch_player_stats → fetch_player_nationality → fetch_wbc_data → fetch_wbc_players"
+                "fetch_player_stats → fetch_player_nationality → fetch_wbc_data → fetch_wbc_players → "
+                "generate_card_thumbnails → refresh_card_search → export_static_snapshots"
+            )
+        )
+
+        # ブログの閲覧数の反映ジョブ
+        scheduler.add_job(
+            flush_blog_views,
+            trigger=IntervalTrigger(seconds=blog_views.FLUSH_INTERVAL),
+            id="flush_blog_views",
+            max_instances=1,
+            replace_existing=True,
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Added job: flush_blog_views - runs every {blog_views.FLUSH_INTERVAL} seconds"
             )
         )
 
@@ -3,6 +3,7 @@ Topps商品ページから画像URLをスクレイピングして保存するコ
 """
 import time
 from django.core.management.base import BaseCommand
+from api.card_search import refresh_card_search
 from api.models import ToppsCard
 
 try:
@@ -81,6 +82,7 @@ class Command(BaseCommand):
         driver = None
         updated = 0
         failed = 0
+        changed_ids = []
 
         try:
             self.stdout.write('ブラウザを起動中...')
@@ -144,6 +146,7 @@ class Command(BaseCommand):
                         else:
                             card.image_url = image_url
                             card.save(update_fields=['image_url'])
+                            changed_ids.append(card.pk)
                             self.stdout.write(self.style.SUCCESS('  ✓ 保存完了'))
                         updated += 1
                     else:
@@ -167,4 +170,8 @@ class Command(BaseCommand):
                 driver.quit()
                 self.stdout.write('\nブラウザを終了しました')
 
+        if changed_ids:
+            # カード一覧のリードモデルにも反映
+            refresh_card_search(ToppsCard.objects.filter(pk__in=changed_ids))
+
         self.stdout.write(f'\n処理完了: 成功 {updated}件, 失敗 {failed}件')
@@ -1,21 +1,133 @@
 """
 Topps商品ページから発行日（release date）をスクレイピングして保存するコマンド
 """
+import json
 import re
 import time
 from datetime import datetime
 from django.core.management.base import BaseCommand
+from api.card_search import refresh_card_search
 from api.models import ToppsCard
+from api.scraping import PageStore, element_text
 
 try:
     from selenium import webdriver
     from selenium.webdriver.chrome.options import Options
-    from selenium.webdriver.common.by import By
-    from selenium.webdriver.support.ui import WebDriverWait
-    from selenium.webdriver.support import expected_conditions as EC
 except ImportError:
     webdriver = None
 
+try:
+    from lxml import html as lxml_html
+except ImportError:
+    lxml_html = None
+
+# 主要な日付パターン（Toppsページで確認された形式）
+DATE_PATTERNS = [
+    # "Product is available from Mar 28, 2025" - 実際にToppsサイトで確認された形式
+    r"(?:Product\s+is\s+)?(?:available|Available)\s+(?:from\s+)?(\w{3,9}\s+\d{1,2},?\s+\d{4})",
+    # "Available: January 22, 2025" or "Release Date: Jan 22, 2025"
+    r"(?:Available|Release(?:d)?(?:\s+Date)?)\s*[:\-]?\s*(\w+\s+\d{1,2},?\s+\d{4})",
+    # "Ships from Mar 28, 2025"
+    r"Ships?\s+(?:from\s+)?(\w{3,9}\s+\d{1,2},?\s+\d{4})",
+    # "01/22/2025" or "1/22/2025"
+    r"(?:Available|Release(?:d)?(?:\s+Date)?)\s*[:\-]?\s*(\d{1,2}/\d{1,2}/\d{4})",
+    # "2025-01-22"
+    r"(?:Available|Release(?:d)?(?:\s+Date)?)\s*[:\-]?\s*(\d{4}-\d{2}-\d{2})",
+]
+
+
+def _has_class(name):
+    return f'contains(concat(" ", normalize-space(@class), " "), " {name} ")'
+
+
+DATE_SELECTORS = [
+    # メタデータ
+    '//meta[@property="product:release_date"]',
+    '//meta[@name="release_date"]',
+    # 構造化データ内の日付
+    '//*[@itemprop="releaseDate"]',
+    '//*[@itemprop="datePublished"]',
+    # 一般的なクラス名
+    f'//*[{_has_class("product-release-date")}]',
+    f'//*[{_has_class("release-date")}]',
+    f'//*[{_has_class("product__release-date")}]',
+    f'//*[{_has_class("availability-date")}]',
+]
+
+JSON_LD_DATE_FIELDS = ["releaseDate", "datePublished", "availabilityStarts", "validFrom"]
+
+
+def parse_date(date_text):
+    """様々な形式の日付文字列をパース（文字列以外は None）"""
+    # JSON-LD の値は dict や数値のこともある
+    if not date_text or not isinstance(date_text, str):
+        return None
+
+    date_text = date_text.strip()
+
+    formats = [
+        "%Y-%m-%d",
+        "%Y/%m/%d",
+        "%m/%d/%Y",
+        "%d/%m/%Y",
+        "%B %d, %Y",
+        "%B %d %Y",
+        "%b %d, %Y",
+        "%b %d %Y",
+        "%d %B %Y",
+        "%d %b %Y",
+    ]
+
+    for fmt in formats:
+        try:
+            return datetime.strptime(date_text, fmt).date()
+        except ValueError:
+            continue
+
+    return None
+
+
+def extract_release_date(page_source):
+    """商品ページのHTMLから発行日を抽出する"""
+    document = lxml_html.fromstring(page_source)
+
+    body = document.find('body')
+    page_text = element_text(body if body is not None else document)
+    for pattern in DATE_PATTERNS:
+        match = re.search(pattern, page_text, re.IGNORECASE)
+        if match:
+            parsed = parse_date(match.group(1))
+            if parsed:
+                return parsed
+
+    # セレクタベースの検索（最初にマッチした要素のみ）
+    for selector in DATE_SELECTORS:
+        found = document.xpath(selector)
+        if not found:
+            continue
+        elem = found[0]
+        # メタタグの場合はcontent属性を取得
+        date_text = elem.get("content") if elem.tag == "meta" else element_text(elem)
+        parsed = parse_date(date_text)
+        if parsed:
+            return parsed
+
+    # JSON-LDスクリプトから抽出を試行
+    for script in document.xpath('//script[@type="application/ld+json"]'):
+        try:
+            data = json.loads(script.text or '')
+        except json.JSONDecodeError:
+            continue
+        items = data if isinstance(data, list) else [data]
+        for field in JSON_LD_DATE_FIELDS:
+            for item in items:
+                if isinstance(item, dict) and field in item:
+                    parsed = parse_date(item[field])
+                    if parsed:
+                        return parsed
+
+    return None
+
 
 class Command(BaseCommand):
     help = "Topps商品ページから発行日を取得して保存"
@@ -45,9 +157,9 @@ class Command(BaseCommand):
         )
 
     def handle(self, *args, **options):
-        if not webdriver:
+        if not webdriver or not lxml_html:
             self.stdout.write(
-                self.style.ERROR("Seleniumがインストールされていません。pip install selenium")
+                self.style.ERROR("Selenium / lxml がインストールされていません。pip install selenium lxml")
             )
             return
 
@@ -87,8 +199,10 @@ class Command(BaseCommand):
         )
         chrome_options.binary_location = "/usr/bin/chromium"
 
+        page_store = PageStore()
         updated = 0
         failed = 0
+        changed_ids = []
 
         for i, card in enumerate(cards, 1):
             self.stdout.write(f"\n[{i}/{total}] カード #{card.card_number}")
@@ -114,7 +228,13 @@ class Command(BaseCommand):
                 driver.get(url)
                 time.sleep(delay)  # Cloudflareチャレンジ待ち
 
-                release_date = self.extract_release_date(driver)
+                # ページのHTMLを1回だけ取得し、保存してから発行日を抽出する
+                page_source = driver.page_source
+                try:
+                    page_store.put('topps_product', driver.current_url, page_source, meta={'card_id': card.pk})
+                except OSError as e:
+                    self.stdout.write(self.style.WARNING(f"  ページの保存に失敗しました: {e}"))
+                release_date = extract_release_date(page_source)
 
                 if release_date:
                     self.stdout.write(self.style.SUCCESS(f"  発行日: {release_date}"))
@@ -124,6 +244,7 @@ class Command(BaseCommand):
                     else:
                         card.release_date = release_date
                         card.save(update_fields=["release_date"])
+                        changed_ids.append(card.pk)
                         self.stdout.write(self.style.SUCCESS("  保存完了"))
                     updated += 1
                 else:
@@ -144,123 +265,8 @@ class Command(BaseCommand):
             if i < total:
                 time.sleep(2)
 
-        self.stdout.write(f"\n処理完了: 成功 {updated}件, 失敗 {failed}件")
-
-    def extract_release_date(self, driver):
-        """ページから発行日を抽出する"""
-
-        try:
-            page_text = driver.find_element(By.TAG_NAME, "body").text
-
-            # 主要な日付パターン（Toppsページで確認された形式）
-            date_patterns = [
-                # "Product is available from Mar 28, 2025" - 実際にToppsサイトで確認された形式
-                r"(?:Product\s+is\s+)?(?:available|Available)\s+(?:from\s+)?(\w{3,9}\s+\d{1,2},?\s+\d{4})",
-                # "Available: January 22, 2025" or "Release Date: Jan 22, 2025"
-                r"(?:Available|Release(?:d)?(?:\s+Date)?)\s*[:\-]?\s*(\w+\s+\d{1,2},?\s+\d{4})",
-                # "Ships from Mar 28, 2025"
-                r"Ships?\s+(?:from\s+)?(\w{3,9}\s+\d{1,2},?\s+\d{4})",
-                # "01/22/2025" or "1/22/2025"
-                r"(?:Available|Release(?:d)?(?:\s+Date)?)\s*[:\-]?\s*(\d{1,2}/\d{1,2}/\d{4})",
-                # "2025-01-22"
-                r"(?:Available|Release(?:d)?(?:\s+Date)?)\s*[:\-]?\s*(\d{4}-\d{2}-\d{2})",
-            ]
-            
-            for pattern in date_patterns:
-                match = re.search(pattern, page_text, re.IGNORECASE)
-                if match:
-                    parsed = self.parse_date(match.group(1))
-                    if parsed:
-                        return parsed
-        except Exception as e:
-            self.stdout.write(f"  テキスト抽出エラー: {e}")
-
-        # 様々なセレクタを試行
-        date_selectors = [
-            # メタデータ
-            'meta[property="product:release_date"]',
-            'meta[name="release_date"]',
-            # 構造化データ内の日付
-            '[itemprop="releaseDate"]',
-            '[itemprop="datePublished"]',
-            # 一般的なクラス名
-            ".product-release-date",
-            ".release-date",
-            ".product__release-date",
-            ".availability-date",
-        ]
-
-        # セレクタベースの検索
-        for selector in date_selectors:
-            try:
-                elem = driver.find_element(By.CSS_SELECTOR, selector)
-                
-                # メタタグの場合はcontent属性を取得
-                if elem.tag_name == "meta":
-                    date_text = elem.get_attribute("content")
-                else:
-                    date_text = elem.text.strip()
-                
-                if date_text:
-                    parsed = self.parse_date(date_text)
-                    if parsed:
-                        return parsed
-            except:
-                continue
-
-        # JSON-LDスクリプトから抽出を試行
-        try:
-            import json
-            scripts = driver.find_elements(By.CSS_SELECTOR, 'script[type="application/ld+json"]')
-            for script in scripts:
-                content = script.get_attribute("innerHTML")
-                if content:
-                    try:
-                        data = json.loads(content)
-                        # 日付フィールドを探す
-                        date_fields = ["releaseDate", "datePublished", "availabilityStarts", "validFrom"]
-                        for field in date_fields:
-                            if isinstance(data, dict) and field in data:
-                                parsed = self.parse_date(data[field])
-                                if parsed:
-                                    return parsed
-                            elif isinstance(data, list):
-                                for item in data:
-                                    if isinstance(item, dict) and field in item:
-                                        parsed = self.parse_date(item[field])
-                                        if parsed:
-                                            return parsed
-                    except json.JSONDecodeError:
-                        continue
-        except:
-            pass
-
-        return None
+        if changed_ids:
+            # カード一覧のリードモデルにも反映
+            refresh_card_search(ToppsCard.objects.filter(pk__in=changed_ids))
 
-    def parse_date(self, date_text):
-        """様々な形式の日付文字列をパース"""
-        if not date_text:
-            return None
-            
-        date_text = date_text.strip()
-        
-        formats = [
-            "%Y-%m-%d",
-            "%Y/%m/%d",
-            "%m/%d/%Y",
-            "%d/%m/%Y",
-            "%B %d, %Y",
-            "%B %d %Y",
-            "%b %d, %Y",
-            "%b %d %Y",
-            "%d %B %Y",
-            "%d %b %Y",
-        ]
-
-        for fmt in formats:
-            try:
-                return datetime.strptime(date_text, fmt).date()
-            except ValueError:
-                continue
-
-        return None
+        self.stdout.write(f"\n処理完了: 成功 {updated}件, 失敗 {failed}件")
@@ -10,6 +10,9 @@ Topps NOW スクレイピングを即時実行するコマンド
 
   # 特定のページから
   docker compose exec django python manage.py scrape_topps_now --url "https://www.topps.com/collections/mlb-topps-now-archive?p=2"
+
+  # 保存済みのページに達するまで一覧を辿る（2ブラウザで並列取得）
+  docker compose exec django python manage.py scrape_topps_now --max-cards 0 --pages 0 --workers 2
 """
 from django.core.management.base import BaseCommand
 from django.core.management import call_command
@@ -37,11 +40,24 @@ class Command(BaseCommand):
             default=None,
             help='Custom URL to scrape from'
         )
+        parser.add_argument(
+            '--pages',
+            type=int,
+            default=1,
+            help='Maximum number of listing pages to crawl (default: 1, 0 for all pages)'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of browsers fetching pages concurrently (default: 1)'
+        )
 
     def handle(self, *args, **options):
         self.stdout.write(self.style.NOTICE('Starting Topps NOW scraping...'))
         self.stdout.write(f'  Max cards: {options["max_cards"]}')
         self.stdout.write(f'  Delay: {options["delay"]}s')
+        self.stdout.write(f'  Pages: {options["pages"] or "all"} (workers: {options["workers"]})')
         if options['url']:
             self.stdout.write(f'  URL: {options["url"]}')
 
@@ -50,6 +66,8 @@ class Command(BaseCommand):
             kwargs = {
                 'max_cards': options['max_cards'],
                 'delay': options['delay'],
+                'pages': options['pages'],
+                'workers': options['workers'],
                 'headless': True,
             }
             if options['url']:
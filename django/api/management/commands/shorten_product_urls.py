@@ -4,6 +4,7 @@
 import re
 import urllib.parse
 from django.core.management.base import BaseCommand
+from api.card_search import refresh_card_search
 from api.models import ToppsCard
 
 
@@ -77,6 +78,7 @@ class Command(BaseCommand):
             return
 
         updated = 0
+        changed_ids = []
         for i, card in enumerate(long_url_cards, 1):
             self.stdout.write(f'\n[{i}/{total}] カード #{card.card_number}')
             self.stdout.write(f'  現在: {card.product_url}')
@@ -89,9 +91,14 @@ class Command(BaseCommand):
             else:
                 card.product_url = short_url
                 card.save(update_fields=['product_url'])
+                changed_ids.append(card.pk)
                 self.stdout.write(self.style.SUCCESS('  ✓ 更新完了'))
             updated += 1
 
+        if changed_ids:
+            # カード一覧のリードモデルにも反映
+            refresh_card_search(ToppsCard.objects.filter(pk__in=changed_ids))
+
         if dry_run:
             self.stdout.write(f'\n[DRY RUN] {updated}件のカードが更新対象です')
         else:
@@ -1,14 +1,14 @@
 """
-既存のPlayer名からMLB Stats APIで検索し、mlb_player_idを取得・保存するコマンド
+既存のPlayer名からMLB Stats APIの選手一覧と照合し、mlb_player_idを取得・保存するコマンド
+シーズンの全選手（sports/1/players）をまとめて取得し、正規化した名前の索引でローカルに照合する
 """
-import time
+from datetime import datetime
 from django.core.management.base import BaseCommand
+from django.utils import timezone
+from api.mlb_people import PlayerNameIndex, fetch_season_people, statsapi
 from api.models import Player
 
-try:
-    import statsapi
-except ImportError:
-    statsapi = None
+BATCH_SIZE = 500
 
 
 class Command(BaseCommand):
@@ -32,10 +32,16 @@ class Command(BaseCommand):
             help="既にmlb_player_idが設定されているプレイヤーも上書きする",
         )
         parser.add_argument(
-            "--delay",
-            type=float,
-            default=0.5,
-            help="APIリクエスト間の待機時間（秒、デフォルト: 0.5）",
+            "--season",
+            type=int,
+            default=datetime.now().year,
+            help="選手一覧を取得するシーズン（デフォルト: 今年）",
+        )
+        parser.add_argument(
+            "--lookback",
+            type=int,
+            default=2,
+            help="照合に含める過去シーズン数（デフォルト: 2、引退・マイナー降格選手用）",
         )
 
     def handle(self, *args, **options):
@@ -48,10 +54,11 @@ class Command(BaseCommand):
         dry_run = options["dry_run"]
         limit = options["limit"]
         force = options["force"]
-        delay = options["delay"]
+        season = options["season"]
+        lookback = max(options["lookback"], 0)
 
         # 対象プレイヤーを取得
-        players = Player.objects.filter(is_active=True)
+        players = Player.objects.filter(is_active=True).select_related('team')
 
         if not force:
             players = players.filter(mlb_player_id__isnull=True)
@@ -59,101 +66,86 @@ class Command(BaseCommand):
         if limit > 0:
             players = players[:limit]
 
-        total = players.count()
+        players = list(players)
+        total = len(players)
         self.stdout.write(f"処理対象: {total}名のプレイヤー")
 
         if total == 0:
             self.stdout.write("処理対象のプレイヤーがいません")
             return
 
+        # シーズンの全選手を取得して索引を作る
+        seasons = range(season - lookback, season + 1)
+        try:
+            people = fetch_season_people(seasons)
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f"選手一覧の取得に失敗しました: {e}"))
+            return
+        index = PlayerNameIndex(people.values())
+        self.stdout.write(f"MLB選手一覧: {len(people)}名 ({seasons[0]}〜{seasons[-1]}シーズン)")
+
+        # 割り当て済みのID（他の選手との重複チェック用）
+        assigned = {
+            mlb_id: (pk, full_name)
+            for mlb_id, pk, full_name in Player.objects.filter(mlb_player_id__isnull=False)
+            .values_list('mlb_player_id', 'pk', 'full_name')
+        }
+
         matched = 0
         not_found = 0
         multiple_found = 0
+        duplicated = 0
+        to_update = []
 
         for i, player in enumerate(players, 1):
-            self.stdout.write(f"\n[{i}/{total}] {player.full_name}")
-
-            try:
-                # MLB Stats APIで選手を検索
-                results = statsapi.lookup_player(player.full_name)
-
-                if not results:
-                    # 名前の表記揺れ対策: ラストネームだけで検索
-                    results = statsapi.lookup_player(player.last_name)
-                    if results:
-                        # フルネームに近いものをフィルタ
-                        results = [
-                            r for r in results
-                            if player.first_name.lower() in r.get("fullName", "").lower()
-                        ]
-
-                if not results:
-                    self.stdout.write(self.style.WARNING(f"  見つかりません"))
-                    not_found += 1
-                    continue
-
-                if len(results) == 1:
-                    mlb_player = results[0]
-                else:
-                    # 複数見つかった場合、アクティブな選手を優先
-                    active_players = [r for r in results if r.get("active", False)]
-                    if len(active_players) == 1:
-                        mlb_player = active_players[0]
-                    elif len(active_players) > 1:
-                        # チーム名でもフィルタを試行
-                        if player.team:
-                            team_matches = [
-                                r for r in active_players
-                                if player.team.full_name.lower() in r.get("currentTeam", {}).get("name", "").lower()
-                            ]
-                            if len(team_matches) == 1:
-                                mlb_player = team_matches[0]
-                            else:
-                                self.stdout.write(
-                                    self.style.WARNING(f"  複数の選手が見つかりました: {len(results)}件")
-                                )
-                                for r in results[:5]:
-                                    self.stdout.write(f"    - {r.get('fullName')} (ID: {r.get('id')}, Team: {r.get('currentTeam', {}).get('name', 'N/A')})")
-                                multiple_found += 1
-                                continue
-                        else:
-                            mlb_player = active_players[0]
-                    else:
-                        # アクティブな選手がいない場合は最初の結果を使用
-                        mlb_player = results[0]
-
-                mlb_id = mlb_player.get("id")
-                mlb_name = mlb_player.get("fullName")
-                mlb_team = mlb_player.get("currentTeam", {}).get("name", "N/A")
+            mlb_team_id = player.team.mlb_team_id if player.team else None
+            mlb_player, results = index.resolve(
+                player.full_name, player.first_name, player.last_name, mlb_team_id=mlb_team_id
+            )
 
+            if not results:
+                self.stdout.write(self.style.WARNING(f"[{i}/{total}] {player.full_name}: 見つかりません"))
+                not_found += 1
+                continue
+
+            if mlb_player is None:
+                self.stdout.write(
+                    self.style.WARNING(f"[{i}/{total}] {player.full_name}: 複数の選手が見つかりました: {len(results)}件")
+                )
+                for r in results[:5]:
+                    self.stdout.write(f"    - {r.get('fullName')} (ID: {r.get('id')}, Team ID: {r.get('currentTeam', {}).get('id', 'N/A')})")
+                multiple_found += 1
+                continue
+
+            mlb_id = mlb_player["id"]
+            owner = assigned.get(mlb_id)
+            if owner is not None and owner[0] != player.pk:
                 self.stdout.write(
-                    self.style.SUCCESS(f"  マッチ: {mlb_name} (ID: {mlb_id}, Team: {mlb_team})")
+                    self.style.WARNING(f"[{i}/{total}] {player.full_name}: ID {mlb_id} は既に {owner[1]} に割り当て済み")
                 )
+                duplicated += 1
+                continue
+            assigned[mlb_id] = (player.pk, player.full_name)
 
-                if dry_run:
-                    self.stdout.write(self.style.WARNING("  [DRY RUN] 更新スキップ"))
-                else:
-                    # 既に同じIDが他の選手に使われていないか確認
-                    existing = Player.objects.filter(mlb_player_id=mlb_id).exclude(pk=player.pk).first()
-                    if existing:
-                        self.stdout.write(
-                            self.style.WARNING(f"  ID {mlb_id} は既に {existing.full_name} に割り当て済み")
-                        )
-                        continue
-
-                    player.mlb_player_id = mlb_id
-                    player.save(update_fields=["mlb_player_id"])
-                    self.stdout.write(self.style.SUCCESS("  保存完了"))
-
-                matched += 1
-
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f"  エラー: {e}"))
-                import traceback
-                self.stdout.write(traceback.format_exc())
-
-            # APIレート制限対策
-            if i < total:
-                time.sleep(delay)
-
-        self.stdout.write(f"\n処理完了: マッチ {matched}件, 見つからず {not_found}件, 複数候補 {multiple_found}件")
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"[{i}/{total}] {player.full_name}: マッチ {mlb_player.get('fullName')} "
+                    f"(ID: {mlb_id}, Team ID: {mlb_player.get('currentTeam', {}).get('id', 'N/A')})"
+                )
+            )
+            matched += 1
+            if player.mlb_player_id != mlb_id:
+                player.mlb_player_id = mlb_id
+                player.updated_at = timezone.now()
+                to_update.append(player)
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING(f"\n[DRY RUN] {len(to_update)}件の更新をスキップ"))
+        elif to_update:
+            Player.objects.bulk_update(to_update, ["mlb_player_id", "updated_at"], batch_size=BATCH_SIZE)
+            self.stdout.write(self.style.SUCCESS(f"\n{len(to_update)}件保存しました"))
+
+        self.stdout.write(
+            f"\n処理完了: マッチ {matched}件, 見つからず {not_found}件, "
+            f"複数候補 {multiple_found}件, ID重複 {duplicated}件"
+        )
@@ -0,0 +1,101 @@
+"""
+一覧APIの高速パス（values_list + orjson、カード一覧のリードモデル）が
+通常のシリアライザーと同一のレスポンス（バイト単位）を返すか検証し、処理時間を比較する
+リードモデルの検証は refresh_card_search 実行後に行うこと
+"""
+import time
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIRequestFactory
+from api.views import PlayerViewSet, ToppsCardViewSet
+
+
+class _ToppsCardViewSet(ToppsCardViewSet):
+    # 検証中にレート制限されないようにする
+    def get_throttles(self):
+        return []
+
+
+class _PlayerViewSet(PlayerViewSet):
+    throttle_classes = []
+
+
+CARD_VALUES = {'values_list_enabled': True, 'search_model_enabled': False}
+CARD_SEARCH = {'values_list_enabled': False, 'search_model_enabled': True}
+PLAYER_VALUES = {'values_list_enabled': True}
+
+CASES = [
+    (_ToppsCardViewSet, '/api/topps-cards/', CARD_VALUES),
+    (_ToppsCardViewSet, '/api/topps-cards/?limit=20', CARD_VALUES),
+    (_ToppsCardViewSet, '/api/topps-cards/?fields=id,title,image_url,player&expand=player', CARD_VALUES),
+    (_ToppsCardViewSet, '/api/topps-cards/?expand=', CARD_VALUES),
+    (_ToppsCardViewSet, '/api/topps-cards/', CARD_SEARCH),
+    (_ToppsCardViewSet, '/api/topps-cards/?limit=20', CARD_SEARCH),
+    (_ToppsCardViewSet, '/api/topps-cards/?year=2025&player=ohtani', CARD_SEARCH),
+    (_PlayerViewSet, '/api/players/', PLAYER_VALUES),
+    (_PlayerViewSet, '/api/players/?page=2', PLAYER_VALUES),
+    (_PlayerViewSet, '/api/players/?has_stats=true', PLAYER_VALUES),
+    (_PlayerViewSet, '/api/players/?fields=id,full_name,team,stats&expand=stats', PLAYER_VALUES),
+    (_PlayerViewSet, '/api/players/?season=all', PLAYER_VALUES),
+    (_PlayerViewSet, '/api/players/?season=2024&stat_type=hitting', PLAYER_VALUES),
+    (_PlayerViewSet, '/api/players/?stat_type=pitching&page_size=3', PLAYER_VALUES),
+]
+
+
+class Command(BaseCommand):
+    help = "一覧APIの高速パスと通常シリアライザーの出力一致を検証"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=3,
+            help="計測の繰り返し回数（デフォルト: 3）",
+        )
+
+    def handle(self, *args, **options):
+        repeat = options["repeat"]
+        factory = APIRequestFactory()
+        failures = 0
+
+        for viewset, url, fast_kwargs in CASES:
+            results = {}
+            for enabled in (False, True):
+                # 比較元は高速パスを全て無効にした通常のシリアライザー
+                initkwargs = fast_kwargs if enabled else {key: False for key in fast_kwargs}
+                # 圧縮・キャッシュ済みのレスポンスが返らないよう条件付きGETは無効にする
+                view = viewset.as_view({'get': 'list'}, conditional_list_enabled=False, **initkwargs)
+                best = None
+                for _ in range(repeat):
+                    request = factory.get(url, HTTP_ACCEPT='application/json')
+                    start = time.perf_counter()
+                    response = view(request)
+                    if hasattr(response, 'render'):
+                        response.render()
+                    elapsed = time.perf_counter() - start
+                    best = elapsed if best is None else min(best, elapsed)
+                results[enabled] = (response.status_code, response.content, best)
+
+            slow_status, slow_content, slow_time = results[False]
+            fast_status, fast_content, fast_time = results[True]
+            speedup = slow_time / fast_time if fast_time else 0
+
+            if slow_status == fast_status and slow_content == fast_content:
+                mode = '+'.join(key for key, value in fast_kwargs.items() if value)
+                self.stdout.write(self.style.SUCCESS(
+                    f"✓ {url} [{mode}] ({len(fast_content)} bytes) "
+                    f"{slow_time * 1000:.1f}ms → {fast_time * 1000:.1f}ms (x{speedup:.1f})"
+                ))
+            else:
+                failures += 1
+                self.stdout.write(self.style.ERROR(f"✗ {url} レスポンスが一致しません"))
+                self.stdout.write(f"  status: {slow_status} / {fast_status}")
+                for i, (a, b) in enumerate(zip(slow_content, fast_content)):
+                    if a != b:
+                        self.stdout.write(f"  offset {i}:")
+                        self.stdout.write(f"    serializer: {slow_content[max(i - 80, 0):i + 80]!r}")
+                        self.stdout.write(f"    fast path : {fast_content[max(i - 80, 0):i + 80]!r}")
+                        break
+
+        if failures:
+            raise CommandError(f"{failures}件のレスポンスが一致しませんでした")
+        self.stdout.write(self.style.SUCCESS("全てのレスポンスが一致しました"))
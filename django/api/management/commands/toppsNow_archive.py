@@ -1,20 +1,205 @@
 import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
 from django.core.management.base import BaseCommand
 from django.db import transaction
+from django.utils import timezone
+from api.card_search import refresh_card_search
 from api.models import Team, Player, ToppsSet, ToppsCard
+from api.scraping import PageStore, element_text
 
 try:
     from selenium import webdriver
-    from selenium.webdriver.common.by import By
-    from selenium.webdriver.support.ui import WebDriverWait
-    from selenium.webdriver.support import expected_conditions as EC
     from selenium.webdriver.chrome.options import Options
-    from selenium.common.exceptions import TimeoutException, NoSuchElementException
 except ImportError:
     webdriver = None
 
+try:
+    from lxml import html as lxml_html
+except ImportError:
+    lxml_html = None
+
+
+ARCHIVE_URL = (
+    'https://www.topps.com/collections/topps-now-archive'
+    '?filter.p.m.topps.brand=Topps&filter.p.m.topps.sub_brand=Topps+NOW%C2%AE'
+    '&filter.p.m.topps.licenses=Major+League+Baseball+%28MLB%29'
+)
+
+# 初回アクセス時のCloudflareチェック通過待ち（秒）
+CLOUDFLARE_WAIT = 10
+
+CARD_SELECTORS = [
+    '//a[contains(@href, "/products/") and contains(., "Topps NOW")]',
+    '//div[contains(@class, "product-item")]',
+    '//article[contains(@class, "product")]',
+]
+
+
+def page_url(base_url, page, page_param):
+    """一覧URLのページ番号パラメータを差し替える（1ページ目はパラメータなし）"""
+    parts = urlsplit(base_url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k != page_param]
+    if page > 1:
+        query.append((page_param, str(page)))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def product_handle(url):
+    """商品URLの /products/<handle> 部分"""
+    if not url:
+        return None
+    path = urlsplit(url).path.rstrip('/')
+    if '/products/' not in path:
+        return None
+    return path.rsplit('/products/', 1)[1] or None
+
+
+def _first(element, xpath):
+    found = element.xpath(xpath)
+    return found[0] if found else None
+
+
+def parse_card_element(element, base_url):
+    """
+    カード要素（lxml）から情報を抽出
+    """
+    data = {}
+
+    # タイトル/選手名の取得
+    # まず要素全体のテキストから取得を試みる
+    all_text = element_text(element)
+    if all_text and 'Topps NOW' in all_text:
+        # "Alex Bregman - 2025 MLB Topps NOW® - Card OS-14 - PR: 2176" のような形式
+        data['title'] = all_text
+
+    # タイトルが取得できなかった場合は個別要素を探す
+    if 'title' not in data:
+        title_selectors = [
+            './/h3',
+            './/h4',
+            './/h2',
+            './/*[contains(@class, "title")]',
+            './/*[contains(@class, "name")]',
+            './/*[contains(text(), "Topps NOW")]',
+        ]
+
+        for selector in title_selectors:
+            title_elem = _first(element, selector)
+            if title_elem is None:
+                continue
+            title_text = element_text(title_elem)
+            if title_text:
+                data['title'] = title_text
+                break
+
+    # カード番号の取得（タイトルから抽出することが多い）
+    if 'title' in data:
+        # チームセットの場合は特別処理
+        if 'Team Set' in data['title']:
+            # "2025 Houston Astros MLB Topps NOW® Road To Opening Day 11-Card Team Set"
+            # からチーム名を抽出してカード番号を生成
+            team_match = re.search(r'2025\s+(.+?)\s+MLB\s+Topps\s+NOW', data['title'])
+            if team_match:
+                team_name = team_match.group(1).strip()
+                # チーム名を短縮形に変換
+                # 最後の単語(チーム名)の頭文字3文字 + 都市名の頭文字
+                # 例: "Tampa Bay Rays" -> "RAY-TB", "Toronto Blue Jays" -> "JAY-TO"
+                words = team_name.split()
+                if len(words) >= 2:
+                    team_abbr = words[-1][:3].upper() + '-' + ''.join([w[0] for w in words[:-1]]).upper()
+                else:
+                    team_abbr = team_name[:3].upper()
+                data['card_number'] = f'TEAMSET-{team_abbr}'
+        else:
+            # 通常のカード番号パターン
+            # "Card OS-14", "Card OS13", "Card MLBJP", "Card #123", "#123" のようなパターン
+            patterns = [
+                r'Card\s+([A-Z]+\d+)',            # "Card OS13" (文字+数字、ハイフンなし)
+                r'Card\s+([A-Z]{1,6}-\d+)',       # "Card OS-14" (文字-数字)
+                r'Card\s+([A-Z]{2,6})',           # "Card MLBJP" (文字のみ、2文字以上)
+                r'Card\s+#?(\d+[A-Z]*)',          # "Card #123" or "Card 123"
+                r'#(\d+[A-Z]*)',                  # "#123"
+            ]
+            for pattern in patterns:
+                match = re.search(pattern, data['title'], re.IGNORECASE)
+                if match:
+                    data['card_number'] = match.group(1)
+                    break
+
+    # 発行数(PR)の取得
+    # まずタイトルから"PR: XXXX"パターンを探す（カンマ区切りに対応）
+    if 'title' in data:
+        pr_match = re.search(r'PR:\s*([\d,]+)', data['title'])
+        if pr_match:
+            # カンマを除去してから整数に変換
+            data['total_print'] = int(pr_match.group(1).replace(',', ''))
+
+    # タイトルから取得できなかった場合は個別要素を探す
+    if 'total_print' not in data:
+        pr_selectors = [
+            './/*[contains(text(), "PR:")]',
+            './/*[contains(text(), "Print Run")]',
+            './/*[contains(text(), "Edition")]',
+            './/*[contains(@class, "print")]',
+        ]
+
+        for selector in pr_selectors:
+            pr_elem = _first(element, selector)
+            if pr_elem is None:
+                continue
+            # "PR: 1,234" や "Print Run: 1234" から数字を抽出
+            match = re.search(r'PR:\s*(\d{1,3}(?:,\d{3})*)', element_text(pr_elem))
+            if match:
+                data['total_print'] = int(match.group(1).replace(',', ''))
+                break
+
+    # 画像URL（WebDriverの get_attribute と同様に絶対URLにする）
+    img_elem = _first(element, './/img')
+    if img_elem is not None:
+        img_src = img_elem.get('src') or img_elem.get('data-src')
+        if img_src:
+            data['image_url'] = urljoin(base_url, img_src)
+
+    # リンクURL（カード要素自体がリンクの場合も含む）
+    link_elem = _first(element, 'descendant-or-self::a[contains(@href, "/products/")]')
+    if link_elem is not None:
+        href = link_elem.get('href')
+        if href:
+            data['detail_url'] = urljoin(base_url, href)
+
+    return data if data else None
+
+
+def parse_listing_html(page_source, base_url):
+    """
+    一覧ページのHTMLから全カードをパースする
+    戻り値: (マッチしたセレクタ, カードデータのリスト)。カード要素がなければ (None, [])
+    """
+    document = lxml_html.fromstring(page_source)
+    for selector in CARD_SELECTORS:
+        elements = document.xpath(selector)
+        if elements:
+            cards = []
+            for element in elements:
+                card_data = parse_card_element(element, base_url)
+                if card_data:
+                    cards.append(card_data)
+            return selector, cards
+    return None, []
+
+
+# ingest_cards で更新するカードのフィールド
+INGEST_FIELDS = ['player_id', 'team_id', 'title', 'total_print', 'image_url', 'is_rookie']
+
+# ingest_cards でキャッシュする既存カードのフィールド
+INGEST_CACHE_FIELDS = [
+    *INGEST_FIELDS, 'card_number', 'product_url', 'product_url_long', 'thumbnails', 'thumbnail_source'
+]
+
 
 class Command(BaseCommand):
     help = 'Scrape Topps NOW archive using Selenium and create cards in database'
@@ -24,7 +209,7 @@ class Command(BaseCommand):
             '--max-cards',
             type=int,
             default=10,
-            help='Maximum number of cards to scrape (default: 10)'
+            help='Maximum number of cards to scrape (default: 10, 0 for no limit)'
         )
         parser.add_argument(
             '--delay',
@@ -41,23 +226,44 @@ class Command(BaseCommand):
             '--url',
             type=str,
             default=None,
-            help='Full URL to scrape (e.g., https://www.topps.com/collections/mlb-topps-now-archive?after=...&p=2)'
+            help='Listing URL to start from (e.g., https://www.topps.com/collections/mlb-topps-now-archive?p=2)'
+        )
+        parser.add_argument(
+            '--pages',
+            type=int,
+            default=1,
+            help='Maximum number of listing pages to crawl (default: 1, 0 for all pages)'
+        )
+        parser.add_argument(
+            '--start-page',
+            type=int,
+            default=None,
+            help='Page number to start from (default: page number in --url, or 1)'
+        )
+        parser.add_argument(
+            '--page-param',
+            type=str,
+            default='p',
+            help='Query parameter used for the page number (default: p)'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of browsers fetching pages concurrently (default: 1)'
+        )
+        parser.add_argument(
+            '--no-store',
+            action='store_true',
+            help='Do not keep fetched pages in SCRAPE_STORE_DIR'
+        )
+        parser.add_argument(
+            '--no-early-stop',
+            action='store_true',
+            help='Keep crawling even after a page whose products are all already stored'
         )
 
-    def handle(self, *args, **options):
-        if not webdriver:
-            self.stdout.write(
-                self.style.ERROR(
-                    'Selenium not installed. Run: pip install selenium'
-                )
-            )
-            return
-
-        max_cards = options['max_cards']
-        delay = options['delay']
-        headless = options.get('headless', True)
-        custom_url = options['url']
-
+    def build_chrome_options(self, worker_index):
         # Chrome設定（Docker環境およびCloudflare対策を含む）
         chrome_options = Options()
         chrome_options.add_argument('--headless=new')  # 新しいheadlessモード
@@ -65,8 +271,8 @@ class Command(BaseCommand):
         chrome_options.add_argument('--disable-dev-shm-usage')
         chrome_options.add_argument('--disable-gpu')
 
-        # Docker環境で必要な追加オプション
-        chrome_options.add_argument('--remote-debugging-port=9222')
+        # Docker環境で必要な追加オプション（並列実行時はワーカーごとにポートを分ける）
+        chrome_options.add_argument(f'--remote-debugging-port={9222 + worker_index}')
         chrome_options.add_argument('--disable-software-rasterizer')
         chrome_options.add_argument('--window-size=1920,1080')
         chrome_options.add_argument('--single-process')
@@ -81,15 +287,17 @@ class Command(BaseCommand):
         chrome_options.add_experimental_option('useAutomationExtension', False)
 
         chrome_options.binary_location = '/usr/bin/chromium'
-
-        driver = None
-        total_cards_created = 0
-        total_cards_updated = 0
-
-        try:
-            # WebDriverの初期化
-            self.stdout.write('Initializing Chrome WebDriver...')
-            driver = webdriver.Chrome(options=chrome_options)
+        return chrome_options
+
+    def get_driver(self):
+        """ワーカースレッドごとのWebDriver（初回呼び出し時に起動）"""
+        driver = getattr(self._local, 'driver', None)
+        if driver is None:
+            with self._drivers_lock:
+                worker_index = len(self._drivers)
+                self.stdout.write(f'Initializing Chrome WebDriver (worker {worker_index + 1})...')
+                driver = webdriver.Chrome(options=self.build_chrome_options(worker_index))
+                self._drivers.append(driver)
 
             # WebDriver検出を回避するJavaScriptを実行
             driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {
@@ -99,109 +307,184 @@ class Command(BaseCommand):
                     });
                 '''
             })
+            self._local.driver = driver
+            self._local.cleared = False
+        return driver
 
-            # URLを決定
-            if custom_url:
-                full_url = custom_url
-                self.stdout.write(f'Using custom URL: {full_url}')
-            else:
-                # デフォルトURL（1ページ目）
-                url = 'https://www.topps.com/collections/topps-now-archive'
-                params = '?filter.p.m.topps.brand=Topps&filter.p.m.topps.sub_brand=Topps+NOW%C2%AE&filter.p.m.topps.licenses=Major+League+Baseball+%28MLB%29'
-                full_url = url + params
-                self.stdout.write(f'Using default URL (page 1): {full_url}')
-
-            self.stdout.write(f'Loading page: {full_url}')
-            driver.get(full_url)
+    def fetch_listing_page(self, url, delay):
+        """
+        一覧ページを読み込み、全カードをパースして返す（ワーカースレッドで実行）
+        戻り値: カードデータのリスト（カード要素がなければ空リスト）
+        """
+        driver = self.get_driver()
+        self.stdout.write(f'Loading page: {url}')
+        driver.get(url)
 
-            # ページが読み込まれるまで待機（Cloudflareチェックを通過するため長めに）
+        # ページが読み込まれるまで待機（Cloudflareチェックはブラウザごとに初回のみ長めに）
+        if not self._local.cleared:
             self.stdout.write('Waiting for page to load (Cloudflare check)...')
-            time.sleep(10)  # Cloudflareチェック通過待機
-
-            # JavaScriptでスクロールして遅延ロードされるコンテンツを読み込む
-            self.stdout.write('Scrolling to load content...')
-            last_height = driver.execute_script("return document.body.scrollHeight")
-            scroll_attempts = 0
-            max_scroll_attempts = 5
-
-            while scroll_attempts < max_scroll_attempts:
-                # ページ下部までスクロール
-                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(delay)
-
-                # 新しい高さを取得
-                new_height = driver.execute_script("return document.body.scrollHeight")
-
-                if new_height == last_height:
-                    break
-
-                last_height = new_height
-                scroll_attempts += 1
-                self.stdout.write(f'Scroll attempt {scroll_attempts}/{max_scroll_attempts}')
+            time.sleep(CLOUDFLARE_WAIT)
+            self._local.cleared = True
+        else:
+            time.sleep(delay)
+
+        # JavaScriptでスクロールして遅延ロードされるコンテンツを読み込む
+        last_height = driver.execute_script("return document.body.scrollHeight")
+        max_scroll_attempts = 5
+        for _ in range(max_scroll_attempts):
+            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+            time.sleep(delay)
+            new_height = driver.execute_script("return document.body.scrollHeight")
+            if new_height == last_height:
+                break
+            last_height = new_height
+
+        # ページのHTMLを1回だけ取得し、カード要素はブラウザ外（lxml）でパースする
+        page_source = driver.page_source
+        current_url = driver.current_url
+        if self.page_store is not None:
+            # パーサー修正時に reparse_pages で再抽出できるよう保存しておく
+            try:
+                self.page_store.put('topps_archive', current_url, page_source, meta={'page_url': url})
+            except OSError as e:
+                self.stdout.write(self.style.WARNING(f'Failed to store page: {e}'))
+        selector, cards = parse_listing_html(page_source, current_url)
+        if selector is not None:
+            self.stdout.write(f'Found {len(cards)} cards with selector: {selector} ({url})')
+            return cards
+
+        self.stdout.write(self.style.WARNING(f'No card elements found: {url}'))
+        self.stdout.write(f'Page source length: {len(page_source)} chars')
+        self.stdout.write(page_source[:2000])
+        screenshot_path = '/tmp/topps_selenium_debug.png'
+        driver.save_screenshot(screenshot_path)
+        self.stdout.write(f'Screenshot saved to {screenshot_path}')
+        return []
+
+    def load_known_products(self):
+        """保存済みカードの商品ハンドルとカード番号（途中で打ち切る判定用）"""
+        handles = set()
+        for urls in ToppsCard.objects.exclude(product_url='').values_list('product_url', 'product_url_long'):
+            handles.update(filter(None, map(product_handle, urls)))
+        card_numbers = set(
+            ToppsCard.objects.filter(topps_set__name='Topps NOW', topps_set__year=datetime.now().year)
+            .values_list('card_number', flat=True)
+        )
+        return handles, card_numbers
 
-            # カード要素を探す
-            self.stdout.write('Searching for card elements...')
+    def handle(self, *args, **options):
+        if not webdriver or not lxml_html:
+            self.stdout.write(
+                self.style.ERROR(
+                    'Selenium or lxml not installed. Run: pip install selenium lxml'
+                )
+            )
+            return
 
-            # より具体的なセレクタを使用（タイトルを含む要素のみ）
-            possible_selectors = [
-                '//a[contains(@href, "/products/") and contains(., "Topps NOW")]',
-                '//div[contains(@class, "product-item")]',
-                '//article[contains(@class, "product")]',
-            ]
+        max_cards = options['max_cards']
+        delay = options['delay']
+        custom_url = options['url']
+        max_pages = options['pages']
+        page_param = options['page_param']
+        workers = max(options['workers'], 1)
+        early_stop = not options['no_early_stop']
+
+        # URLを決定
+        base_url = custom_url or ARCHIVE_URL
+        self.stdout.write(f'Using {"custom" if custom_url else "default"} URL: {base_url}')
+        start_page = options['start_page']
+        if start_page is None:
+            start_page = int(dict(parse_qsl(urlsplit(base_url).query)).get(page_param) or 1)
+        last_page = start_page + max_pages - 1 if max_pages > 0 else None
+
+        known_handles, known_card_numbers = self.load_known_products()
+        self.load_ingest_cache()
+        seen_handles = set()
+
+        self.page_store = None if options['no_store'] else PageStore()
+        self._local = threading.local()
+        self._drivers = []
+        self._drivers_lock = threading.Lock()
+        total_cards_created = 0
+        total_cards_updated = 0
+        processed = 0
+        pages_crawled = 0
 
-            card_elements = []
-            for selector in possible_selectors:
-                try:
-                    elements = driver.find_elements(By.XPATH, selector)
-                    if elements:
-                        self.stdout.write(f'Found {len(elements)} elements with selector: {selector}')
-                        card_elements = elements
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                pending = {}
+                next_page = start_page
+                current_page = start_page
+                stop = False
+
+                while True:
+                    # 最大 workers ページを先読みで並列取得する
+                    while (
+                        not stop and len(pending) < workers
+                        and (last_page is None or next_page <= last_page)
+                    ):
+                        url = page_url(base_url, next_page, page_param)
+                        pending[next_page] = executor.submit(self.fetch_listing_page, url, delay)
+                        next_page += 1
+
+                    if current_page not in pending:
                         break
-                except Exception as e:
-                    continue
-
-            if not card_elements:
-                self.stdout.write(self.style.WARNING('No card elements found'))
-
-                # デバッグ情報を出力
-                self.stdout.write('\n=== Page Source Preview ===')
-                page_source = driver.page_source
-                self.stdout.write(f'Page source length: {len(page_source)} chars')
-                self.stdout.write(page_source[:2000])
 
-                # スクリーンショットを保存
-                screenshot_path = '/tmp/topps_selenium_debug.png'
-                driver.save_screenshot(screenshot_path)
-                self.stdout.write(f'Screenshot saved to {screenshot_path}')
-
-                return
-
-            # カード数を制限
-            cards_to_process = card_elements[:max_cards]
-            self.stdout.write(f'Processing {len(cards_to_process)} cards...')
-
-            for idx, card_element in enumerate(cards_to_process, 1):
-                try:
-                    self.stdout.write(f'\n--- Card {idx}/{len(cards_to_process)} ---')
-                    card_data = self.parse_card_element(card_element, driver)
-
-                    if card_data:
-                        self.stdout.write(f'Parsed card data: {card_data}')
-                        created, updated = self.save_card(card_data)
-                        if created:
-                            total_cards_created += 1
-                        if updated:
-                            total_cards_updated += 1
+                    # 結果はページ順に処理する
+                    try:
+                        cards = pending.pop(current_page).result()
+                    except Exception as e:
+                        self.stdout.write(self.style.ERROR(f'Error loading page {current_page}: {e}'))
+                        cards = []
+                    pages_crawled += 1
+
+                    if not cards:
+                        self.stdout.write(f'Page {current_page}: no products, stopping')
+                        stop = True
                     else:
-                        self.stdout.write(self.style.WARNING('No data extracted from card'))
-
-                except Exception as e:
-                    self.stdout.write(self.style.WARNING(f'Error processing card {idx}: {e}'))
-                    continue
+                        page_known = True
+                        new_cards = []
+                        for card_data in cards:
+                            handle = product_handle(card_data.get('detail_url'))
+                            if handle is not None:
+                                if handle in seen_handles:
+                                    continue
+                                seen_handles.add(handle)
+                            if handle not in known_handles and card_data.get('card_number') not in known_card_numbers:
+                                page_known = False
+                            new_cards.append(card_data)
+
+                        if max_cards > 0:
+                            new_cards = new_cards[:max_cards - processed]
+                        self.stdout.write(f'Page {current_page}: processing {len(new_cards)} cards...')
+
+                        processed += len(new_cards)
+                        try:
+                            created, updated = self.ingest_cards(new_cards)
+                        except Exception as e:
+                            self.stdout.write(self.style.WARNING(f'Error saving page {current_page}: {e}'))
+                        else:
+                            total_cards_created += created
+                            total_cards_updated += updated
+
+                        if max_cards > 0 and processed >= max_cards:
+                            self.stdout.write(f'Reached --max-cards ({max_cards}), stopping')
+                            stop = True
+                        elif early_stop and page_known:
+                            self.stdout.write(f'Page {current_page}: all products already stored, stopping')
+                            stop = True
+
+                    if stop:
+                        # 先読み中のページは破棄する
+                        for future in pending.values():
+                            future.cancel()
+                        pending.clear()
+                        break
+                    current_page += 1
 
             self.stdout.write(
                 self.style.SUCCESS(
-                    f'\nCompleted! Created: {total_cards_created}, Updated: {total_cards_updated}'
+                    f'\nCompleted! Pages: {pages_crawled}, Created: {total_cards_created}, Updated: {total_cards_updated}'
                 )
             )
 
@@ -211,149 +494,13 @@ class Command(BaseCommand):
             self.stdout.write(traceback.format_exc())
 
         finally:
-            if driver:
+            if self._drivers:
                 self.stdout.write('Closing browser...')
-                driver.quit()
-
-    def parse_card_element(self, element, driver):
-        """
-        カード要素から情報を抽出
-        """
-        data = {}
-
-        try:
-            # 要素のHTMLを取得（デバッグ用）
-            element_html = element.get_attribute('outerHTML')
-            self.stdout.write(f'Element HTML preview: {element_html[:500]}')
-
-            # タイトル/選手名の取得
-            # まず要素全体のテキストから取得を試みる
-            try:
-                all_text = element.text.strip()
-                if all_text and 'Topps NOW' in all_text:
-                    # "Alex Bregman - 2025 MLB Topps NOW® - Card OS-14 - PR: 2176" のような形式
-                    data['title'] = all_text
-                    self.stdout.write(f'Title found from element text: {all_text}')
-            except Exception:
-                pass
-
-            # タイトルが取得できなかった場合は個別要素を探す
-            if 'title' not in data:
-                title_selectors = [
-                    './/h3',
-                    './/h4',
-                    './/h2',
-                    './/*[contains(@class, "title")]',
-                    './/*[contains(@class, "name")]',
-                    './/*[contains(text(), "Topps NOW")]',
-                ]
-
-                for selector in title_selectors:
-                    try:
-                        title_elem = element.find_element(By.XPATH, selector)
-                        title_text = title_elem.text.strip()
-                        if title_text:
-                            data['title'] = title_text
-                            self.stdout.write(f'Title found: {title_text}')
-                            break
-                    except NoSuchElementException:
-                        continue
-
-            # カード番号の取得（タイトルから抽出することが多い）
-            if 'title' in data:
-                # チームセットの場合は特別処理
-                if 'Team Set' in data['title']:
-                    # "2025 Houston Astros MLB Topps NOW® Road To Opening Day 11-Card Team Set"
-                    # からチーム名を抽出してカード番号を生成
-                    team_match = re.search(r'2025\s+(.+?)\s+MLB\s+Topps\s+NOW', data['title'])
-                    if team_match:
-                        team_name = team_match.group(1).strip()
-                        # チーム名を短縮形に変換
-                        # 最後の単語(チーム名)の頭文字3文字 + 都市名の頭文字
-                        # 例: "Tampa Bay Rays" -> "RAY-TB", "Toronto Blue Jays" -> "JAY-TO"
-                        words = team_name.split()
-                        if len(words) >= 2:
-                            team_abbr = words[-1][:3].upper() + '-' + ''.join([w[0] for w in words[:-1]]).upper()
-                        else:
-                            team_abbr = team_name[:3].upper()
-                        data['card_number'] = f'TEAMSET-{team_abbr}'
-                        self.stdout.write(f'Team set card number generated: {data["card_number"]} for {team_name}')
-                else:
-                    # 通常のカード番号パターン
-                    # "Card OS-14", "Card OS13", "Card MLBJP", "Card #123", "#123" のようなパターン
-                    patterns = [
-                        r'Card\s+([A-Z]+\d+)',            # "Card OS13" (文字+数字、ハイフンなし)
-                        r'Card\s+([A-Z]{1,6}-\d+)',       # "Card OS-14" (文字-数字)
-                        r'Card\s+([A-Z]{2,6})',           # "Card MLBJP" (文字のみ、2文字以上)
-                        r'Card\s+#?(\d+[A-Z]*)',          # "Card #123" or "Card 123"
-                        r'#(\d+[A-Z]*)',                  # "#123"
-                    ]
-                    for pattern in patterns:
-                        match = re.search(pattern, data['title'], re.IGNORECASE)
-                        if match:
-                            data['card_number'] = match.group(1)
-                            self.stdout.write(f'Card number found: {data["card_number"]}')
-                            break
-
-            # 発行数(PR)の取得
-            # まずタイトルから"PR: XXXX"パターンを探す（カンマ区切りに対応）
-            if 'title' in data:
-                pr_match = re.search(r'PR:\s*([\d,]+)', data['title'])
-                if pr_match:
-                    # カンマを除去してから整数に変換
-                    data['total_print'] = int(pr_match.group(1).replace(',', ''))
-                    self.stdout.write(f'Print run found in title: {data["total_print"]}')
-
-            # タイトルから取得できなかった場合は個別要素を探す
-            if 'total_print' not in data:
-                pr_selectors = [
-                    './/*[contains(text(), "PR:")]',
-                    './/*[contains(text(), "Print Run")]',
-                    './/*[contains(text(), "Edition")]',
-                    './/*[contains(@class, "print")]',
-                ]
-
-                for selector in pr_selectors:
-                    try:
-                        pr_elem = element.find_element(By.XPATH, selector)
-                        pr_text = pr_elem.text.strip()
-                        # "PR: 1,234" や "Print Run: 1234" から数字を抽出
-                        match = re.search(r'PR:\s*(\d{1,3}(?:,\d{3})*)', pr_text)
-                        if match:
-                            data['total_print'] = int(match.group(1).replace(',', ''))
-                            self.stdout.write(f'Print run found: {data["total_print"]}')
-                            break
-                    except NoSuchElementException:
-                        continue
-
-            # 画像URL
-            try:
-                img_elem = element.find_element(By.XPATH, './/img')
-                img_src = img_elem.get_attribute('src') or img_elem.get_attribute('data-src')
-                if img_src:
-                    data['image_url'] = img_src
-                    self.stdout.write(f'Image URL found: {img_src[:100]}')
-            except NoSuchElementException:
-                pass
-
-            # リンクURL
-            try:
-                link_elem = element.find_element(By.XPATH, './/a[contains(@href, "/products/")]')
-                href = link_elem.get_attribute('href')
-                if href:
-                    data['detail_url'] = href
-                    self.stdout.write(f'Detail URL found: {href}')
-            except NoSuchElementException:
-                pass
-
-            # 全テキストを取得（デバッグ用）
-            all_text = element.text.strip()
-            self.stdout.write(f'All text: {all_text[:200]}')
-
-        except Exception as e:
-            self.stdout.write(self.style.WARNING(f'Error extracting data: {e}'))
-
-        return data if data else None
+            for driver in self._drivers:
+                try:
+                    driver.quit()
+                except Exception:
+                    pass
 
     def parse_date(self, date_text):
         """日付文字列をパース"""
@@ -372,23 +519,11 @@ class Command(BaseCommand):
 
         return None
 
-    @transaction.atomic
-    def save_card(self, card_data):
-        """カードデータをデータベースに保存"""
-        created = False
-        updated = False
-
-        # Topps NOWセットを取得または作成
-        year = datetime.now().year
-        topps_set, _ = ToppsSet.objects.get_or_create(
-            year=year,
-            name='Topps NOW',
-            defaults={
-                'brand': 'Topps',
-                'slug': f'topps-now-{year}',
-            }
-        )
-
+    def prepare_card(self, card_data):
+        """
+        スクレイピングしたカードデータを整形する
+        戻り値: (カード番号, 選手名)
+        """
         # タイトルを取得してクリーニング
         title = card_data.get('title', 'Unknown')
 
@@ -486,37 +621,122 @@ class Command(BaseCommand):
                 # パターンにマッチしない場合は最初の " - " より前を使用
                 player_name = title.split(' - ')[0].strip() if ' - ' in title else title.strip()
 
-        # 選手を検索または作成
-        player, _ = Player.objects.get_or_create(
-            full_name=player_name,
-            defaults={
-                'first_name': player_name.split()[0] if player_name else '',
-                'last_name': ' '.join(player_name.split()[1:]) if len(player_name.split()) > 1 else '',
-                'position': 'P',  # デフォルト
-            }
-        )
+        return card_data['card_number'], player_name
 
-        # カードを作成または更新
-        card, created = ToppsCard.objects.update_or_create(
-            topps_set=topps_set,
-            card_number=card_data['card_number'],
+    def load_ingest_cache(self, year=None):
+        """
+        Topps NOWセット・選手（full_name）・セット内の既存カード（カード番号）を読み込む
+        year: セットの年（None は今年。保存済みページの再取り込みではページの取得日の年を渡す）
+        """
+        # Topps NOWセットを取得または作成
+        if year is None:
+            year = datetime.now().year
+        self._topps_set, _ = ToppsSet.objects.get_or_create(
+            year=year,
+            name='Topps NOW',
             defaults={
-                'player': player,
-                'team': player.team,
-                'title': card_data.get('title', ''),
-                'total_print': card_data.get('total_print'),
-                'image_url': card_data.get('image_url', ''),
-                'is_rookie': False,
+                'brand': 'Topps',
+                'slug': f'topps-now-{year}',
             }
         )
+        self._players = {
+            player.full_name: player
+            for player in Player.objects.only('id', 'full_name', 'team_id')
+        }
+        self._cards = {
+            card.card_number: card
+            for card in ToppsCard.objects.filter(topps_set=self._topps_set).only(*INGEST_CACHE_FIELDS)
+        }
+
+    def ingest_cards(self, cards_data):
+        """
+        1ページ分のカードをまとめて保存する
+        新規の選手・カードは bulk_create、内容が変わったカードだけ bulk_update
+        戻り値: (作成数, 更新数)
+        """
+        # 同じカード番号が複数あれば後のものを使う（update_or_create を順に実行した場合と同じ）
+        prepared = {}
+        for card_data in cards_data:
+            card_number, player_name = self.prepare_card(card_data)
+            prepared[card_number] = (player_name, card_data)
+
+        with transaction.atomic():
+            # 選手を作成
+            new_players = {}
+            for player_name, _ in prepared.values():
+                if player_name not in self._players and player_name not in new_players:
+                    names = player_name.split()
+                    new_players[player_name] = Player(
+                        first_name=names[0] if names else '',
+                        last_name=' '.join(names[1:]),
+                        position='P',  # デフォルト
+                    )
+            if new_players:
+                for player in new_players.values():
+                    # bulk_create では save() が呼ばれないため full_name をここで設定
+                    player.full_name = f"{player.first_name} {player.last_name}"
+                Player.objects.bulk_create(new_players.values())
+                # MySQLでは bulk_create でpkが設定されないため取り直す
+                created_players = {
+                    player.full_name: player
+                    for player in Player.objects.filter(
+                        full_name__in=[p.full_name for p in new_players.values()]
+                    ).only('id', 'full_name', 'team_id')
+                }
+                for player_name, player in new_players.items():
+                    self._players[player_name] = created_players[player.full_name]
+
+            # カードを作成または更新
+            to_create = []
+            to_update = []
+            for card_number, (player_name, card_data) in prepared.items():
+                player = self._players[player_name]
+                values = {
+                    'player_id': player.pk,
+                    'team_id': player.team_id,
+                    'title': card_data.get('title', ''),
+                    'total_print': card_data.get('total_print'),
+                    'image_url': card_data.get('image_url', ''),
+                    'is_rookie': False,
+                }
+                card = self._cards.get(card_number)
+                if card is None:
+                    card = ToppsCard(topps_set=self._topps_set, card_number=card_number, **values)
+                    # bulk_create では save() が呼ばれないため商品URLをここで生成
+                    if card.title:
+                        card.product_url, card.product_url_long = card.generate_product_urls()
+                    to_create.append(card)
+                    self.stdout.write(self.style.SUCCESS(f"Created card: #{card_number} {player_name}"))
+                elif any(getattr(card, field) != value for field, value in values.items()):
+                    for field, value in values.items():
+                        setattr(card, field, value)
+                    if not card.product_url and card.title:
+                        card.product_url, card.product_url_long = card.generate_product_urls()
+                    # 画像が差し替えられたら古いサムネイルは使わない
+                    if card.thumbnails and card.thumbnail_source != card.image_url:
+                        card.thumbnails = {}
+                    card.updated_at = timezone.now()
+                    to_update.append(card)
+                    self.stdout.write(self.style.SUCCESS(f"Updated card: #{card_number} {player_name}"))
+
+            ToppsCard.objects.bulk_create(to_create)
+            ToppsCard.objects.bulk_update(
+                to_update, INGEST_FIELDS + ['product_url', 'product_url_long', 'thumbnails', 'updated_at']
+            )
 
-        if not created:
-            updated = True
-
-        self.stdout.write(
-            self.style.SUCCESS(
-                f"{'Created' if created else 'Updated'} card: {card}"
+        if to_create:
+            # MySQLでは bulk_create でpkが設定されないため取り直してからキャッシュする
+            # （後のページに同じカード番号があると bulk_update の対象になる）
+            for card in ToppsCard.objects.filter(
+                topps_set=self._topps_set, card_number__in=[card.card_number for card in to_create]
+            ).only(*INGEST_CACHE_FIELDS):
+                self._cards[card.card_number] = card
+
+        # カード一覧のリードモデルにも反映
+        touched = [card.card_number for card in to_create + to_update]
+        if touched:
+            refresh_card_search(
+                ToppsCard.objects.filter(topps_set=self._topps_set, card_number__in=touched)
             )
-        )
 
-        return created, updated
+        return len(to_create), len(to_update)
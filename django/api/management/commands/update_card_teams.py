@@ -1,11 +1,65 @@
-import requests
+import json
+import os
 import time
+import requests
+from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.utils import timezone
+from api.card_search import refresh_card_search
+from api.mlb_people import normalize_player_name
 from api.models import ToppsCard, Team
 
+ROSTER_URL = 'https://statsapi.mlb.com/api/v1/teams/{team_id}/roster'
+
+# ロースターのスナップショットを再利用する時間（秒）
+ROSTER_CACHE_TIMEOUT = 60 * 60 * 6
+
+
+def roster_snapshot_path(mlb_team_ids, roster_type):
+    """スナップショットの保存先（SCRAPE_STORE_DIR/rosters/<種別>-<チームID>.json）"""
+    team_ids = '-'.join(map(str, sorted(mlb_team_ids)))
+    return os.path.join(settings.SCRAPE_STORE_DIR, 'rosters', f'{roster_type}-{team_ids}.json')
+
+
+def fetch_roster_snapshot(mlb_team_ids, roster_type, use_cache=True):
+    """
+    全チームのロースターを取得し、[(MLB選手ID, 選手名, MLBチームID), ...] を返す
+    結果はファイルに保存し、ROSTER_CACHE_TIMEOUT 以内の再実行ではAPIを呼ばない
+    （コマンドのプロセスは毎回終了するため、プロセス内のキャッシュには置かない）
+    """
+    path = roster_snapshot_path(mlb_team_ids, roster_type)
+    if use_cache:
+        try:
+            if time.time() - os.path.getmtime(path) < ROSTER_CACHE_TIMEOUT:
+                with open(path, encoding='utf-8') as f:
+                    return [tuple(entry) for entry in json.load(f)]
+        except (OSError, ValueError):
+            pass
+
+    snapshot = []
+    with requests.Session() as session:
+        for mlb_team_id in sorted(mlb_team_ids):
+            response = session.get(
+                ROSTER_URL.format(team_id=mlb_team_id),
+                params={'rosterType': roster_type, 'fields': 'roster,person,id,fullName'},
+                timeout=10,
+            )
+            response.raise_for_status()
+            for entry in response.json().get('roster', []):
+                person = entry.get('person', {})
+                snapshot.append((person.get('id'), person.get('fullName', ''), mlb_team_id))
+
+    # 書き込み途中のファイルを読まないよう、一時ファイルから置き換える
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return snapshot
+
 
 class Command(BaseCommand):
-    help = 'MLB APIから選手情報を取得して、Topps Nowカードにチーム情報を関連付けます'
+    help = 'MLB APIのロースターから選手の所属チームを取得して、Topps Nowカードにチーム情報を関連付けます'
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -19,126 +73,103 @@ class Command(BaseCommand):
             action='store_true',
             help='実際には更新せず、結果のみ表示'
         )
+        parser.add_argument(
+            '--roster-type',
+            type=str,
+            default='40Man',
+            help='参照するロースター種別（デフォルト: 40Man、active / fullRoster など）'
+        )
+        parser.add_argument(
+            '--no-cache',
+            action='store_true',
+            help='保存済みのロースターを使わずに取得し直す'
+        )
 
     def handle(self, *args, **options):
         limit = options.get('limit')
         dry_run = options.get('dry_run')
-        
+
         if dry_run:
             self.stdout.write(self.style.WARNING('Dry runモード: データは更新されません'))
-        
+
         # チームが未設定のカードを取得
-        cards = ToppsCard.objects.filter(team__isnull=True).select_related('player')
-        
+        cards = ToppsCard.objects.filter(team__isnull=True).select_related('player').order_by('pk')
+
         if limit:
             cards = cards[:limit]
             self.stdout.write(f'最初の{limit}枚のカードを処理します')
-        
-        total_cards = cards.count()
+
+        cards = list(cards)
+        total_cards = len(cards)
         self.stdout.write(f'チームが未設定のカード: {total_cards}枚')
-        
+
         if total_cards == 0:
             self.stdout.write(self.style.SUCCESS('全カードにチーム情報が設定されています'))
             return
-        
+
+        # 同じ選手のカードはまとめて処理する
+        cards_by_player = {}
+        for card in cards:
+            cards_by_player.setdefault(card.player, []).append(card.pk)
+
+        # mlb_team_id → Team
+        teams = {team.mlb_team_id: team for team in Team.objects.filter(mlb_team_id__isnull=False)}
+
+        try:
+            snapshot = fetch_roster_snapshot(
+                teams.keys(), options['roster_type'], use_cache=not options['no_cache']
+            )
+        except requests.RequestException as e:
+            self.stdout.write(self.style.ERROR(f'✗ ロースター取得エラー: {e}'))
+            return
+        self.stdout.write(f'ロースター: {len(teams)}チーム, {len(snapshot)}名')
+
+        team_by_person = {}
+        teams_by_name = {}
+        for person_id, full_name, mlb_team_id in snapshot:
+            team_by_person[person_id] = mlb_team_id
+            teams_by_name.setdefault(normalize_player_name(full_name), set()).add(mlb_team_id)
+
         updated_count = 0
         not_found_count = 0
-        error_count = 0
         skipped_count = 0
-        
-        for i, card in enumerate(cards, 1):
-            player = card.player
-            
+        card_ids_by_team = {}
+
+        for i, (player, card_ids) in enumerate(cards_by_player.items(), 1):
+            prefix = f'[{i}/{len(cards_by_player)}] {player.full_name} ({len(card_ids)}枚)'
+
             # Major League Baseballなど、特殊な選手はスキップ
             if 'Major League' in player.full_name or 'Team Set' in player.full_name:
-                skipped_count += 1
-                self.stdout.write(f'[{i}/{total_cards}] スキップ: {player.full_name} (特殊カード)')
+                skipped_count += len(card_ids)
+                self.stdout.write(f'{prefix}: スキップ (特殊カード)')
+                continue
+
+            # MLB選手IDで照合し、未設定なら名前で照合（同名選手が複数チームにいる場合は決めない）
+            mlb_team_id = team_by_person.get(player.mlb_player_id)
+            if mlb_team_id is None:
+                candidates = teams_by_name.get(normalize_player_name(player.full_name), set())
+                if len(candidates) == 1:
+                    mlb_team_id = next(iter(candidates))
+
+            if mlb_team_id is None:
+                not_found_count += len(card_ids)
+                self.stdout.write(self.style.WARNING(f'{prefix}: ! ロースターに見つかりません'))
                 continue
-            
-            self.stdout.write(f'[{i}/{total_cards}] 処理中: {player.full_name}')
-            
-            try:
-                # MLB APIで選手を検索
-                response = requests.get(
-                    'https://statsapi.mlb.com/api/v1/people/search',
-                    params={
-                        'names': player.full_name,
-                        'sportId': 1,  # MLB
-                    },
-                    timeout=10
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    people = data.get('people', [])
-                    
-                    if people:
-                        # 最初に見つかった選手を使用
-                        person = people[0]
-                        player_id = person.get('id')
-                        
-                        # 選手の詳細情報を取得（チーム情報を含む）
-                        detail_response = requests.get(
-                            f'https://statsapi.mlb.com/api/v1/people/{player_id}',
-                            params={'hydrate': 'currentTeam'},
-                            timeout=10
-                        )
-                        
-                        if detail_response.status_code == 200:
-                            detail_data = detail_response.json()
-                            person_detail = detail_data.get('people', [])[0]
-                            current_team = person_detail.get('currentTeam')
-                            
-                            if current_team:
-                                mlb_team_id = current_team.get('id')
-                                team_name = current_team.get('name')
-                                
-                                # mlb_team_idでチームを検索
-                                try:
-                                    team = Team.objects.get(mlb_team_id=mlb_team_id)
-                                    
-                                    if not dry_run:
-                                        card.team = team
-                                        card.save()
-                                    
-                                    updated_count += 1
-                                    self.stdout.write(self.style.SUCCESS(
-                                        f'  ✓ チーム設定: {team.full_name}'
-                                    ))
-                                except Team.DoesNotExist:
-                                    not_found_count += 1
-                                    self.stdout.write(self.style.WARNING(
-                                        f'  ! チーム未登録: {team_name} (MLB ID: {mlb_team_id})'
-                                    ))
-                            else:
-                                not_found_count += 1
-                                self.stdout.write(self.style.WARNING(
-                                    f'  ! チーム情報なし'
-                                ))
-                        
-                        # API レート制限対策
-                        time.sleep(0.3)
-                    else:
-                        not_found_count += 1
-                        self.stdout.write(self.style.WARNING(
-                            f'  ! 選手が見つかりません'
-                        ))
-                else:
-                    error_count += 1
-                    self.stdout.write(self.style.ERROR(
-                        f'  ✗ API エラー: HTTP {response.status_code}'
-                    ))
-                
-                # API レート制限対策
-                time.sleep(0.3)
-                
-            except requests.RequestException as e:
-                error_count += 1
-                self.stdout.write(self.style.ERROR(f'  ✗ リクエストエラー: {e}'))
-            except Exception as e:
-                error_count += 1
-                self.stdout.write(self.style.ERROR(f'  ✗ エラー: {e}'))
-        
+
+            team = teams[mlb_team_id]
+            card_ids_by_team.setdefault(team.pk, []).extend(card_ids)
+            updated_count += len(card_ids)
+            self.stdout.write(self.style.SUCCESS(f'{prefix}: ✓ チーム設定: {team.full_name}'))
+
+        if not dry_run and card_ids_by_team:
+            # チームごとに1回のUPDATEで一括設定
+            for team_id, card_ids in card_ids_by_team.items():
+                ToppsCard.objects.filter(pk__in=card_ids).update(team_id=team_id, updated_at=timezone.now())
+            # カード一覧のリードモデルにも反映
+            refresh_card_search(
+                ToppsCard.objects.filter(pk__in=[pk for ids in card_ids_by_team.values() for pk in ids])
+            )
+
         # サマリー
         self.stdout.write('\n' + '=' * 50)
         self.stdout.write(self.style.SUCCESS(f'完了: {updated_count}枚のカードを更新'))
@@ -146,8 +177,6 @@ class Command(BaseCommand):
             self.stdout.write(f'スキップ: {skipped_count}枚')
         if not_found_count > 0:
             self.stdout.write(self.style.WARNING(f'チーム情報なし: {not_found_count}枚'))
-        if error_count > 0:
-            self.stdout.write(self.style.ERROR(f'エラー: {error_count}枚'))
-        
+
         if dry_run:
             self.stdout.write(self.style.WARNING('\nDry runモードのため、実際の更新は行われませんでした'))
@@ -0,0 +1,31 @@
+# Generated by Django 5.0 on 2026-10-19 18:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_add_blog_author_display_name_and_slug'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ToppsCardSearch',
+            fields=[
+                ('card', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_entry', serialize=False, to='api.toppscard')),
+                ('card_number', models.CharField(max_length=20)),
+                ('player_name_key', models.CharField(help_text='検索用に正規化した選手名', max_length=255)),
+                ('year', models.PositiveIntegerField(help_text='セットの年')),
+                ('card_created_at', models.DateTimeField(help_text='カードの作成日時（並び順用）')),
+                ('document', models.TextField(help_text='ToppsCardSerializerの出力（JSON）')),
+                ('document_hash', models.CharField(max_length=40)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-card_created_at'],
+                'indexes': [models.Index(fields=['card_number'], name='api_toppsca_card_nu_00c44f_idx'), models.Index(fields=['year', 'card_created_at'], name='api_toppsca_year_92e74c_idx'), models.Index(fields=['card_created_at'], name='api_toppsca_card_cr_91bf70_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0 on 2026-10-19 19:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_toppscardsearch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='toppscard',
+            name='thumbnail_source',
+            field=models.CharField(blank=True, help_text='サムネイル生成元の画像URL（image_url が変わったら再生成）', max_length=500),
+        ),
+        migrations.AddField(
+            model_name='toppscard',
+            name='thumbnails',
+            field=models.JSONField(blank=True, default=dict, help_text='ローカルのサムネイルURL（{幅: {形式: URL}}、generate_card_thumbnails で生成）'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.0 on 2026-10-19 19:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_backgroundjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('season', models.PositiveIntegerField(help_text='シーズン年')),
+                ('stat', models.CharField(help_text='指標（home_runs, batting_avg など）', max_length=20)),
+                ('rank', models.PositiveSmallIntegerField(help_text='順位（同率は同じ順位）')),
+                ('player_name', models.CharField(max_length=255)),
+                ('team_abbreviation', models.CharField(blank=True, max_length=10)),
+                ('value', models.DecimalField(decimal_places=3, max_digits=7)),
+                ('qualifier_value', models.DecimalField(blank=True, decimal_places=1, help_text='規定の判定に使った値（打数・投球回）', max_digits=6, null=True)),
+                ('qualifier_min', models.DecimalField(blank=True, decimal_places=1, help_text='規定打数・規定投球回', max_digits=6, null=True)),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='api.player')),
+            ],
+            options={
+                'ordering': ['season', 'stat', 'rank'],
+                'indexes': [models.Index(fields=['season', 'stat', 'rank'], name='api_leaderb_season_849eff_idx')],
+                'unique_together': {('season', 'stat', 'player')},
+            },
+        ),
+    ]
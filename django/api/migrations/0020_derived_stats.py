@@ -0,0 +1,101 @@
+# Generated by Django 5.0 on 2026-10-19 19:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_leaderboardentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='playerstats',
+            name='babip',
+            field=models.DecimalField(blank=True, decimal_places=3, help_text='BABIP（(安打 - 本塁打) / (打数 - 三振 - 本塁打 + 犠飛)）', max_digits=4, null=True),
+        ),
+        migrations.AddField(
+            model_name='playerstats',
+            name='batter_strikeouts',
+            field=models.PositiveIntegerField(blank=True, help_text='三振', null=True),
+        ),
+        migrations.AddField(
+            model_name='playerstats',
+            name='bb_per_9',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='BB/9（9イニングあたりの与四球）', max_digits=5, null=True),
+        ),
+        migrations.AddField(
+            model_name='playerstats',
+            name='iso',
+            field=models.DecimalField(blank=True, decimal_places=3, help_text='ISO（長打率 - 打率）', max_digits=4, null=True),
+        ),
+        migrations.AddField(
+            model_name='playerstats',
+            name='k_bb',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='K/BB（奪三振 / 与四球）', max_digits=5, null=True),
+        ),
+        migrations.AddField(
+            model_name='playerstats',
+            name='k_per_9',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='K/9（9イニングあたりの奪三振）', max_digits=5, null=True),
+        ),
+        migrations.AddField(
+            model_name='playerstats',
+            name='sac_flies',
+            field=models.PositiveIntegerField(blank=True, help_text='犠飛', null=True),
+        ),
+        migrations.AddField(
+            model_name='toppscard',
+            name='rolling_avg',
+            field=models.DecimalField(blank=True, decimal_places=3, help_text='直近の打率', max_digits=4, null=True),
+        ),
+        migrations.AddField(
+            model_name='toppscard',
+            name='rolling_era',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='直近の防御率', max_digits=5, null=True),
+        ),
+        migrations.AddField(
+            model_name='toppscard',
+            name='rolling_home_runs',
+            field=models.PositiveSmallIntegerField(blank=True, help_text='直近の本塁打', null=True),
+        ),
+        migrations.AddField(
+            model_name='toppscard',
+            name='rolling_k_per_9',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='直近のK/9', max_digits=5, null=True),
+        ),
+        migrations.AddField(
+            model_name='toppscard',
+            name='rolling_ops',
+            field=models.DecimalField(blank=True, decimal_places=3, help_text='直近のOPS', max_digits=4, null=True),
+        ),
+        migrations.CreateModel(
+            name='PlayerGameLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('season', models.PositiveIntegerField(help_text='シーズン年')),
+                ('stat_type', models.CharField(choices=[('hitting', 'Hitting'), ('pitching', 'Pitching')], max_length=10)),
+                ('game_pk', models.PositiveIntegerField(help_text='MLB Stats API gamePk')),
+                ('game_date', models.DateField()),
+                ('at_bats', models.PositiveSmallIntegerField(default=0)),
+                ('hits', models.PositiveSmallIntegerField(default=0)),
+                ('doubles', models.PositiveSmallIntegerField(default=0)),
+                ('triples', models.PositiveSmallIntegerField(default=0)),
+                ('home_runs', models.PositiveSmallIntegerField(default=0)),
+                ('hit_by_pitch', models.PositiveSmallIntegerField(default=0)),
+                ('sac_flies', models.PositiveSmallIntegerField(default=0)),
+                ('outs', models.PositiveSmallIntegerField(default=0, help_text='奪ったアウト数（投球回 × 3）')),
+                ('earned_runs', models.PositiveSmallIntegerField(default=0)),
+                ('strikeouts', models.PositiveSmallIntegerField(default=0)),
+                ('walks', models.PositiveSmallIntegerField(default=0)),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='game_logs', to='api.player')),
+            ],
+            options={
+                'ordering': ['player', 'game_date'],
+                'indexes': [models.Index(fields=['season', 'stat_type'], name='api_playerg_season_d7e0a6_idx')],
+                'unique_together': {('player', 'game_pk', 'stat_type')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-19 19:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0020_derived_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='toppscard',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,259 @@
+"""
+MLB Stats API の試合情報の取得
+(チームID, 日付) ごとに結果をキャッシュし、同時に来た同じ問い合わせは1回のAPI呼び出しにまとめる
+
+同期版（get_game: ジョブ・管理コマンド用）と非同期版（aget_game: 非同期ビュー用）があり、
+非同期版は httpx の AsyncClient（接続プール）で取得するため、待機中にスレッドを占有しない
+
+AsyncClient はプロセスで1つだけ作り、専用スレッドのイベントループで動かす
+（WSGIでは非同期ビューがリクエストごとに新しいループで動くため、ループごとに作ると接続を使い回せず、閉じられないまま残る）
+"""
+import asyncio
+import atexit
+import threading
+from datetime import datetime, timedelta
+
+import requests
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+
+from .models import ToppsCard
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+SCHEDULE_URL = 'https://statsapi.mlb.com/api/v1/schedule'
+
+# 必要な項目だけを返させる
+SCHEDULE_FIELDS = (
+    'dates,games,gamePk,status,detailedState,teams,away,home,team,name,score'
+)
+
+# タイムアウト（秒）と接続プールの大きさ
+CONNECT_TIMEOUT = 3.0
+READ_TIMEOUT = 5.0
+MAX_CONNECTIONS = 20
+
+# キャッシュ時間（秒）。終了した試合は結果が変わらないので長く持つ
+FINAL_GAME_TIMEOUT = 60 * 60 * 24 * 7
+LIVE_GAME_TIMEOUT = 60
+NO_GAME_TIMEOUT = 60 * 60 * 6
+
+# 試合が終了していることを示すステータス
+FINAL_STATUSES = {'Final', 'Game Over', 'Completed Early', 'Cancelled', 'Postponed'}
+
+_session = requests.Session()
+_session.mount('https://', requests.adapters.HTTPAdapter(pool_maxsize=MAX_CONNECTIONS))
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+# AsyncClient を動かすイベントループ・クライアント・取得中のタスク（初回の非同期取得時に作る）
+_client_state = None
+_client_lock = threading.Lock()
+
+
+def _cache_key(team_id, date):
+    return f'mlb_game:{int(team_id)}:{date}'
+
+
+def _schedule_params(team_id, date):
+    # 日付フォーマットを変換 (YYYY-MM-DD -> MM/DD/YYYY)
+    date_formatted = datetime.strptime(date, '%Y-%m-%d').strftime('%m/%d/%Y')
+    return {'sportId': 1, 'date': date_formatted, 'teamId': int(team_id), 'fields': SCHEDULE_FIELDS}
+
+
+def parse_schedule(data):
+    """schedule APIのレスポンスから最初の試合を取り出す。試合がなければ None"""
+    for schedule_date in data.get('dates', []):
+        for game in schedule_date.get('games', []):
+            away = game['teams']['away']
+            home = game['teams']['home']
+            return {
+                'game_id': game['gamePk'],
+                'away_team': away['team'].get('name'),
+                'home_team': home['team'].get('name'),
+                'away_score': away.get('score'),
+                'home_score': home.get('score'),
+                'status': game.get('status', {}).get('detailedState'),
+                'game_url': f"https://www.mlb.com/gameday/{game['gamePk']}",
+            }
+    return None
+
+
+def find_game(team_id, date):
+    """
+    チームのその日の試合を MLB Stats API から取得する
+    date は YYYY-MM-DD 形式。試合がなければ None
+    """
+    response = _session.get(
+        SCHEDULE_URL, params=_schedule_params(team_id, date), timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)
+    )
+    response.raise_for_status()
+    return parse_schedule(response.json())
+
+
+def _client():
+    """専用スレッドのイベントループと AsyncClient（プロセスで1つ）"""
+    global _client_state
+    with _client_lock:
+        if _client_state is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name='mlb-games-client', daemon=True).start()
+            client = httpx.AsyncClient(
+                timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+                limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS),
+            )
+            _client_state = {'loop': loop, 'client': client, 'inflight': {}}
+            atexit.register(_close_client)
+        return _client_state
+
+
+def _close_client():
+    state = _client_state
+    asyncio.run_coroutine_threadsafe(state['client'].aclose(), state['loop']).result(timeout=5)
+    state['loop'].call_soon_threadsafe(state['loop'].stop)
+
+
+async def _request(client, team_id, date):
+    response = await client.get(SCHEDULE_URL, params=_schedule_params(team_id, date))
+    response.raise_for_status()
+    return parse_schedule(response.json())
+
+
+async def _coalesced(state, team_id, date):
+    """
+    専用ループで実行: 同じ (チームID, 日付) の取得が同時に来た場合は1回の取得にまとめる
+    （ループは1つなので、ワーカー内のすべてのリクエストでまとめられる）
+    """
+    key = _cache_key(team_id, date)
+    inflight = state['inflight']
+    task = inflight.get(key)
+    if task is None:
+        task = inflight[key] = asyncio.ensure_future(_request(state['client'], team_id, date))
+        task.add_done_callback(lambda _: inflight.pop(key, None))
+    # 待っているリクエストが切断されても、他のリクエストが待つ取得は止めない
+    return await asyncio.shield(task)
+
+
+async def afind_game(team_id, date):
+    """find_game の非同期版（httpx がない場合はスレッドで find_game を実行）"""
+    if httpx is None:
+        return await sync_to_async(find_game, thread_sensitive=False)(team_id, date)
+    state = _client()
+    future = asyncio.run_coroutine_threadsafe(_coalesced(state, team_id, date), state['loop'])
+    return await asyncio.wrap_future(future)
+
+
+def _stored_game_ids(team_id, date):
+    # カードの発行日は試合日の翌日
+    release_date = datetime.strptime(date, '%Y-%m-%d').date() + timedelta(days=1)
+    return ToppsCard.objects.filter(
+        team__mlb_team_id=int(team_id), release_date=release_date, mlb_game_id__isnull=False,
+    ).values_list('mlb_game_id', flat=True)
+
+
+def _stored_response(game_id):
+    # 対戦カード・スコアは保存していないので None
+    return {
+        'game_id': game_id,
+        'away_team': None,
+        'home_team': None,
+        'away_score': None,
+        'home_score': None,
+        'status': None,
+        'game_url': f"https://www.mlb.com/gameday/{game_id}",
+    }
+
+
+def stored_game(team_id, date):
+    """fetch_game_ids で保存済みの ToppsCard.mlb_game_id から試合を引く"""
+    game_id = _stored_game_ids(team_id, date).first()
+    return None if game_id is None else _stored_response(game_id)
+
+
+async def astored_game(team_id, date):
+    game_id = await _stored_game_ids(team_id, date).afirst()
+    return None if game_id is None else _stored_response(game_id)
+
+
+def cached_game(team_id, date):
+    """
+    キャッシュ・保存済みのカードだけを見る（APIは呼ばない）
+    戻り値: (見つかったかどうか, 試合 or None)
+    """
+    cached = cache.get(_cache_key(team_id, date))
+    if cached is not None:
+        return True, cached['game']
+    game = stored_game(team_id, date)
+    if game is not None:
+        cache.set(_cache_key(team_id, date), {'game': game}, FINAL_GAME_TIMEOUT)
+        return True, game
+    return False, None
+
+
+async def acached_game(team_id, date):
+    cached = await cache.aget(_cache_key(team_id, date))
+    if cached is not None:
+        return True, cached['game']
+    game = await astored_game(team_id, date)
+    if game is not None:
+        await cache.aset(_cache_key(team_id, date), {'game': game}, FINAL_GAME_TIMEOUT)
+        return True, game
+    return False, None
+
+
+def _timeout(game):
+    if game is None:
+        return NO_GAME_TIMEOUT
+    if game['status'] in FINAL_STATUSES:
+        return FINAL_GAME_TIMEOUT
+    return LIVE_GAME_TIMEOUT
+
+
+def get_game(team_id, date):
+    """
+    キャッシュ → 保存済みのカード → MLB Stats API の順に試合を引く
+    同じ (チームID, 日付) の取得が同時に来た場合は、最初の1件だけがAPIを呼び、残りはその結果を待つ
+    """
+    found, game = cached_game(team_id, date)
+    if found:
+        return game
+
+    key = _cache_key(team_id, date)
+    with _inflight_lock:
+        call = _inflight.get(key)
+        leader = call is None
+        if leader:
+            call = _inflight[key] = {'done': threading.Event(), 'game': None, 'error': None}
+
+    if not leader:
+        call['done'].wait()
+        if call['error'] is not None:
+            raise call['error']
+        return call['game']
+
+    try:
+        game = find_game(team_id, date)
+        cache.set(key, {'game': game}, _timeout(game))
+        call['game'] = game
+        return game
+    except Exception as e:
+        call['error'] = e
+        raise
+    finally:
+        with _inflight_lock:
+            del _inflight[key]
+        call['done'].set()
+
+
+async def aget_game(team_id, date):
+    """get_game の非同期版（同時の問い合わせは afind_game で1回の取得にまとめる）"""
+    found, game = await acached_game(team_id, date)
+    if found:
+        return game
+
+    game = await afind_game(team_id, date)
+    await cache.aset(_cache_key(team_id, date), {'game': game}, _timeout(game))
+    return game
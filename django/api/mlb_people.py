@@ -0,0 +1,130 @@
+"""
+MLB Stats API の選手情報のまとめ取得と選手名マッチング
+- シーズンの全選手（sports/1/players）を1回のリクエストで取得し、正規化した名前の索引から
+  ローカルで Player と MLB の選手IDを突き合わせる
+- 選手詳細は people?personIds= でバッチ取得する
+"""
+import re
+import time
+import unicodedata
+
+try:
+    import statsapi
+except ImportError:
+    statsapi = None
+
+# 名前の末尾から取り除く世代表記
+NAME_SUFFIXES = frozenset({'jr', 'sr', 'ii', 'iii', 'iv', 'v'})
+
+_non_word = re.compile(r"[.'’`]")
+_separators = re.compile(r'[-‐–\s]+')
+
+
+def normalize_player_name(name):
+    """
+    選手名を照合用に正規化する
+    アクセント除去・小文字化・ピリオドとアポストロフィの除去・世代表記（Jr. / III 等）の除去
+    例: "Ronald Acuña Jr." → "ronald acuna", "J.D. Martinez" → "jd martinez"
+    """
+    if not name:
+        return ''
+    name = unicodedata.normalize('NFKD', name)
+    name = ''.join(c for c in name if not unicodedata.combining(c))
+    name = _non_word.sub('', name.lower())
+    tokens = [t for t in _separators.split(name.replace(',', ' ')) if t]
+    while len(tokens) > 1 and tokens[-1] in NAME_SUFFIXES:
+        tokens.pop()
+    return ' '.join(tokens)
+
+
+def fetch_season_people(seasons, sport_id=1):
+    """
+    指定シーズンの全選手（sports/{sportId}/players）を取得し、選手IDごとにまとめる
+    同じ選手が複数シーズンに含まれる場合は新しいシーズンの情報を優先する
+    """
+    people = {}
+    for season in sorted(seasons):
+        data = statsapi.get('sports_players', {'sportId': sport_id, 'season': season})
+        for person in data.get('people', []):
+            people[person['id']] = person
+    return people
+
+
+def fetch_people(person_ids, batch_size=100, fields=None, delay=0):
+    """
+    people?personIds=1,2,3 で選手情報をまとめて取得し、バッチごとに選手dictのリストを返す
+    fields: レスポンスを絞り込む fields パラメータ（例: 'people,id,birthCountry'）
+    """
+    person_ids = list(person_ids)
+    for start in range(0, len(person_ids), batch_size):
+        if start and delay:
+            time.sleep(delay)
+        batch = person_ids[start:start + batch_size]
+        params = {'personIds': ','.join(str(pid) for pid in batch)}
+        if fields:
+            params['fields'] = fields
+        data = statsapi.get('people', params)
+        yield batch, data.get('people', [])
+
+
+class PlayerNameIndex:
+    """MLB選手の正規化名 → 候補リストの索引"""
+
+    def __init__(self, people):
+        self.by_name = {}
+        self.by_last_name = {}
+        for person in people:
+            first_names = {person.get('firstName'), person.get('useName')}
+            last_names = {person.get('lastName'), person.get('useLastName')}
+            names = {person.get('fullName'), person.get('nameFirstLast')}
+            names.update(
+                f'{first} {last}' for first in first_names for last in last_names if first and last
+            )
+            for name in names:
+                self._add(self.by_name, normalize_player_name(name), person)
+            for last in last_names:
+                self._add(self.by_last_name, normalize_player_name(last), person)
+
+    @staticmethod
+    def _add(index, key, person):
+        if not key:
+            return
+        candidates = index.setdefault(key, [])
+        if person not in candidates:
+            candidates.append(person)
+
+    def candidates(self, full_name, first_name='', last_name=''):
+        """フルネーム一致の候補、なければラストネーム一致かつファーストネームを含む候補"""
+        results = self.by_name.get(normalize_player_name(full_name))
+        if results:
+            return results
+        first = normalize_player_name(first_name)
+        if not first or not last_name:
+            return []
+        return [
+            person for person in self.by_last_name.get(normalize_player_name(last_name), [])
+            if first in normalize_player_name(person.get('fullName'))
+        ]
+
+    def resolve(self, full_name, first_name='', last_name='', mlb_team_id=None):
+        """
+        候補を1人に絞り込む
+        戻り値: (選手dict または None, 候補リスト)
+        複数候補の場合は所属チーム → アクティブの順で絞り込み、決まらなければ None
+        """
+        results = self.candidates(full_name, first_name, last_name)
+        if len(results) <= 1:
+            return (results[0] if results else None), results
+
+        pool = results
+        if mlb_team_id is not None:
+            team_matches = [r for r in results if r.get('currentTeam', {}).get('id') == mlb_team_id]
+            if len(team_matches) == 1:
+                return team_matches[0], results
+            if team_matches:
+                pool = team_matches
+
+        active = [r for r in pool if r.get('active', False)]
+        if len(active) == 1:
+            return active[0], results
+        return None, results
@@ -1,4 +1,7 @@
+import uuid
+
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 
 
@@ -355,6 +358,8 @@ class PlayerStats(models.Model):
     home_runs = models.PositiveIntegerField(null=True, blank=True, help_text="本塁打")
     rbi = models.PositiveIntegerField(null=True, blank=True, help_text="打点")
     stolen_bases = models.PositiveIntegerField(null=True, blank=True, help_text="盗塁")
+    batter_strikeouts = models.PositiveIntegerField(null=True, blank=True, help_text="三振")
+    sac_flies = models.PositiveIntegerField(null=True, blank=True, help_text="犠飛")
     batting_avg = models.DecimalField(
         max_digits=4, decimal_places=3, null=True, blank=True,
         help_text="打率"
@@ -393,6 +398,28 @@ class PlayerStats(models.Model):
         help_text="WHIP"
     )
 
+    # 派生指標（api/derived_stats.py でシーズンごとにまとめて計算）
+    iso = models.DecimalField(
+        max_digits=4, decimal_places=3, null=True, blank=True,
+        help_text="ISO（長打率 - 打率）"
+    )
+    babip = models.DecimalField(
+        max_digits=4, decimal_places=3, null=True, blank=True,
+        help_text="BABIP（(安打 - 本塁打) / (打数 - 三振 - 本塁打 + 犠飛)）"
+    )
+    k_per_9 = models.DecimalField(
+        max_digits=5, decimal_places=2, null=True, blank=True,
+        help_text="K/9（9イニングあたりの奪三振）"
+    )
+    bb_per_9 = models.DecimalField(
+        max_digits=5, decimal_places=2, null=True, blank=True,
+        help_text="BB/9（9イニングあたりの与四球）"
+    )
+    k_bb = models.DecimalField(
+        max_digits=5, decimal_places=2, null=True, blank=True,
+        help_text="K/BB（奪三振 / 与四球）"
+    )
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -408,6 +435,80 @@ class PlayerStats(models.Model):
         return f"{self.player.full_name} {self.season} {self.stat_type}"
 
 
+class PlayerGameLog(models.Model):
+    """
+    試合ごとの成績（fetch_player_stats で取得）
+    カード発行日時点の直近の成績（ToppsCard.rolling_*）の計算に使う
+    """
+    player = models.ForeignKey(Player, on_delete=models.CASCADE, related_name="game_logs")
+    season = models.PositiveIntegerField(help_text="シーズン年")
+    stat_type = models.CharField(max_length=10, choices=StatType.choices)
+    game_pk = models.PositiveIntegerField(help_text="MLB Stats API gamePk")
+    game_date = models.DateField()
+
+    # 打撃成績
+    at_bats = models.PositiveSmallIntegerField(default=0)
+    hits = models.PositiveSmallIntegerField(default=0)
+    doubles = models.PositiveSmallIntegerField(default=0)
+    triples = models.PositiveSmallIntegerField(default=0)
+    home_runs = models.PositiveSmallIntegerField(default=0)
+    hit_by_pitch = models.PositiveSmallIntegerField(default=0)
+    sac_flies = models.PositiveSmallIntegerField(default=0)
+
+    # 投球成績
+    outs = models.PositiveSmallIntegerField(default=0, help_text="奪ったアウト数（投球回 × 3）")
+    earned_runs = models.PositiveSmallIntegerField(default=0)
+
+    # 共通（打撃は三振・四球、投球は奪三振・与四球）
+    strikeouts = models.PositiveSmallIntegerField(default=0)
+    walks = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        ordering = ["player", "game_date"]
+        unique_together = [["player", "game_pk", "stat_type"]]
+        indexes = [
+            models.Index(fields=["season", "stat_type"]),
+        ]
+
+    def __str__(self):
+        return f"{self.player.full_name} {self.game_date} {self.stat_type}"
+
+
+class LeaderboardEntry(models.Model):
+    """
+    シーズン・指標ごとの上位N人（api/leaderboards.py で PlayerStats から作る）
+    /api/leaderboards/ は (season, stat) のインデックスで1回のクエリで返す
+    （fetch_player_stats / refresh_leaderboards コマンドで更新）
+    """
+    season = models.PositiveIntegerField(help_text="シーズン年")
+    stat = models.CharField(max_length=20, help_text="指標（home_runs, batting_avg など）")
+    rank = models.PositiveSmallIntegerField(help_text="順位（同率は同じ順位）")
+
+    player = models.ForeignKey(Player, on_delete=models.CASCADE, related_name="leaderboard_entries")
+    player_name = models.CharField(max_length=255)
+    team_abbreviation = models.CharField(max_length=10, blank=True)
+
+    value = models.DecimalField(max_digits=7, decimal_places=3)
+    qualifier_value = models.DecimalField(
+        max_digits=6, decimal_places=1, null=True, blank=True,
+        help_text="規定の判定に使った値（打数・投球回）"
+    )
+    qualifier_min = models.DecimalField(
+        max_digits=6, decimal_places=1, null=True, blank=True,
+        help_text="規定打数・規定投球回"
+    )
+
+    class Meta:
+        ordering = ["season", "stat", "rank"]
+        unique_together = [["season", "stat", "player"]]
+        indexes = [
+            models.Index(fields=["season", "stat", "rank"]),
+        ]
+
+    def __str__(self):
+        return f"{self.season} {self.stat} #{self.rank} {self.player_name}"
+
+
 # =========================
 # Topps Cards
 # =========================
@@ -451,8 +552,27 @@ class ToppsCard(models.Model):
     product_url_long = models.CharField(max_length=500, blank=True, help_text="Topps公式商品ページURL（長い形式）")
     release_date = models.DateField(null=True, blank=True, help_text="カード発行日")
     mlb_game_id = models.PositiveIntegerField(null=True, blank=True, help_text="MLB Game ID（試合日のgameday ID）")
+    thumbnails = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="ローカルのサムネイルURL（{幅: {形式: URL}}、generate_card_thumbnails で生成）"
+    )
+    thumbnail_source = models.CharField(
+        max_length=500,
+        blank=True,
+        help_text="サムネイル生成元の画像URL（image_url が変わったら再生成）"
+    )
+
+    # 発行日時点の直近 ROLLING_DAYS 日間の成績（api/derived_stats.py で PlayerGameLog から計算）
+    rolling_avg = models.DecimalField(max_digits=4, decimal_places=3, null=True, blank=True, help_text="直近の打率")
+    rolling_ops = models.DecimalField(max_digits=4, decimal_places=3, null=True, blank=True, help_text="直近のOPS")
+    rolling_home_runs = models.PositiveSmallIntegerField(null=True, blank=True, help_text="直近の本塁打")
+    rolling_era = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True, help_text="直近の防御率")
+    rolling_k_per_9 = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True, help_text="直近のK/9")
 
     created_at = models.DateTimeField(auto_now_add=True)
+    # 一覧APIのキャッシュのバージョンに使う（bulk_update / update() では明示的に更新する）
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = [["topps_set", "card_number"]]
@@ -497,12 +617,54 @@ class ToppsCard(models.Model):
             short_url, long_url = self.generate_product_urls()
             self.product_url = short_url
             self.product_url_long = long_url
+        # 画像が差し替えられたら古いサムネイルは使わない（generate_card_thumbnails で再生成）
+        if self.thumbnails and self.thumbnail_source != self.image_url:
+            self.thumbnails = {}
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'image_url' in update_fields:
+                kwargs['update_fields'] = {*update_fields, 'thumbnails'}
+        # update_fields を指定した保存でも updated_at を更新する
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'updated_at'}
         super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.topps_set} #{self.card_number} {self.player.full_name}"
 
 
+class ToppsCardSearch(models.Model):
+    """
+    カード一覧API用の非正規化リードモデル
+    ToppsCard → Player / Team / ToppsSet のJOINをせずに一覧を返すため、
+    検索キーとシリアライズ済みJSONをカードごとに保持する
+    （refresh_card_search コマンド・管理画面での編集時、カードを一括更新するコマンドの最後に更新）
+    """
+    card = models.OneToOneField(
+        ToppsCard, on_delete=models.CASCADE, primary_key=True, related_name="search_entry"
+    )
+
+    card_number = models.CharField(max_length=20)
+    player_name_key = models.CharField(max_length=255, help_text="検索用に正規化した選手名")
+    year = models.PositiveIntegerField(help_text="セットの年")
+    card_created_at = models.DateTimeField(help_text="カードの作成日時（並び順用）")
+
+    document = models.TextField(help_text="ToppsCardSerializerの出力（JSON）")
+    document_hash = models.CharField(max_length=40)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-card_created_at"]
+        indexes = [
+            models.Index(fields=["card_number"]),
+            models.Index(fields=["year", "card_created_at"]),
+            models.Index(fields=["card_created_at"]),
+        ]
+
+    def __str__(self):
+        return f"search entry for card {self.card_id}"
+
+
 class CardVariantType(models.TextChoices):
     BASE = "BASE", "Base"
     PARALLEL = "PARALLEL", "Parallel"
@@ -605,3 +767,53 @@ class WBCRosterEntry(models.Model):
 
     def __str__(self):
         return f"{self.player_name} ({self.country}, WBC {self.tournament.year})"
+
+
+# =========================
+# バックグラウンドジョブ
+# =========================
+
+class JobStatus(models.TextChoices):
+    PENDING = 'PENDING', '待機中'
+    RUNNING = 'RUNNING', '実行中'
+    SUCCEEDED = 'SUCCEEDED', '完了'
+    FAILED = 'FAILED', '失敗'
+
+
+class BackgroundJob(models.Model):
+    """
+    APIから登録し、run_jobs ワーカーが実行するジョブ
+    外部APIの取得やスクレイピングなど時間のかかる処理をリクエストの外で行う（api/jobs.py）
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    task = models.CharField(max_length=100, help_text="api/jobs.py に登録したタスク名")
+    payload = models.JSONField(default=dict, blank=True)
+    dedupe_key = models.CharField(
+        max_length=255, blank=True, db_index=True,
+        help_text="同じキーの未完了ジョブがあれば新しく登録せずにそれを返す",
+    )
+
+    status = models.CharField(max_length=20, choices=JobStatus.choices, default=JobStatus.PENDING)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+
+    run_after = models.DateTimeField(default=timezone.now, help_text="この時刻以降に実行する（リトライ時の待機）")
+    worker = models.CharField(max_length=100, blank=True, help_text="実行中のワーカー")
+    requested_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='background_jobs'
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'run_after']),
+        ]
+
+    def __str__(self):
+        return f"{self.task} [{self.get_status_display()}] {self.id}"
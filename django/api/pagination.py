@@ -0,0 +1,22 @@
+from rest_framework.pagination import PageNumberPagination
+
+
+class PlayerPagination(PageNumberPagination):
+    """
+    選手一覧用のページネーション
+    一覧は最新シーズンの成績のみを返すため、1ページの件数を多めにしている
+    ?page_size= で変更可能（上限あり）
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class BlogPagination(PageNumberPagination):
+    """
+    ブログ一覧用のページネーション
+    ?page_size= で変更可能（上限あり）
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
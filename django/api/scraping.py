@@ -0,0 +1,147 @@
+"""
+スクレイピング共通処理
+- 取得したページ（HTML / JSON）のローカル保存（内容のハッシュで重複排除・gzip圧縮）
+  パーサーを修正した際に、再スクレイピングせず保存済みページから再抽出できるようにする（reparse_pages）
+- lxml の要素から WebDriver の element.text 相当のテキストを取り出す
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import tempfile
+
+from django.conf import settings
+from django.utils import timezone
+
+# innerText と同様に前後で改行する要素
+BLOCK_TAGS = frozenset({
+    'address', 'article', 'aside', 'blockquote', 'br', 'dd', 'div', 'dl', 'dt',
+    'fieldset', 'figcaption', 'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4',
+    'h5', 'h6', 'header', 'hr', 'li', 'main', 'nav', 'ol', 'p', 'pre', 'section',
+    'table', 'tr', 'ul',
+})
+# 表示されない要素
+SKIP_TAGS = frozenset({'script', 'style', 'noscript', 'template', 'head', 'title'})
+
+_display_none = re.compile(r'display\s*:\s*none|visibility\s*:\s*hidden', re.IGNORECASE)
+
+
+def _is_hidden(element):
+    return (
+        element.tag in SKIP_TAGS
+        or element.get('hidden') is not None
+        or element.get('aria-hidden') == 'true'
+        or bool(_display_none.search(element.get('style', '')))
+    )
+
+
+def _collect_text(element, chunks):
+    if not isinstance(element.tag, str) or _is_hidden(element):
+        return
+    block = element.tag in BLOCK_TAGS
+    if block:
+        chunks.append('\n')
+    if element.text:
+        chunks.append(element.text)
+    for child in element:
+        _collect_text(child, chunks)
+        if child.tail:
+            chunks.append(child.tail)
+    if block:
+        chunks.append('\n')
+
+
+def element_text(element):
+    """
+    WebDriverの element.text（innerText）相当のテキスト
+    ブロック要素の境界で改行し、行内の空白をまとめ、空行を除く
+    """
+    chunks = []
+    _collect_text(element, chunks)
+    lines = (' '.join(line.split()) for line in ''.join(chunks).split('\n'))
+    return '\n'.join(line for line in lines if line)
+
+
+class PageStore:
+    """
+    取得ページの保存先
+    objects/<sha256の先頭2文字>/<sha256>.gz   本文（同じ内容は1つだけ保存）
+    index/<種別>/<取得日>/<URLのsha1>.json    URL・取得日時・本文のハッシュ・付加情報
+    同じURLを同じ日に複数回取得した場合はインデックスを上書きする（最新のみ保持）
+    """
+
+    def __init__(self, root=None):
+        self.root = str(root or settings.SCRAPE_STORE_DIR)
+
+    def _object_path(self, digest):
+        return os.path.join(self.root, 'objects', digest[:2], f'{digest}.gz')
+
+    @staticmethod
+    def _write_atomic(path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def put(self, kind, url, content, content_type='text/html', meta=None):
+        """ページを保存してインデックスのエントリを返す"""
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        digest = hashlib.sha256(content).hexdigest()
+        object_path = self._object_path(digest)
+        if not os.path.exists(object_path):
+            self._write_atomic(object_path, gzip.compress(content, mtime=0))
+
+        fetched_at = timezone.now()
+        entry = {
+            'kind': kind,
+            'url': url,
+            'fetched_at': fetched_at.isoformat(),
+            'sha256': digest,
+            'size': len(content),
+            'content_type': content_type,
+            'meta': meta or {},
+        }
+        url_key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        index_path = os.path.join(
+            self.root, 'index', kind, timezone.localdate(fetched_at).isoformat(), f'{url_key}.json'
+        )
+        self._write_atomic(index_path, json.dumps(entry, ensure_ascii=False).encode('utf-8'))
+        return entry
+
+    def read(self, entry):
+        """エントリの本文（文字列）"""
+        with open(self._object_path(entry['sha256']), 'rb') as f:
+            return gzip.decompress(f.read()).decode('utf-8')
+
+    def entries(self, kind, since=None, until=None):
+        """種別のエントリを取得日順に返す（since / until は date）"""
+        kind_dir = os.path.join(self.root, 'index', kind)
+        if not os.path.isdir(kind_dir):
+            return
+        for day in sorted(os.listdir(kind_dir)):
+            if since and day < since.isoformat():
+                continue
+            if until and day > until.isoformat():
+                continue
+            day_dir = os.path.join(kind_dir, day)
+            for name in sorted(os.listdir(day_dir)):
+                if not name.endswith('.json'):
+                    continue
+                with open(os.path.join(day_dir, name), encoding='utf-8') as f:
+                    yield json.load(f)
+
+    def latest_entries(self, kind, since=None, until=None):
+        """URLごとに最新のエントリだけを返す"""
+        latest = {}
+        for entry in self.entries(kind, since=since, until=until):
+            current = latest.get(entry['url'])
+            if current is None or entry['fetched_at'] > current['fetched_at']:
+                latest[entry['url']] = entry
+        return list(latest.values())
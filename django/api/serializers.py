@@ -1,7 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from .models import (
-    Account, Session, VerificationToken, News, Inquiry, Blog, Contact,
+    Account, Session, VerificationToken, News, Inquiry, Blog, Contact, BackgroundJob,
     Team, Player, PlayerStats, ToppsSet, ToppsCard, ToppsCardVariant,
     WBCTournament, WBCGame, WBCRosterEntry
 )
@@ -121,6 +121,18 @@ class BlogSerializer(serializers.ModelSerializer):
         return None
 
 
+class BackgroundJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BackgroundJob
+        fields = ['id', 'task', 'status', 'result', 'error', 'attempts', 'created_at', 'started_at', 'finished_at']
+        read_only_fields = fields
+
+
+class JobCommandSerializer(serializers.Serializer):
+    command = serializers.CharField()
+    options = serializers.DictField(required=False, default=dict)
+
+
 # JWT Token Serializers
 class LoginSerializer(serializers.Serializer):
     email = serializers.EmailField()
@@ -132,6 +144,29 @@ class TokenSerializer(serializers.Serializer):
     refresh = serializers.CharField()
 
 
+class SparseFieldsMixin:
+    """
+    fields / expand 引数で出力フィールドを絞り込むシリアライザー用Mixin
+    - fields: 出力するフィールド名（None は全フィールド）
+    - expand: ネスト展開する関連フィールド名（None は全て展開）
+      指定外の関連はIDのみ、逆参照（many=True）は出力しない
+    """
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        if expand is not None:
+            for name, field in list(self.fields.items()):
+                if name in expand:
+                    continue
+                if isinstance(field, serializers.ListSerializer):
+                    self.fields.pop(name)
+                elif isinstance(field, serializers.BaseSerializer):
+                    self.fields[name] = serializers.PrimaryKeyRelatedField(read_only=True)
+
+
 # Topps NOW Serializers
 class TeamSerializer(serializers.ModelSerializer):
     class Meta:
@@ -146,16 +181,19 @@ class PlayerStatsSerializer(serializers.ModelSerializer):
             'id', 'season', 'stat_type',
             # 打撃成績
             'games', 'at_bats', 'runs', 'hits', 'doubles', 'triples',
-            'home_runs', 'rbi', 'stolen_bases', 'batting_avg', 'obp', 'slg', 'ops',
+            'home_runs', 'rbi', 'stolen_bases', 'batter_strikeouts', 'sac_flies',
+            'batting_avg', 'obp', 'slg', 'ops',
             # 投球成績
             'wins', 'losses', 'era', 'games_pitched', 'games_started',
             'saves', 'innings_pitched', 'strikeouts', 'walks_allowed', 'whip',
+            # 派生指標
+            'iso', 'babip', 'k_per_9', 'bb_per_9', 'k_bb',
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class PlayerSerializer(serializers.ModelSerializer):
+class PlayerSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     team = TeamSerializer(read_only=True)
     stats = PlayerStatsSerializer(many=True, read_only=True)
 
@@ -220,7 +258,7 @@ class WBCTournamentDetailSerializer(serializers.ModelSerializer):
         fields = ['id', 'year', 'champion', 'runner_up', 'games']
 
 
-class ToppsCardSerializer(serializers.ModelSerializer):
+class ToppsCardSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     player = PlayerSimpleSerializer(read_only=True)
     team = TeamSerializer(read_only=True)
     topps_set = ToppsSetSerializer(read_only=True)
@@ -229,8 +267,8 @@ class ToppsCardSerializer(serializers.ModelSerializer):
         model = ToppsCard
         fields = [
             'id', 'topps_set', 'card_number', 'player', 'team',
-            'title', 'total_print', 'image_url', 'is_rookie',
+            'title', 'total_print', 'image_url', 'thumbnails', 'is_rookie',
             'product_url', 'product_url_long', 'release_date', 'mlb_game_id', 'created_at'
         ]
-        read_only_fields = ['id', 'created_at', 'player', 'team', 'topps_set', 'card_number']
+        read_only_fields = ['id', 'created_at', 'player', 'team', 'topps_set', 'card_number', 'thumbnails']
         # 更新可能フィールド: product_url, product_url_long, release_date, total_print, title, image_url
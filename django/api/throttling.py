@@ -1,3 +1,6 @@
+from rest_framework.exceptions import Throttled
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
 from rest_framework.throttling import AnonRateThrottle, SimpleRateThrottle
 import logging
 
@@ -12,7 +15,90 @@ class LoginRateThrottle(AnonRateThrottle):
     scope = 'login'
 
 
-class ToppsCardListThrottle(SimpleRateThrottle):
+class SlidingWindowRateThrottle(SimpleRateThrottle):
+    """
+    スライディングウィンドウカウンター方式のレート制限
+    SimpleRateThrottleはクライアントごとにタイムスタンプのリストを保存・更新するが、
+    こちらは現在と直前のウィンドウのカウンター2つだけを保持する（メモリO(1)）。
+    直前ウィンドウのカウントを経過率で按分してリクエスト数を推定する。
+    スコープ・レート設定（DEFAULT_THROTTLE_RATES）はSimpleRateThrottleと共通
+
+    カウンターはキャッシュの incr で加算するため、ワーカー間で制限を守るには
+    共有キャッシュ（settings.CACHES の Redis）が必要。プロセスごとのメモリキャッシュでは
+    ワーカー数の分だけ上限が緩くなる
+    """
+    cache_format = 'throttle_sw_%(scope)s_%(ident)s'
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        window = int(self.now // self.duration)
+        current_key = f'{self.key}_{window}'
+        previous_key = f'{self.key}_{window - 1}'
+        weight = 1 - (self.now % self.duration) / self.duration
+
+        # このリクエストを加えると上限を超えるクライアントは加算せずに拒否する
+        # （拒否が大半のスクレイパーへの応答はキャッシュ操作1回で済む）
+        counts = self.cache.get_many([current_key, previous_key])
+        self.current_count = counts.get(current_key, 0)
+        self.previous_count = counts.get(previous_key, 0)
+        if self.previous_count * weight + self.current_count + 1 > self.num_requests:
+            return self.throttle_failure()
+
+        # 加算後の値で判定し直す（取得と加算の間に他のワーカーのリクエストが割り込んでも上限を超えない）
+        self.current_count = self._increment(current_key)
+        if self.previous_count * weight + self.current_count > self.num_requests:
+            try:
+                self.current_count = self.cache.decr(current_key)
+            except ValueError:
+                pass
+            return self.throttle_failure()
+        return self.throttle_success()
+
+    def _increment(self, key):
+        """カウンターをアトミックに加算して加算後の値を返す（存在しなければ作成）"""
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            pass
+        # 直前ウィンドウとして参照されるため、ウィンドウ2つ分保持する
+        if self.cache.add(key, 1, self.duration * 2):
+            return 1
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # add と incr の間に期限切れになった場合
+            self.cache.set(key, 1, self.duration * 2)
+            return 1
+
+    def throttle_success(self):
+        return True
+
+    def wait(self):
+        """
+        次のリクエストが許可されるまでの推定秒数
+        allow_request と同じ条件（previous * weight + current + 1 <= num_requests）を満たす時刻から求める
+        """
+        window_elapsed = self.now % self.duration
+        if self.current_count + 1 <= self.num_requests:
+            if not self.previous_count:
+                return 0
+            # このウィンドウ内で直前ウィンドウの按分カウントが十分小さくなるまで待つ
+            ratio = 1 - (self.num_requests - self.current_count - 1) / self.previous_count
+            return max(ratio * self.duration - window_elapsed, 0)
+        # このウィンドウでは許可されないので次のウィンドウまで待つ
+        # （次のウィンドウでは現在のカウントが直前ウィンドウ分になり、経過率で按分される）
+        ratio = 1 - (self.num_requests - 1) / self.current_count
+        return self.duration - window_elapsed + max(ratio, 0) * self.duration
+
+
+class ToppsCardListThrottle(SlidingWindowRateThrottle):
     """
     Toppsカード一覧API専用のレート制限
     スクレイピング防止
@@ -34,7 +120,7 @@ class ToppsCardListThrottle(SimpleRateThrottle):
         return False
 
 
-class BurstThrottle(SimpleRateThrottle):
+class BurstThrottle(SlidingWindowRateThrottle):
     """
     短時間での連続リクエストを制限
     スクレイピングボット対策
@@ -47,3 +133,23 @@ class BurstThrottle(SimpleRateThrottle):
             'scope': self.scope,
             'ident': ident
         }
+
+
+def check_throttles(request, throttle_classes=None):
+    """
+    DRFを通さないビュー（非同期ビュー）用のレート制限
+    DRFのビューと同じく認証（DEFAULT_AUTHENTICATION_CLASSES）してから
+    throttle_classes（デフォルト: DEFAULT_THROTTLE_CLASSES）を適用し、超えた場合は Throttled を送出する
+    認証でDBにアクセスするため、非同期ビューからは sync_to_async で呼ぶ
+    """
+    drf_request = Request(
+        request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    )
+    if throttle_classes is None:
+        throttle_classes = api_settings.DEFAULT_THROTTLE_CLASSES
+    durations = []
+    for throttle in (throttle_class() for throttle_class in throttle_classes):
+        if not throttle.allow_request(drf_request, None):
+            durations.append(throttle.wait())
+    if durations:
+        raise Throttled(max((d for d in durations if d is not None), default=None))
@@ -5,7 +5,8 @@ from .views import (
     UserViewSet, AccountViewSet, SessionViewSet, VerificationTokenViewSet,
     NewsViewSet, InquiryViewSet, BlogViewSet, ContactViewSet, ToppsCardViewSet,
     PlayerViewSet, TeamViewSet, WBCTournamentViewSet,
-    login_view, register_view, current_user_view, get_game_id, upload_image
+    login_view, register_view, current_user_view, get_game_id, upload_image,
+    bot_detection_stats, compression_stats, enqueue_command, job_status, leaderboards
 )
 
 router = DefaultRouter()
@@ -32,6 +33,19 @@ urlpatterns = [
     # Upload
     path('upload/image/', upload_image, name='upload_image'),
 
+    # Anti-scraping
+    path('security/bot-stats/', bot_detection_stats, name='bot_detection_stats'),
+
+    # Metrics
+    path('metrics/compression/', compression_stats, name='compression_stats'),
+
+    # Leaderboards
+    path('leaderboards/', leaderboards, name='leaderboards'),
+
+    # Background jobs
+    path('jobs/', enqueue_command, name='enqueue_command'),
+    path('jobs/<uuid:job_id>/', job_status, name='job_status'),
+
     # MLB API endpoints
     path('mlb/game/', get_game_id, name='get_game_id'),
 
@@ -1,21 +1,36 @@
+import hashlib
 import logging
-import uuid
-import os
-from rest_framework import viewsets, status
+from datetime import datetime
+from rest_framework import exceptions, serializers, viewsets, status
 from rest_framework.decorators import api_view, permission_classes, action, throttle_classes
 from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from django.conf import settings
-from .throttling import LoginRateThrottle, ToppsCardListThrottle, BurstThrottle
+from .throttling import LoginRateThrottle, ToppsCardListThrottle, BurstThrottle, check_throttles
+from .pagination import BlogPagination, PlayerPagination
+from .bot_detection import get_classifier
+from .fast_serializers import ValuesSerializer, render_json
+from .card_search import normalize_search_key, refresh_card_search
+from .leaderboards import LEADERBOARDS, TOP_N as LEADERBOARD_TOP_N, format_value
+from . import blog_images, blog_views, compression, jobs, mlb_games
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model, authenticate
-from django.db.models import F
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Max, OuterRef, Prefetch, Subquery
+from django.core.cache import cache
+from django.http import Http404, HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.views.decorators.http import require_GET
+from asgiref.sync import sync_to_async
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from django.utils import timezone
 
 logger = logging.getLogger(__name__)
 from .models import (
-    Account, Session, VerificationToken, News, Inquiry, Blog, Contact,
-    Team, Player, PlayerStats, ToppsSet, ToppsCard, ToppsCardVariant,
+    Account, Session, VerificationToken, News, Inquiry, Blog, Contact, BackgroundJob,
+    Team, Player, PlayerStats, LeaderboardEntry, ToppsSet, ToppsCard, ToppsCardVariant, ToppsCardSearch,
     WBCTournament, WBCGame, WBCRosterEntry
 )
 from .serializers import (
@@ -24,7 +39,7 @@ from .serializers import (
     NewsSerializer, InquirySerializer, BlogSerializer, ContactSerializer,
     LoginSerializer, ToppsCardSerializer, PlayerSerializer, TeamSerializer,
     WBCTournamentListSerializer, WBCTournamentDetailSerializer,
-    WBCRosterEntrySerializer
+    WBCRosterEntrySerializer, BackgroundJobSerializer, JobCommandSerializer
 )
 
 User = get_user_model()
@@ -187,24 +202,35 @@ class BlogViewSet(viewsets.ModelViewSet):
     """
     Blog CRUD operations - Only superusers can create/update/delete
     IDまたはslugでアクセス可能
+    superuser以外には公開済み（published）のブログのみ返す
     """
-    queryset = Blog.objects.all()
     serializer_class = BlogSerializer
+    pagination_class = BlogPagination
+
+    def get_queryset(self):
+        queryset = Blog.objects.select_related('author')
+        if not self.request.user.is_superuser:
+            queryset = queryset.filter(published=True)
+        return queryset
 
     def get_object(self):
         """IDまたはslugでブログを取得"""
-        pk = self.kwargs.get('pk')
-        if pk and not pk.isdigit():
-            self.kwargs['pk'] = None
-            self.kwargs['slug'] = pk
-            try:
-                obj = Blog.objects.get(slug=pk)
-                self.check_object_permissions(self.request, obj)
-                return obj
-            except Blog.DoesNotExist:
-                from django.http import Http404
-                raise Http404
-        return super().get_object()
+        pk = self.kwargs['pk']
+        lookup = {'pk': pk} if pk.isdigit() else {'slug': pk}
+        obj = get_object_or_404(self.get_queryset(), **lookup)
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    def retrieve(self, request, *args, **kwargs):
+        # 公開中の記事はID/slugごとにキャッシュ（superuserは常に最新を返す）
+        if request.user.is_superuser:
+            return super().retrieve(request, *args, **kwargs)
+        cache_key = blog_views.detail_cache_key(kwargs['pk'])
+        data = cache.get(cache_key)
+        if data is None:
+            data = self.get_serializer(self.get_object()).data
+            cache.set(cache_key, data, blog_views.DETAIL_CACHE_TIMEOUT)
+        return Response(data)
 
     def get_permissions(self):
         if self.action in ['list', 'retrieve', 'increment_view']:
@@ -248,12 +274,23 @@ class BlogViewSet(viewsets.ModelViewSet):
             )
         return super().destroy(request, *args, **kwargs)
 
+    def perform_update(self, serializer):
+        old_slug = serializer.instance.slug
+        super().perform_update(serializer)
+        blog_views.invalidate_detail(serializer.instance, old_slug)
+
+    def perform_destroy(self, instance):
+        blog_views.invalidate_detail(instance)
+        super().perform_destroy(instance)
+
     @action(detail=True, methods=['post'], permission_classes=[AllowAny])
     def increment_view(self, request, pk=None):
-        blog = self.get_object()
-        Blog.objects.filter(pk=blog.pk).update(view_count=F('view_count') + 1)
-        blog.refresh_from_db()
-        return Response({'view_count': blog.view_count})
+        """閲覧数を1増やす（増分はキャッシュに貯めて定期的にまとめて反映、返す値は概算）"""
+        lookup = {'pk': pk} if pk.isdigit() else {'slug': pk}
+        row = Blog.objects.filter(**lookup).values_list('pk', 'view_count').first()
+        if row is None:
+            raise Http404
+        return Response({'view_count': blog_views.record_view(*row)})
 
 
 @api_view(['POST'])
@@ -276,19 +313,33 @@ def upload_image(request):
     if file.size > 5 * 1024 * 1024:
         return Response({'error': 'ファイルサイズは5MB以下にしてください'}, status=status.HTTP_400_BAD_REQUEST)
 
-    # ユニークなファイル名で保存
-    ext = os.path.splitext(file.name)[1].lower()
-    filename = f"{uuid.uuid4().hex}{ext}"
-    upload_dir = os.path.join(settings.MEDIA_ROOT, 'blog')
-    os.makedirs(upload_dir, exist_ok=True)
+    if blog_images.Image is None:
+        return Response(blog_images.save_original(file), status=status.HTTP_201_CREATED)
+
+    # メタデータを除いた 480/960/1600px のWebPを生成し（最大サイズ以外はジョブで生成）、URLの一覧を返す
+    try:
+        result = blog_images.handle_upload(file)
+    except ValueError:
+        return Response({'error': '画像として読み込めませんでした'}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(result, status=status.HTTP_201_CREATED)
 
-    filepath = os.path.join(upload_dir, filename)
-    with open(filepath, 'wb+') as dest:
-        for chunk in file.chunks():
-            dest.write(chunk)
 
-    url = f"{settings.MEDIA_URL}blog/{filename}"
-    return Response({'url': url}, status=status.HTTP_201_CREATED)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def bot_detection_stats(request):
+    """User-Agent/Referer判定のルール別ヒット数と処理時間（superuserのみ、プロセス単位）"""
+    if not request.user.is_superuser:
+        return Response({'error': '権限がありません'}, status=status.HTTP_403_FORBIDDEN)
+    return Response(get_classifier().stats())
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def compression_stats(request):
+    """一覧APIの圧縮率・キャッシュヒット・304の集計（superuserのみ、プロセス単位）"""
+    if not request.user.is_superuser:
+        return Response({'error': '権限がありません'}, status=status.HTTP_403_FORBIDDEN)
+    return Response(compression.stats.as_dict())
 
 
 @api_view(['GET'])
@@ -301,7 +352,197 @@ def current_user_view(request):
     return Response(serializer.data)
 
 
-class TeamViewSet(viewsets.ReadOnlyModelViewSet):
+class SparseFieldsetMixin:
+    """
+    ?fields= / ?expand= によるフィールド絞り込み（list / retrieve のみ）
+    シリアライザーの出力だけでなく、select_related / prefetch_related / only() の
+    対象も出力するフィールドに合わせて絞り込む
+      例: ?fields=id,title,image_url,player&expand=player
+    """
+    sparse_actions = ('list', 'retrieve')
+
+    def _get_csv_param(self, name):
+        value = self.request.query_params.get(name)
+        if value is None:
+            return None
+        return [v.strip() for v in value.split(',') if v.strip()]
+
+    def get_sparse_options(self):
+        if self.action not in self.sparse_actions:
+            return {}
+        options = {}
+        fields = self._get_csv_param('fields')
+        expand = self._get_csv_param('expand')
+        if fields is not None:
+            options['fields'] = fields
+        if expand is not None:
+            options['expand'] = expand
+        return options
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.update(self.get_sparse_options())
+        return super().get_serializer(*args, **kwargs)
+
+    def apply_sparse_fieldset(self, queryset):
+        """出力フィールドに必要な列・JOINだけを取得するようクエリを絞り込む"""
+        options = self.get_sparse_options()
+        if not options:
+            return queryset
+
+        serializer = self.get_serializer_class()(context=self.get_serializer_context(), **options)
+        model = queryset.model
+        only = [model._meta.pk.name]
+        select_related = []
+        prefetch_related = []
+
+        for field in serializer.fields.values():
+            if isinstance(field, serializers.ListSerializer):
+                prefetch_related.append(self.get_prefetch_lookup(field.source))
+            elif isinstance(field, serializers.ModelSerializer):
+                select_related.append(field.source)
+                only.append(field.source)
+                related_model = field.Meta.model
+                only.extend(
+                    f'{field.source}__{name}'
+                    for name in self._concrete_sources(related_model, field.fields.values())
+                )
+            else:
+                only.extend(self._concrete_sources(model, [field]))
+
+        # select_related() を引数なしで呼ぶと全FKを辿るため、空の場合は呼ばない
+        queryset = queryset.select_related(None).prefetch_related(None).only(*only)
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        return queryset
+
+    def get_prefetch_lookup(self, source):
+        """prefetch_related に渡すルックアップ（Prefetchで絞り込む場合はオーバーライド）"""
+        return source
+
+    @staticmethod
+    def _concrete_sources(model, fields):
+        """シリアライザーフィールドのうちモデルの実カラムに対応するものの名前"""
+        names = []
+        for field in fields:
+            if field.source == '*' or '.' in field.source:
+                continue
+            try:
+                model_field = model._meta.get_field(field.source)
+            except FieldDoesNotExist:
+                continue
+            if model_field.concrete and not model_field.many_to_many:
+                names.append(field.source)
+        return names
+
+
+class ValuesListMixin:
+    """
+    一覧取得の高速パス
+    ModelSerializer を行ごとにインスタンス化せず、values_list() の行から
+    同じJSONを直接組み立てる（api.fast_serializers）
+    values_list_enabled = True のエンドポイントで、JSONレンダラーが選ばれた場合のみ使用
+    """
+    values_list_enabled = False
+
+    def get_values_serializer(self):
+        return ValuesSerializer(self.get_serializer())
+
+    def list(self, request, *args, **kwargs):
+        response = self.get_fast_list_response(request)
+        if response is None:
+            return super().list(request, *args, **kwargs)
+        return response
+
+    def get_fast_list_response(self, request):
+        """高速パスのレスポンス（使えない場合は None）"""
+        renderer = getattr(request, 'accepted_renderer', None)
+        if not self.values_list_enabled or getattr(renderer, 'format', None) != 'json':
+            return None
+
+        values_serializer = self.get_values_serializer()
+        queryset = values_serializer.values_queryset(self.filter_queryset(self.get_queryset()))
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            data = self.get_paginated_response(values_serializer.serialize(page)).data
+        else:
+            data = values_serializer.serialize(queryset)
+        return HttpResponse(render_json(data), content_type=renderer.media_type)
+
+
+class ConditionalListMixin:
+    """
+    一覧取得の条件付きGET・圧縮レイヤー（api.compression）
+    - get_data_version_sources() のデータから ETag / Last-Modified を決め、
+      If-None-Match / If-Modified-Since が一致すれば 304 を返す
+    - レンダリング・圧縮済みの本文をデータのバージョンごとにキャッシュする
+    JSONレンダラーの場合のみ対象（ブラウザブルAPIは対象外）
+    """
+    conditional_list_enabled = True
+
+    def get_data_version_sources(self):
+        """(クエリセット, 日時フィールド) のリスト"""
+        return None
+
+    def list(self, request, *args, **kwargs):
+        renderer = getattr(request, 'accepted_renderer', None)
+        sources = self.get_data_version_sources() if self.conditional_list_enabled else None
+        if not sources or getattr(renderer, 'format', None) != 'json':
+            return super().list(request, *args, **kwargs)
+
+        last_modified, version = compression.data_version(sources)
+        etag = f'W/"{version}"'
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            compression.stats.record_not_modified()
+            return self._set_conditional_headers(not_modified, etag, last_modified)
+
+        encoding = compression.choose_encoding(request)
+        path_hash = hashlib.md5(request.get_full_path().encode('utf-8')).hexdigest()
+        cache_key = f'api_list:{self.__class__.__name__}:{version}:{encoding}:{path_hash}'
+
+        cached = cache.get(cache_key)
+        if cached is None:
+            response = super().list(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            content, content_type = self._render(request, response)
+            raw_size = len(content)
+            used_encoding = None
+            if encoding and raw_size >= compression.MIN_COMPRESS_SIZE:
+                content = compression.compress(content, encoding)
+                used_encoding = encoding
+            cache.set(cache_key, (content, content_type, used_encoding, raw_size), compression.CACHE_TIMEOUT)
+        else:
+            content, content_type, used_encoding, raw_size = cached
+
+        compression.stats.record(raw_size, len(content), cache_hit=cached is not None, compressed=bool(used_encoding))
+        response = HttpResponse(content, content_type=content_type)
+        if used_encoding:
+            response['Content-Encoding'] = used_encoding
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return self._set_conditional_headers(response, etag, last_modified)
+
+    def _render(self, request, response):
+        """DRFのResponseをレンダリングして (本文, Content-Type) を返す"""
+        if isinstance(response, Response):
+            response.accepted_renderer = request.accepted_renderer
+            response.accepted_media_type = request.accepted_media_type
+            response.renderer_context = self.get_renderer_context()
+            response.render()
+        return response.content, response['Content-Type']
+
+    @staticmethod
+    def _set_conditional_headers(response, etag, last_modified):
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+
+class TeamViewSet(ConditionalListMixin, viewsets.ReadOnlyModelViewSet):
     """
     Team read-only operations
     """
@@ -309,17 +550,73 @@ class TeamViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = TeamSerializer
     permission_classes = [AllowAny]
 
+    def get_data_version_sources(self):
+        return [(Team.objects.all(), 'updated_at')]
 
-class PlayerViewSet(viewsets.ReadOnlyModelViewSet):
+
+class PlayerViewSet(SparseFieldsetMixin, ConditionalListMixin, ValuesListMixin, viewsets.ReadOnlyModelViewSet):
     """
     Player read-only operations with stats
+    ?fields= / ?expand= で出力フィールドを絞り込み可能
+
+    成績（stats）の絞り込み:
+        - season: シーズン年 / latest（最新シーズンのみ） / all（全シーズン）
+          デフォルトは一覧が latest、詳細が all
+        - stat_type: hitting / pitching
     """
-    queryset = Player.objects.all().select_related('team').prefetch_related('stats')
+    queryset = Player.objects.all().select_related('team')
     serializer_class = PlayerSerializer
     permission_classes = [AllowAny]
+    pagination_class = PlayerPagination
+    values_list_enabled = True
+
+    def get_stats_queryset(self):
+        """Prefetchで使用する成績のクエリセット"""
+        stats = PlayerStats.objects.all()
+
+        stat_type = self.request.query_params.get('stat_type', None)
+        season = self.request.query_params.get('season', None)
+        if season is None:
+            season = 'latest' if self.action == 'list' else 'all'
+
+        if stat_type:
+            stats = stats.filter(stat_type=stat_type)
+
+        if season == 'latest':
+            # 選手ごとの最新シーズンのみ
+            latest_season = PlayerStats.objects.filter(player=OuterRef('player'))
+            if stat_type:
+                latest_season = latest_season.filter(stat_type=stat_type)
+            latest_season = latest_season.order_by('-season').values('season')[:1]
+            stats = stats.filter(season=Subquery(latest_season))
+        elif season != 'all':
+            try:
+                stats = stats.filter(season=int(season))
+            except ValueError:
+                pass
+
+        return stats
+
+    def get_data_version_sources(self):
+        return [
+            (Player.objects.all(), 'updated_at'),
+            (PlayerStats.objects.all(), 'updated_at'),
+            (Team.objects.all(), 'updated_at'),
+        ]
+
+    def get_prefetch_lookup(self, source):
+        if source == 'stats':
+            return Prefetch('stats', queryset=self.get_stats_queryset())
+        return super().get_prefetch_lookup(source)
+
+    def get_values_serializer(self):
+        return ValuesSerializer(
+            self.get_serializer(),
+            many_querysets={'stats': self.get_stats_queryset()},
+        )
 
     def get_queryset(self):
-        queryset = super().get_queryset()
+        queryset = super().get_queryset().prefetch_related(self.get_prefetch_lookup('stats'))
 
         # フィルタリングオプション
         name = self.request.query_params.get('name', None)
@@ -333,19 +630,23 @@ class PlayerViewSet(viewsets.ReadOnlyModelViewSet):
         if has_stats == 'true':
             queryset = queryset.filter(stats__isnull=False).distinct()
 
-        return queryset
+        return self.apply_sparse_fieldset(queryset)
 
 
-class ToppsCardViewSet(viewsets.ModelViewSet):
+class ToppsCardViewSet(SparseFieldsetMixin, ConditionalListMixin, ValuesListMixin, viewsets.ModelViewSet):
     """
     Topps NOW card operations - read for all, write for superuser only
     Anti-scraping measures applied
+    ?fields= / ?expand= で出力フィールドを絞り込み可能
+    一覧（フィールド指定なし）はリードモデル（ToppsCardSearch）からJOINなしで返す
     """
     queryset = ToppsCard.objects.all().select_related(
         'player', 'team', 'topps_set'
     ).order_by('-created_at')
     serializer_class = ToppsCardSerializer
     pagination_class = None  # ページネーションを無効化
+    values_list_enabled = True
+    search_model_enabled = True
 
     def get_throttles(self):
         """一覧取得にはスクレイピング対策のスロットリングを適用"""
@@ -369,6 +670,59 @@ class ToppsCardViewSet(viewsets.ModelViewSet):
             )
         return super().list(request, *args, **kwargs)
 
+    def get_data_version_sources(self):
+        # bulk_update / update() でも ToppsCard.updated_at を更新している
+        return [
+            (ToppsCard.objects.all(), 'updated_at'),
+            (ToppsCardSearch.objects.all(), 'updated_at'),
+        ]
+
+    def get_fast_list_response(self, request):
+        response = self.list_from_search_model(request)
+        if response is None:
+            response = super().get_fast_list_response(request)
+        return response
+
+    def get_search_queryset(self):
+        """リードモデルに対して get_queryset と同じ絞り込みを行う"""
+        entries = ToppsCardSearch.objects.order_by('-card_created_at')
+
+        card_number = self.request.query_params.get('card_number', None)
+        player_name = self.request.query_params.get('player', None)
+        year = self.request.query_params.get('year', None)
+        limit = self.request.query_params.get('limit', None)
+
+        if card_number:
+            entries = entries.filter(card_number=card_number)
+        if player_name:
+            entries = entries.filter(player_name_key__contains=normalize_search_key(player_name))
+        if year:
+            entries = entries.filter(year=year)
+        if limit:
+            try:
+                entries = entries[:int(limit)]
+            except ValueError:
+                pass
+
+        return entries
+
+    def list_from_search_model(self, request):
+        """
+        保存済みJSONを連結して一覧を返す（使えない場合は None）
+        リードモデルが未構築の場合は通常の一覧にフォールバック
+        """
+        renderer = getattr(request, 'accepted_renderer', None)
+        if (not self.search_model_enabled or self.get_sparse_options()
+                or getattr(renderer, 'format', None) != 'json'):
+            return None
+
+        documents = list(self.get_search_queryset().values_list('document', flat=True))
+        if not documents and not ToppsCardSearch.objects.exists():
+            return None
+
+        content = ('[' + ','.join(documents) + ']').encode('utf-8')
+        return HttpResponse(content, content_type=renderer.media_type)
+
     def _get_client_ip(self, request):
         x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
         if x_forwarded_for:
@@ -383,6 +737,14 @@ class ToppsCardViewSet(viewsets.ModelViewSet):
             )
         return super().update(request, *args, **kwargs)
 
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        refresh_card_search(ToppsCard.objects.filter(pk=serializer.instance.pk))
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        refresh_card_search(ToppsCard.objects.filter(pk=serializer.instance.pk))
+
     def partial_update(self, request, *args, **kwargs):
         if not request.user.is_superuser:
             return Response(
@@ -400,7 +762,8 @@ class ToppsCardViewSet(viewsets.ModelViewSet):
                 update_fields[field] = request.data[field]
 
         logger.warning(f"=== Update fields: {update_fields}")
-        ToppsCard.objects.filter(id=instance.id).update(**update_fields)
+        ToppsCard.objects.filter(id=instance.id).update(**update_fields, updated_at=timezone.now())
+        refresh_card_search(ToppsCard.objects.filter(id=instance.id))
 
         # 再取得
         instance = ToppsCard.objects.get(id=instance.id)
@@ -432,6 +795,7 @@ class ToppsCardViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(player__full_name__icontains=player_name)
         if year:
             queryset = queryset.filter(topps_set__year=year)
+        queryset = self.apply_sparse_fieldset(queryset)
         if limit:
             try:
                 queryset = queryset[:int(limit)]
@@ -441,7 +805,7 @@ class ToppsCardViewSet(viewsets.ModelViewSet):
         return queryset
 
 
-class WBCTournamentViewSet(viewsets.ReadOnlyModelViewSet):
+class WBCTournamentViewSet(ConditionalListMixin, viewsets.ReadOnlyModelViewSet):
     """
     WBC Tournament read-only operations
     """
@@ -450,6 +814,13 @@ class WBCTournamentViewSet(viewsets.ReadOnlyModelViewSet):
     throttle_classes = []
     pagination_class = None
 
+    def get_data_version_sources(self):
+        return [
+            (WBCTournament.objects.all(), 'created_at'),
+            (WBCGame.objects.all(), 'created_at'),
+            (WBCRosterEntry.objects.all(), 'created_at'),
+        ]
+
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return WBCTournamentDetailSerializer
@@ -470,57 +841,177 @@ class WBCTournamentViewSet(viewsets.ReadOnlyModelViewSet):
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
-def get_game_id(request):
+def leaderboards(request):
+    """
+    成績ランキング（refresh_leaderboards で事前計算した上位N人）
+    パラメータ:
+        - season: シーズン年（省略時はランキングのある最新シーズン）
+        - stat: 指標（home_runs, batting_avg, ops, era, whip, strikeouts。省略時は全指標）
+        - limit: 各指標の順位の上限（デフォルト: 10、最大: 50）
+    """
+    stat = request.query_params.get('stat')
+    if stat and stat not in LEADERBOARDS:
+        return Response(
+            {'error': f'stat must be one of: {", ".join(LEADERBOARDS)}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        season = request.query_params.get('season')
+        season = int(season) if season else None
+        limit = min(max(int(request.query_params.get('limit', 10)), 1), LEADERBOARD_TOP_N)
+    except ValueError:
+        return Response({'error': 'season and limit must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+
+    if season is None:
+        season = LeaderboardEntry.objects.aggregate(season=Max('season'))['season']
+
+    entries = LeaderboardEntry.objects.filter(season=season, rank__lte=limit)
+    if stat:
+        entries = entries.filter(stat=stat)
+    rows = entries.order_by('stat', 'rank', 'player_name').values_list(
+        'stat', 'rank', 'player_id', 'player_name', 'team_abbreviation',
+        'value', 'qualifier_value', 'qualifier_min',
+    )
+
+    boards = {
+        key: {'label': config['label'], 'qualifier_min': None, 'results': []}
+        for key, config in LEADERBOARDS.items() if not stat or key == stat
+    }
+    for stat_key, rank, player_id, player_name, team, value, qualifier_value, qualifier_min in rows:
+        board = boards[stat_key]
+        board['qualifier_min'] = float(qualifier_min) if qualifier_min is not None else None
+        board['results'].append({
+            'rank': rank,
+            'player_id': player_id,
+            'player_name': player_name,
+            'team': team,
+            'value': format_value(stat_key, value),
+            'qualifier_value': float(qualifier_value) if qualifier_value is not None else None,
+        })
+    return Response({'season': season, 'leaderboards': boards})
+
+
+# =========================
+# MLB API プロキシ（非同期ビュー）
+# 外部APIの応答を待つ間にスレッドを占有しないよう、DRFを通さない async ビューにしている
+# （本番は nginx が /api/mlb/ を ASGI サーバー（docker-compose の django_asgi）に振り分ける。開発の runserver でもそのまま動作する）
+# DRFを通さないため、認証とレート制限は check_throttles で明示的に行う
+# =========================
+
+@require_GET
+async def get_game_id(request):
     """
     MLB Stats APIからチームの試合IDを取得
+    結果は (team_id, date) ごとにキャッシュし、保存済みの ToppsCard.mlb_game_id があればAPIを呼ばない
     パラメータ:
         - team_id: MLBチームID
         - date: 日付 (YYYY-MM-DD形式)
+        - async: 1 の場合は取得をジョブとして登録し、すぐに 202 とジョブIDを返す
+          （結果は /api/jobs/<id>/ で確認）
     """
     try:
-        import statsapi
-    except ImportError:
-        return Response(
-            {'error': 'MLB-StatsAPI is not installed'},
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
+        await sync_to_async(check_throttles)(request)
+    except exceptions.APIException as e:
+        response = JsonResponse({'detail': str(e.detail)}, status=e.status_code)
+        if getattr(e, 'wait', None):
+            response['Retry-After'] = str(int(e.wait))
+        return response
 
-    team_id = request.query_params.get('team_id')
-    date = request.query_params.get('date')
+    team_id = request.GET.get('team_id')
+    date = request.GET.get('date')
 
     if not team_id or not date:
-        return Response(
+        return JsonResponse(
             {'error': 'team_id and date are required'},
             status=status.HTTP_400_BAD_REQUEST
         )
 
     try:
-        # 日付フォーマットを変換 (YYYY-MM-DD -> MM/DD/YYYY)
-        from datetime import datetime
-        date_obj = datetime.strptime(date, '%Y-%m-%d')
-        date_formatted = date_obj.strftime('%m/%d/%Y')
-
-        games = statsapi.schedule(date=date_formatted, team=int(team_id))
+        int(team_id)
+        datetime.strptime(date, '%Y-%m-%d')
+    except ValueError:
+        return JsonResponse(
+            {'error': 'team_id must be an integer and date must be YYYY-MM-DD'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
 
-        if games:
-            game = games[0]
-            return Response({
-                'game_id': game['game_id'],
-                'away_team': game['away_name'],
-                'home_team': game['home_name'],
-                'away_score': game.get('away_score'),
-                'home_score': game.get('home_score'),
-                'status': game.get('status'),
-                'game_url': f"https://www.mlb.com/gameday/{game['game_id']}"
-            })
-        else:
-            return Response(
-                {'error': 'No game found', 'game_id': None},
-                status=status.HTTP_404_NOT_FOUND
-            )
+    if request.GET.get('async') in ('1', 'true'):
+        # キャッシュ済みならジョブにせずそのまま返す
+        found, game = await mlb_games.acached_game(team_id, date)
+        if found:
+            return _game_response(game)
+        job = await sync_to_async(jobs.enqueue)(
+            'mlb_game',
+            {'team_id': int(team_id), 'date': date},
+            dedupe_key=f'mlb_game:{int(team_id)}:{date}',
+        )
+        return JsonResponse(_job_data(request, job), status=status.HTTP_202_ACCEPTED)
 
+    try:
+        game = await mlb_games.aget_game(team_id, date)
     except Exception as e:
-        return Response(
+        return JsonResponse(
             {'error': str(e)},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
+    return _game_response(game)
+
+
+def _game_response(game):
+    if game is None:
+        return JsonResponse(
+            {'error': 'No game found', 'game_id': None},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    return JsonResponse(game)
+
+
+def _job_data(request, job):
+    data = BackgroundJobSerializer(job).data
+    data['status_url'] = request.build_absolute_uri(reverse('job_status', args=[job.pk]))
+    return data
+
+
+def _job_accepted(request, job):
+    return Response(_job_data(request, job), status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def enqueue_command(request):
+    """
+    管理コマンドをジョブとして登録（superuserのみ）
+    body: {"command": "update_card_teams", "options": {"limit": 100}}
+    """
+    if not request.user.is_superuser:
+        return Response({'error': '権限がありません'}, status=status.HTTP_403_FORBIDDEN)
+
+    serializer = JobCommandSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    command = serializer.validated_data['command']
+    if command not in jobs.JOB_COMMANDS:
+        return Response(
+            {'error': f'実行できないコマンドです: {command}', 'commands': sorted(jobs.JOB_COMMANDS)},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    job = jobs.enqueue(
+        'management_command',
+        {'command': command, 'options': serializer.validated_data['options']},
+        requested_by=request.user,
+    )
+    return _job_accepted(request, job)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def job_status(request, job_id):
+    """ジョブの状態と結果（管理コマンドのジョブはsuperuserのみ）"""
+    try:
+        job = BackgroundJob.objects.get(pk=job_id)
+    except BackgroundJob.DoesNotExist:
+        return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    if job.task == 'management_command' and not request.user.is_superuser:
+        return Response({'error': '権限がありません'}, status=status.HTTP_403_FORBIDDEN)
+    return Response(BackgroundJobSerializer(job).data)
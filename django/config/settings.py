@@ -108,6 +108,25 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Cache
+# レート制限のカウンター・ブログの閲覧数・詳細APIのキャッシュなどはワーカー間で共有する必要があるため、
+# 本番は REDIS_URL（docker-compose の redis サービス）を設定する。未設定の場合はプロセスごとのメモリ（開発用）
+REDIS_URL = os.getenv('REDIS_URL', '')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        },
+    }
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -135,6 +154,19 @@ REST_FRAMEWORK = {
     },
 }
 
+# Anti-scraping: User-Agent / Referer 判定ルール（更新すると再起動なしで反映）
+BOT_RULES_FILE = BASE_DIR / 'json' / 'bot_rules.json'
+BOT_RULES_CACHE_SIZE = 4096
+
+# スクレイピングで取得したページの保存先（reparse_pages で再抽出に使う）・update_card_teams のロースター
+SCRAPE_STORE_DIR = Path(os.getenv('SCRAPE_STORE_DIR', BASE_DIR / 'scrape_store'))
+
+# ブログ画像の元ファイルの一時置き場（全サイズの WebP を生成するまで保持。run_jobs ワーカーと共有）
+BLOG_UPLOAD_STAGING_DIR = Path(os.getenv('BLOG_UPLOAD_STAGING_DIR', BASE_DIR / 'upload_staging'))
+
+# 分析用の列指向データの出力先（export_analytics）
+ANALYTICS_EXPORT_DIR = Path(os.getenv('ANALYTICS_EXPORT_DIR', BASE_DIR / 'exports'))
+
 # JWT Settings
 from datetime import timedelta
 
@@ -24,4 +24,9 @@ echo "Collecting static files..."
 python manage.py collectstatic --noinput --clear || true
 
 echo "Starting server..."
+if [ "$DEBUG" = "False" ]; then
+  # 本番はgunicornのスレッドワーカー（同期のDRFビューを並列に処理する。ASGIでは同期ビューが1スレッドに直列化される）
+  # MLB APIプロキシ（/api/mlb/）は nginx が django_asgi（uvicorn）に振り分ける
+  exec gunicorn config.wsgi:application --bind 0.0.0.0:8000 --worker-class gthread --workers "${GUNICORN_WORKERS:-2}" --threads "${GUNICORN_THREADS:-8}" --forwarded-allow-ips '*'
+fi
 exec python manage.py runserver 0.0.0.0:8000
\ No newline at end of file